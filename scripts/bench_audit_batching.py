@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк записи аудита при массовом обновлении проектов
+Запуск: python scripts/bench_audit_batching.py [--projects 50] [--rounds 20] [--latency-ms 0.5]
+
+Обновляет --projects проектов за один flush и сравнивает:
+- per-row: INSERT в audit_logs из каждого listener'а (AUDIT_BATCH_WRITES=False)
+- batched: записи копятся за flush и пишутся одним многострочным INSERT
+
+Работает на SQLite в памяти; --latency-ms добавляет задержку на каждый запрос,
+имитируя сетевой round trip до PostgreSQL. Перед замером проверяет, что
+содержимое и порядок строк audit_logs в обоих режимах совпадают.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+import src.core.audit_listeners  # noqa: F401  регистрирует listener'ы
+from src.core.config import settings
+from src.model.models import AuditLog, Base, Project, User
+
+
+def build_engine(latency_ms: float):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*args):
+        statements.append(args[2])
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+
+    return engine, statements
+
+
+def seed(engine, projects: int) -> None:
+    with Session(engine) as session:
+        author = User(first_name="Bench", middle_name="", email="bench@example.com", password_hashed="-")
+        session.add(author)
+        session.flush()
+        session.add_all(Project(name=f"project {i}", author_id=author.id) for i in range(projects))
+        session.commit()
+
+
+def run(batched: bool, projects: int, rounds: int, latency_ms: float) -> tuple[float, int, list[tuple]]:
+    settings.AUDIT_BATCH_WRITES = batched
+    engine, statements = build_engine(latency_ms)
+    seed(engine, projects)
+
+    statements.clear()
+    started = time.perf_counter()
+    for round_number in range(rounds):
+        with Session(engine) as session:
+            for project in session.scalars(select(Project)):
+                project.description = f"round {round_number}"
+            session.commit()
+    elapsed = time.perf_counter() - started
+
+    with Session(engine) as session:
+        rows = session.execute(
+            select(AuditLog.entity_type, AuditLog.entity_id, AuditLog.action, AuditLog.old_values).order_by(AuditLog.id)
+        ).all()
+    return elapsed, len(statements), [tuple(row) for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    results = {
+        "per-row": run(False, args.projects, args.rounds, args.latency_ms),
+        "batched": run(True, args.projects, args.rounds, args.latency_ms),
+    }
+    if results["per-row"][2] != results["batched"][2]:
+        print("Строки audit_logs в режимах различаются")
+        sys.exit(1)
+    print(f"audit_logs совпадают: {len(results['batched'][2])} строк")
+
+    print(f"\n{'mode':<10} {'statements/flush':>17} {'ms/flush':>10}")
+    for mode, (elapsed, statements, _) in results.items():
+        print(f"{mode:<10} {statements / args.rounds:>17.1f} {elapsed / args.rounds * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк накладных расходов listener'ов аудита на одно событие
+Запуск: python scripts/bench_audit_listeners.py [--objects 200] [--rounds 20]
+
+Сравнивает:
+- legacy: прежние listener'ы на каждую модель — sqlalchemy_inspect и обход всех
+  колонок mapper'а на каждое событие (INSERT — getattr каждой колонки,
+  UPDATE — история каждого атрибута)
+- registry: listener'ы на примеси Auditable с описанием модели, построенным
+  один раз (INSERT — словарь состояния, UPDATE — только измененные атрибуты)
+
+Замеряются тело listener'а на загруженных объектах (us/event) и полный flush
+на SQLite в памяти: --objects вставок, затем --rounds обновлений всех объектов.
+Перед замером проверяет, что записи UPDATE в обоих режимах совпадают.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import date
+from datetime import time as clock_time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.inspection import inspect as sqlalchemy_inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import instance_state
+
+from src.core import audit_listeners
+from src.core.audit_listeners import audit_insert, audit_spec, audit_update
+from src.model.models import Auditable, AuditLog, Base, Project, User
+
+
+def legacy_json_value(value):
+    if isinstance(value, date | clock_time):
+        return value.isoformat()
+    return value
+
+
+def legacy_model_to_dict(obj) -> dict:
+    mapper = sqlalchemy_inspect(obj.__class__)
+    return {column.name: legacy_json_value(getattr(obj, column.name, None)) for column in mapper.columns}
+
+
+def legacy_get_changes(mapper, target) -> tuple[dict, dict]:
+    state = sqlalchemy_inspect(target)
+    old_values = {}
+    new_values = {}
+    for attr in mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if not history.has_changes():
+            continue
+        before = history.deleted[0] if history.deleted else None
+        after = history.added[0] if history.added else None
+        if before == after:
+            continue
+        name = attr.columns[0].name
+        old_values[name] = before
+        new_values[name] = after
+    return old_values, new_values
+
+
+def legacy_insert(mapper, connection, target) -> None:
+    spec = audit_spec(mapper.class_)
+    audit_listeners._record_audit(
+        connection, instance_state(target), spec, "INSERT", old_values=None, new_values=legacy_model_to_dict(target)
+    )
+
+
+def legacy_update(mapper, connection, target) -> None:
+    old_values, new_values = legacy_get_changes(mapper, target)
+    if new_values:
+        audit_listeners._record_audit(
+            connection,
+            instance_state(target),
+            audit_spec(mapper.class_),
+            "UPDATE",
+            old_values=old_values,
+            new_values=new_values,
+        )
+
+
+def use_listeners(mode: str) -> None:
+    """Переключить listener'ы INSERT/UPDATE проектов на прежние или на реестр"""
+    if mode == "legacy":
+        event.remove(Auditable, "after_insert", audit_insert)
+        event.remove(Auditable, "before_update", audit_update)
+        event.listen(Project, "after_insert", legacy_insert)
+        event.listen(Project, "before_update", legacy_update)
+    else:
+        event.remove(Project, "after_insert", legacy_insert)
+        event.remove(Project, "before_update", legacy_update)
+        event.listen(Auditable, "after_insert", audit_insert, propagate=True)
+        event.listen(Auditable, "before_update", audit_update, propagate=True)
+
+
+def measure_bodies(objects: int, rounds: int) -> None:
+    """Время тела listener'а без записи в БД"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        author = User(first_name="Bench", middle_name="", email="bench@example.com", password_hashed="-")
+        session.add(author)
+        session.flush()
+        session.add_all(Project(name=f"project {i}", author_id=author.id) for i in range(objects))
+        session.commit()
+
+        projects = session.scalars(select(Project)).all()
+        for project in projects:
+            project.description = "changed"
+        mapper = sqlalchemy_inspect(Project)
+        spec = audit_spec(Project)
+
+        cases = {
+            "insert legacy": legacy_model_to_dict,
+            "insert registry": lambda project: spec.row_values(instance_state(project)),
+            "update legacy": lambda project: legacy_get_changes(mapper, project),
+            "update registry": lambda project: spec.changes(instance_state(project)),
+        }
+        print(f"{'listener body':<18} {'us/event':>9}")
+        for name, body in cases.items():
+            started = time.perf_counter()
+            for _ in range(rounds):
+                for project in projects:
+                    body(project)
+            elapsed = time.perf_counter() - started
+            print(f"{name:<18} {elapsed / (rounds * len(projects)) * 1e6:>9.2f}")
+        session.rollback()
+
+
+def run_flushes(mode: str, objects: int, rounds: int) -> tuple[float, float, int, list[tuple]]:
+    use_listeners(mode)
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    with Session(engine) as session:
+        author = User(first_name="Bench", middle_name="", email="bench@example.com", password_hashed="-")
+        session.add(author)
+        session.commit()
+        author_id = author.id
+
+    statements.clear()
+    started = time.perf_counter()
+    with Session(engine) as session:
+        session.add_all(Project(name=f"project {i}", author_id=author_id) for i in range(objects))
+        session.commit()
+    insert_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for round_number in range(rounds):
+        with Session(engine) as session:
+            for project in session.scalars(select(Project)):
+                project.description = f"round {round_number}"
+            session.commit()
+    update_elapsed = time.perf_counter() - started
+
+    with Session(engine) as session:
+        rows = session.execute(
+            select(AuditLog.entity_id, AuditLog.old_values, AuditLog.new_values)
+            .where(AuditLog.action == "UPDATE")
+            .order_by(AuditLog.id)
+        ).all()
+    return insert_elapsed, update_elapsed / rounds, len(statements), [tuple(row) for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    measure_bodies(args.objects, args.rounds)
+
+    results = {mode: run_flushes(mode, args.objects, args.rounds) for mode in ("legacy", "registry")}
+    if results["legacy"][3] != results["registry"][3]:
+        print("Записи UPDATE в режимах различаются")
+        sys.exit(1)
+    print(f"\nЗаписи UPDATE совпадают: {len(results['registry'][3])}")
+
+    print(f"\n{'mode':<10} {'insert ms':>10} {'update ms/flush':>16} {'statements':>11}")
+    for mode, (insert_elapsed, update_elapsed, statements, _) in results.items():
+        print(f"{mode:<10} {insert_elapsed * 1000:>10.2f} {update_elapsed * 1000:>16.2f} {statements:>11}")
+
+
+if __name__ == "__main__":
+    main()
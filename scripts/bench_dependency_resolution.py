@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк накладных расходов на разрешение зависимостей запроса
+Запуск: python scripts/bench_dependency_resolution.py [--requests 5000]
+
+Поднимает минимальное FastAPI приложение с двумя GET эндпоинтами, которым нужен
+UserService (типичная цепочка UserService -> AuthService -> SessionService):
+- legacy: прежний контейнер, каждая зависимость создает репозиторий/сервис заново,
+  AuthService строит argon2 hasher через PasswordHash.recommended()
+- scoped: src.core.container, граф запроса собирается лениво через RequestScope
+
+UoW подменяется заглушкой, поэтому измеряется только работа контейнера и FastAPI.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import Depends, FastAPI
+from pwdlib import PasswordHash
+
+from src.core import container
+from src.repository.session_repository import SessionRepository
+from src.repository.user_repository import UserRepository
+from src.services.auth_service import AuthService
+from src.services.session_service import SessionService
+from src.services.user_service import UserService
+
+
+class DummyUoW:
+    """UoW без подключения к БД"""
+
+    session = None
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+async def get_dummy_uow() -> AsyncGenerator[DummyUoW, None]:
+    yield DummyUoW()
+
+
+# Прежняя схема: каждая зависимость строит объект заново
+async def legacy_user_repository(uow=Depends(get_dummy_uow)) -> UserRepository:
+    return UserRepository(uow)
+
+
+async def legacy_session_repository(uow=Depends(get_dummy_uow)) -> SessionRepository:
+    return SessionRepository(uow)
+
+
+async def legacy_session_service(
+    repository: SessionRepository = Depends(legacy_session_repository),
+) -> SessionService:
+    return SessionService(repository)
+
+
+async def legacy_auth_service(
+    repository: UserRepository = Depends(legacy_user_repository),
+    session_service: SessionService = Depends(legacy_session_service),
+) -> AuthService:
+    service = AuthService(repository, session_service)
+    # Прежний AuthService.__init__ создавал hasher на каждый запрос
+    service._pwd_context = PasswordHash.recommended()
+    return service
+
+
+async def legacy_user_service(
+    repository: UserRepository = Depends(legacy_user_repository),
+    auth_service: AuthService = Depends(legacy_auth_service),
+) -> UserService:
+    return UserService(repository, auth_service)
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy")
+    async def legacy(_service: UserService = Depends(legacy_user_service)) -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.get("/scoped")
+    async def scoped(_service: UserService = Depends(container.get_user_service)) -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.get("/empty")
+    async def empty() -> dict[str, str]:
+        return {"status": "ok"}
+
+    app.dependency_overrides[container.get_uow] = get_dummy_uow
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> list[float]:
+    # Прогрев
+    for _ in range(100):
+        await client.get(path)
+
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(path)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        results = {path: await measure(client, path, args.requests) for path in ("/empty", "/legacy", "/scoped")}
+
+    baseline = statistics.median(results["/empty"])
+    print(f"Запросов на эндпоинт: {args.requests}")
+    print(f"{'endpoint':<10} {'median, us':>12} {'p99, us':>10} {'overhead, us':>14}")
+    for path, latencies in results.items():
+        median = statistics.median(latencies)
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(f"{path:<10} {median * 1e6:>12.1f} {p99 * 1e6:>10.1f} {(median - baseline) * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
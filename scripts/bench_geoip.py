@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк офлайн-геолокации IP
+Запуск: python scripts/bench_geoip.py [--database data/geoip.bin] [--workers 4]
+
+Без --database собирает синтетическую базу (--ipv4-ranges/--ipv6-ranges диапазонов)
+во временном файле. Замеряет:
+- стоимость lookup для IPv4, IPv6 и адресов вне диапазонов
+- память отображения базы в воркерах: каждый из --workers процессов (fork, как
+  воркеры uvicorn) открывает базу и читает все ее страницы; Rss — память,
+  видимая процессу, Pss — его доля с учетом страниц, разделенных с другими
+  процессами. Pss ≈ Rss / workers означает, что копия базы в памяти одна.
+
+Только Linux (читает /proc/self/smaps).
+"""
+
+from __future__ import annotations
+
+import argparse
+import ipaddress
+import mmap
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.util.geoip import GeoIPDatabase, GeoIPRange, write_database
+
+COUNTRIES = ["RU", "US", "DE", "FR", "CN", "JP", "BR", "IN", "GB", "KZ"]
+CITIES = ["Moscow", "New York", "Berlin", "Paris", "Beijing", "Tokyo", "Sao Paulo", "Mumbai", "London", "Almaty"]
+
+
+def synthetic_ranges(ipv4_ranges: int, ipv6_ranges: int) -> list[GeoIPRange]:
+    """Непересекающиеся диапазоны, равномерно покрывающие часть адресного пространства"""
+    ranges: list[GeoIPRange] = []
+    step = 2**32 // ipv4_ranges
+    for i in range(ipv4_ranges):
+        location = i % len(COUNTRIES)
+        start = i * step
+        ranges.append(
+            (
+                ipaddress.IPv4Address(start),
+                ipaddress.IPv4Address(start + step // 2),
+                COUNTRIES[location],
+                CITIES[location],
+            )
+        )
+
+    base = int(ipaddress.IPv6Address("2000::"))
+    step = 2**124 // max(ipv6_ranges, 1)
+    for i in range(ipv6_ranges):
+        location = i % len(COUNTRIES)
+        start = base + i * step
+        ranges.append(
+            (
+                ipaddress.IPv6Address(start),
+                ipaddress.IPv6Address(start + step // 2),
+                COUNTRIES[location],
+                CITIES[location],
+            )
+        )
+    return ranges
+
+
+def measure_lookup(database: GeoIPDatabase, addresses: list[str]) -> float:
+    started = time.perf_counter()
+    for address in addresses:
+        database.lookup(address)
+    return (time.perf_counter() - started) / len(addresses) * 1e6
+
+
+def mapping_memory(path: Path) -> tuple[int, int]:
+    """Rss и Pss (KiB) отображения файла в текущем процессе"""
+    rss = pss = 0
+    inside = False
+    resolved = str(path.resolve())
+    with open("/proc/self/smaps") as smaps:
+        for line in smaps:
+            fields = line.split()
+            if "-" in fields[0] and ":" not in fields[0]:
+                inside = fields[-1] == resolved
+            elif inside and fields[0] == "Rss:":
+                rss += int(fields[1])
+            elif inside and fields[0] == "Pss:":
+                pss += int(fields[1])
+    return rss, pss
+
+
+def run_worker(path: Path, write_fd: int) -> None:
+    database = GeoIPDatabase(path)
+    # Читаем все страницы, как после долгой работы воркера
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+    for offset in range(0, size, mmap.PAGESIZE):
+        database._buffer[offset]
+    database.lookup("8.8.8.8")
+
+    # Ждем, пока все воркеры прочитают базу, чтобы Pss учел разделение страниц
+    time.sleep(1)
+    rss, pss = mapping_memory(path)
+    os.write(write_fd, f"{os.getpid()} {rss} {pss}\n".encode())
+    os._exit(0)
+
+
+def measure_workers(path: Path, workers: int) -> None:
+    read_fd, write_fd = os.pipe()
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            run_worker(path, write_fd)
+        children.append(pid)
+    os.close(write_fd)
+
+    for pid in children:
+        os.waitpid(pid, 0)
+    with os.fdopen(read_fd) as output:
+        lines = output.read().split()
+
+    print(f"\n{'worker':<10} {'Rss KiB':>10} {'Pss KiB':>10}")
+    total_rss = total_pss = 0
+    for i in range(0, len(lines), 3):
+        pid, rss, pss = lines[i], int(lines[i + 1]), int(lines[i + 2])
+        total_rss += rss
+        total_pss += pss
+        print(f"{pid:<10} {rss:>10} {pss:>10}")
+    print(f"{'total':<10} {total_rss:>10} {total_pss:>10}")
+    print(f"Размер файла: {path.stat().st_size // 1024} KiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", type=Path)
+    parser.add_argument("--ipv4-ranges", type=int, default=500_000)
+    parser.add_argument("--ipv6-ranges", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.database
+        if path is None:
+            path = Path(directory) / "geoip.bin"
+            started = time.perf_counter()
+            write_database(path, synthetic_ranges(args.ipv4_ranges, args.ipv6_ranges))
+            print(f"Синтетическая база собрана за {time.perf_counter() - started:.1f} s")
+
+        database = GeoIPDatabase(path)
+        print(f"База: {database.ipv4_ranges} диапазонов IPv4, {database.ipv6_ranges} IPv6")
+
+        rng = random.Random(42)
+        ipv4 = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(args.lookups)]
+        ipv6 = [str(ipaddress.IPv6Address((0x2000 << 112) | rng.getrandbits(112))) for _ in range(args.lookups)]
+        invalid = ["unknown"] * args.lookups
+
+        print(f"\n{'lookup':<10} {'us/op':>8}")
+        for name, addresses in (("ipv4", ipv4), ("ipv6", ipv6), ("invalid", invalid)):
+            print(f"{name:<10} {measure_lookup(database, addresses):>8.2f}")
+        database.close()
+
+        measure_workers(path, args.workers)
+
+
+if __name__ == "__main__":
+    main()
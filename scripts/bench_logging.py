@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пропускной способности запросов при логировании на уровне INFO
+Запуск: python scripts/bench_logging.py [--requests 5000] [--concurrency 50] [--logs-per-request 3]
+
+Поднимает приложение FastAPI с LoggingMiddleware и эндпоинтом, который пишет
+--logs-per-request записей INFO (как репозитории и сервисы), и прогоняет
+запросы через ASGI-транспорт httpx в том же процессе. Сравнивает:
+- direct: обработчики (stdout и два RotatingFileHandler) на корневом логгере,
+  запись на диск и проверка ротации в потоке event loop
+- queue: QueueHandler с ограниченной очередью и listener в отдельном потоке
+
+Логи пишутся во временный каталог, stdout обработчика — в файл там же.
+Для queue дополнительно проверяется, что после shutdown_logging в файле
+лога есть все записи.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI
+
+from src.core.config import settings
+from src.core.logging_config import get_logger, setup_logging, shutdown_logging
+from src.core.middleware.logging_middleware import setup_logging_middleware
+
+
+def build_app(logs_per_request: int) -> FastAPI:
+    app = FastAPI()
+    setup_logging_middleware(app)
+    logger = get_logger("bench")
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int) -> dict:
+        for step in range(logs_per_request):
+            logger.info(f"Getting item {item_id} - step {step}")
+        return {"id": item_id}
+
+    return app
+
+
+async def drive(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        counter = iter(range(requests))
+
+        async def worker() -> None:
+            for item_id in counter:
+                response = await client.get(f"/items/{item_id}")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+def run(queue_enabled: bool, args: argparse.Namespace, directory: Path) -> tuple[float, int]:
+    settings.LOG_QUEUE_ENABLED = queue_enabled
+    settings.LOG_LEVEL = "INFO"
+    run_directory = directory / ("queue" if queue_enabled else "direct")
+    run_directory.mkdir()
+    os.chdir(run_directory)
+
+    stdout = sys.stdout
+    with open(run_directory / "stdout.log", "w") as console:
+        sys.stdout = console
+        try:
+            setup_logging()
+            elapsed = asyncio.run(drive(build_app(args.logs_per_request), args.requests, args.concurrency))
+            shutdown_logging()
+        finally:
+            sys.stdout = stdout
+
+    with open(run_directory / "logs" / settings.LOG_FILE) as log_file:
+        lines = sum(1 for _ in log_file)
+    return elapsed, lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--logs-per-request", type=int, default=3)
+    args = parser.parse_args()
+
+    cwd = Path.cwd()
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, queue_enabled in (("direct", False), ("queue", True)):
+            results[mode] = run(queue_enabled, args, Path(directory))
+        os.chdir(cwd)
+    # Корневой логгер остался без обработчиков: вывод бенчмарка — только print
+    expected = args.requests * (args.logs_per_request + 1)
+    print(f"{'mode':<8} {'req/s':>10} {'log lines':>10}")
+    for mode, (elapsed, lines) in results.items():
+        print(f"{mode:<8} {args.requests / elapsed:>10.0f} {lines:>10}")
+    if results["queue"][1] < expected:
+        print(f"В файле лога queue не хватает записей: {results['queue'][1]} из {expected}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
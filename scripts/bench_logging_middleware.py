@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пропускной способности LoggingMiddleware на тривиальном эндпоинте
+Запуск: python scripts/bench_logging_middleware.py [--requests 5000] [--concurrency 50]
+
+Сравнивает:
+- none: приложение без middleware (нижняя граница)
+- legacy: прежний LoggingMiddleware на BaseHTTPMiddleware (копия ниже) — задача
+  и потоки памяти на каждый запрос
+- asgi: текущий LoggingMiddleware на уровне ASGI, с X-Request-ID
+
+Запросы идут через ASGI-транспорт httpx в том же процессе; записи INFO создаются,
+но уходят в NullHandler, чтобы замер не зависел от диска.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.core.middleware.logging_middleware import LoggingMiddleware
+
+HTTP_STATUS_ERROR_THRESHOLD = 400
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app: FastAPI) -> None:
+        super().__init__(app)
+        self.logger = logging.getLogger("LegacyLoggingMiddleware")
+        self.exclude_paths = ["/docs", "/redoc", "/openapi.json", "/health", "/favicon.ico"]
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        start_time = time.time()
+        if request.url.path in self.exclude_paths:
+            return await call_next(request)
+
+        client_ip = request.client.host if request.client else "unknown"
+        user_agent = request.headers.get("user-agent", "unknown")
+        method = request.method
+        path = request.url.path
+        self.logger.debug(f"Request started - {method} {path} - IP: {client_ip} - User-Agent: {user_agent}")
+
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        status_code = response.status_code
+        user_id = getattr(request.state, "user_id", None)
+        if status_code >= HTTP_STATUS_ERROR_THRESHOLD:
+            self.logger.warning(
+                f"Request completed with error - {method} {path} - Status: {status_code} - "
+                f"Time: {process_time:.3f}s - IP: {client_ip} - User: {user_id or 'Anonymous'}"
+            )
+        else:
+            self.logger.info(
+                f"Request completed - {method} {path} - Status: {status_code} - "
+                f"Time: {process_time:.3f}s - IP: {client_ip} - User: {user_id or 'Anonymous'}"
+            )
+        response.headers["X-Process-Time"] = str(process_time)
+        return response
+
+
+def build_app(middleware: type | None) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        return {"status": "ok"}
+
+    return app
+
+
+async def drive(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        counter = iter(range(requests))
+
+        async def worker() -> None:
+            for _ in counter:
+                response = await client.get("/ping")
+                response.raise_for_status()
+
+        # Прогрев: маршрутизация и сборка стека middleware
+        await client.get("/ping")
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    root_logger = logging.getLogger()
+    root_logger.handlers = [logging.NullHandler()]
+    root_logger.setLevel(logging.INFO)
+
+    modes = {"none": None, "legacy": LegacyLoggingMiddleware, "asgi": LoggingMiddleware}
+    print(f"{'mode':<8} {'req/s':>8} {'us/request':>11}")
+    for mode, middleware in modes.items():
+        elapsed = asyncio.run(drive(build_app(middleware), args.requests, args.concurrency))
+        print(f"{mode:<8} {args.requests / elapsed:>8.0f} {elapsed / args.requests * 1e6:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк задержки event loop во время шторма логинов
+Запуск: python scripts/bench_password_hashing.py [--logins 40] [--workers 2]
+
+Поднимает минимальное FastAPI приложение с GET /ping и POST /login
+и измеряет задержку GET запросов, пока параллельно идут логины:
+- inline: argon2 выполняется прямо в async обработчике (прежнее поведение)
+- thread / process: argon2 выполняется через PasswordExecutor
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI
+from pwdlib import PasswordHash
+
+from src.core.password_executor import PasswordExecutor
+
+PASSWORD = "correct horse battery staple"
+PING_INTERVAL = 0.005
+
+
+def build_app(mode: str, executor: PasswordExecutor | None, hashed: str) -> FastAPI:
+    app = FastAPI()
+    password_hash = PasswordHash.recommended()
+
+    @app.get("/ping")
+    async def ping() -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.post("/login")
+    async def login() -> dict[str, bool]:
+        if mode == "inline":
+            valid = password_hash.verify(PASSWORD, hashed)
+        else:
+            valid = await executor.verify(PASSWORD, hashed)
+        return {"valid": valid}
+
+    return app
+
+
+async def measure(mode: str, logins: int, workers: int, pings: int) -> list[float]:
+    hashed = PasswordHash.recommended().hash(PASSWORD)
+    executor = None
+    if mode != "inline":
+        executor = PasswordExecutor(kind=mode, max_workers=workers, max_pending=logins + 1)
+        executor.start()
+        # Прогреваем пул, чтобы не измерять запуск процессов
+        await asyncio.gather(*(executor.verify(PASSWORD, hashed) for _ in range(workers)))
+
+    app = build_app(mode, executor, hashed)
+    latencies: list[float] = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        storm = asyncio.gather(*(client.post("/login") for _ in range(logins)))
+
+        # GET отправляется каждые 5мс, задержка считается от запланированного момента отправки,
+        # поэтому время, на которое argon2 блокирует event loop, попадает в измерение
+        while not storm.done() or len(latencies) < pings:
+            scheduled = time.perf_counter() + PING_INTERVAL
+            await asyncio.sleep(PING_INTERVAL)
+            await client.get("/ping")
+            latencies.append((time.perf_counter() - scheduled) * 1000)
+        await storm
+
+    if executor is not None:
+        executor.shutdown()
+    return latencies
+
+
+def report(mode: str, latencies: list[float]) -> None:
+    p50 = statistics.median(latencies)
+    p99 = statistics.quantiles(latencies, n=100, method="inclusive")[98]
+    print(f"{mode:>8}: {len(latencies):4d} GET /ping p50={p50:8.2f}ms p99={p99:8.2f}ms max={max(latencies):8.2f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40, help="Количество одновременных логинов")
+    parser.add_argument("--workers", type=int, default=2, help="Размер пула")
+    parser.add_argument("--pings", type=int, default=20, help="Минимальное количество GET запросов")
+    args = parser.parse_args()
+
+    print(f"=== Шторм из {args.logins} логинов, пул из {args.workers} воркеров ===")
+    for mode in ("inline", "thread", "process"):
+        report(mode, asyncio.run(measure(mode, args.logins, args.workers, args.pings)))
+
+
+if __name__ == "__main__":
+    main()
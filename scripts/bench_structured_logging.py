@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк стоимости вызова логгера в горячем пути репозиториев
+Запуск: python scripts/bench_structured_logging.py [--calls 200000]
+
+Сравнивает на сообщениях BaseRepository:
+- legacy: logging.Logger и f-строка — строка собирается до проверки уровня
+- structured: StructuredLogger и шаблон с именованными полями — сообщение
+  собирается только для включенного уровня
+
+Случаи: отключенный DEBUG ("Getting ... by ID"), INFO ("Retrieved N objects")
+с обработчиком в /dev/null, и тот же INFO с правилом сэмплирования 1%.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.logging_config import SamplingFilter, StructuredLogger
+
+MODEL = "Project"
+
+
+def measure(calls: int, body) -> float:
+    started = time.perf_counter()
+    for index in range(calls):
+        body(index)
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("ProjectRepository")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    with open(os.devnull, "w") as devnull:
+        handler = logging.StreamHandler(devnull)
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        logger.addHandler(handler)
+        structured = StructuredLogger(logger)
+        duration = 0.0123
+
+        cases = {
+            "debug legacy": lambda index: logger.debug(f"Getting {MODEL} by ID: {index}"),
+            "debug structured": lambda index: structured.debug(
+                "Getting %(model)s by ID: %(id)s", model=MODEL, id=index
+            ),
+            "info legacy": lambda index: logger.info(f"Retrieved {index} {MODEL} objects in {duration:.3f}s"),
+            "info structured": lambda index: structured.info(
+                "Retrieved %(count)d %(model)s objects in %(duration).3fs", count=index, model=MODEL, duration=duration
+            ),
+        }
+        results = {name: measure(args.calls, body) for name, body in cases.items()}
+
+        handler.addFilter(SamplingFilter({"*Repository:INFO:Retrieved %(count)d*": 0.01}))
+        results["info sampled 1%"] = measure(args.calls, cases["info structured"])
+
+    print(f"{'case':<18} {'ns/call':>9}")
+    for name, elapsed in results.items():
+        print(f"{name:<18} {elapsed:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк проверки JWT на запрос
+Запуск: python scripts/bench_token_decode.py [--iterations 20000]
+
+Для каждого бэкенда (python-jose, PyJWT) измеряет стоимость TokenCodec.decode:
+- cold: кэш пуст, каждый токен проверяется полностью (подпись, exp)
+- warm: один и тот же токен, claims берутся из кэша по хэшу токена
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import warnings
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.config import settings
+from src.core.token_codec import JWT_BACKENDS, TokenCodec
+
+CLAIMS = {"sub": "student@example.com", "uid": 42, "role": "student", "tv": 0, "cv": 1}
+
+
+def make_codec(backend_name: str, cache_max_size: int) -> TokenCodec:
+    return TokenCodec(
+        backend=JWT_BACKENDS[backend_name](),
+        secret_key=settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+        cache_max_size=cache_max_size,
+        cache_ttl_seconds=settings.JWT_DECODE_CACHE_TTL_SECONDS,
+    )
+
+
+def measure(backend_name: str, iterations: int) -> tuple[float, float]:
+    expire = datetime.now(UTC) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    token = make_codec(backend_name, 0).encode({**CLAIMS, "exp": expire})
+
+    cold_codec = make_codec(backend_name, 0)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        cold_codec.decode(token)
+    cold = (time.perf_counter() - started) / iterations
+
+    warm_codec = make_codec(backend_name, settings.JWT_DECODE_CACHE_MAX_SIZE)
+    warm_codec.decode(token)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        warm_codec.decode(token)
+    warm = (time.perf_counter() - started) / iterations
+
+    return cold, warm
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    # PyJWT предупреждает о коротком ключе из настроек по умолчанию на каждом вызове
+    warnings.simplefilter("ignore")
+
+    print(f"Итераций: {args.iterations}")
+    print(f"{'backend':<8} {'cold, us':>10} {'warm, us':>10} {'speedup':>9}")
+    for backend_name in JWT_BACKENDS:
+        cold, warm = measure(backend_name, args.iterations)
+        print(f"{backend_name:<8} {cold * 1e6:>10.1f} {warm * 1e6:>10.2f} {cold / warm:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк классификации User-Agent
+Запуск: python scripts/bench_user_agent.py [--iterations 200000]
+
+Сравнивает прежние методы AuthService (_parse_user_agent, _get_device_name,
+_get_os_name, _get_device_type — копия ниже) с src.util.user_agent:
+- legacy: четыре метода, каждый заново приводит строку к нижнему регистру
+- uncached: классификатор без кэша (строка приводится к нижнему регистру один раз)
+- cached: классификатор с LRU кэшем, как он вызывается при логине
+
+Перед замером проверяет, что результаты совпадают на корпусе User-Agent.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.util.user_agent import UserAgentInfo, classify_user_agent
+
+CORPUS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36 Edg/120.0.2210.91",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.2 Safari/605.1.15",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36 OPR/106.0.0.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.2 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPad; CPU OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.2 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.6099.144 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; SM-X700) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+    "Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Opera/9.80 (Windows NT 6.1; WOW64) Presto/2.12.388 Version/12.18",
+    "curl/8.4.0",
+    "python-httpx/0.28.1",
+    "PostmanRuntime/7.36.0",
+    "",
+]
+
+
+class LegacyUserAgentParser:
+    """Копия прежних методов AuthService"""
+
+    def parse_user_agent(self, user_agent: str) -> tuple[str | None, str | None]:
+        if not user_agent:
+            return None, None
+
+        user_agent = user_agent.lower()
+
+        if "chrome" in user_agent:
+            if "edg" in user_agent and (version := self.extract_version(user_agent, "edg/")):
+                return "Edge", version
+            elif version := self.extract_version(user_agent, "chrome/"):
+                return "Chrome", version
+        elif "firefox" in user_agent and (version := self.extract_version(user_agent, "firefox/")):
+            return "Firefox", version
+        elif ("opera" in user_agent or "opr" in user_agent) and (version := self.extract_version(user_agent, "opr/")):
+            return "Opera", version
+        elif (
+            "safari" in user_agent
+            and "chrome" not in user_agent
+            and (version := self.extract_version(user_agent, "version/"))
+        ):
+            return "Safari", version
+
+        return "Unknown Browser", None
+
+    def extract_version(self, user_agent: str, pattern: str) -> str | None:
+        index = user_agent.find(pattern)
+        if index == -1:
+            return None
+        version_start = index + len(pattern)
+        version_end = user_agent.find(" ", version_start)
+        if version_end == -1:
+            version_end = len(user_agent)
+        return user_agent[version_start:version_end]
+
+    def get_device_name(self, user_agent: str) -> str | None:
+        if not user_agent:
+            return None
+
+        user_agent = user_agent.lower()
+
+        if "iphone" in user_agent:
+            return "iPhone"
+        elif "ipad" in user_agent:
+            return "iPad"
+        elif "android" in user_agent:
+            return "Android Phone" if "mobile" in user_agent else "Android Device"
+        elif "mobile" in user_agent or "tablet" in user_agent:
+            return "Mobile Device" if "mobile" in user_agent else "Tablet"
+        return "Desktop"
+
+    def get_os_name(self, user_agent: str) -> str | None:
+        if not user_agent:
+            return None
+
+        user_agent = user_agent.lower()
+
+        if "windows nt" in user_agent or ("mac os x" in user_agent or "macintosh" in user_agent):
+            return "Windows" if "windows nt" in user_agent else "macOS"
+        elif "android" in user_agent:
+            return "Android"
+        elif "iphone" in user_agent or "ipad" in user_agent or "ios" in user_agent:
+            return "iOS"
+        elif "linux" in user_agent or "cros" in user_agent:
+            return "Linux" if "linux" in user_agent else "Chrome OS"
+        return "Unknown OS"
+
+    def get_device_type(self, user_agent: str) -> str | None:
+        if not user_agent:
+            return None
+
+        user_agent = user_agent.lower()
+
+        if "mobile" in user_agent or "android" in user_agent or "iphone" in user_agent:
+            return "mobile"
+        elif "tablet" in user_agent or "ipad" in user_agent:
+            return "tablet"
+        else:
+            return "desktop"
+
+    def classify(self, user_agent: str) -> UserAgentInfo:
+        browser_name, browser_version = self.parse_user_agent(user_agent)
+        return UserAgentInfo(
+            browser_name=browser_name,
+            browser_version=browser_version,
+            operating_system=self.get_os_name(user_agent),
+            device_name=self.get_device_name(user_agent),
+            device_type=self.get_device_type(user_agent),
+        )
+
+
+def measure(classify, iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        classify(CORPUS[i % len(CORPUS)])
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    legacy = LegacyUserAgentParser()
+    mismatches = [ua for ua in CORPUS if legacy.classify(ua) != classify_user_agent(ua)]
+    if mismatches:
+        print("Результаты расходятся:")
+        for ua in mismatches:
+            print(f"  {ua!r}: {legacy.classify(ua)} != {classify_user_agent(ua)}")
+        sys.exit(1)
+    print(f"Корпус из {len(CORPUS)} User-Agent классифицирован одинаково")
+
+    results = {
+        "legacy": measure(legacy.classify, args.iterations),
+        "uncached": measure(classify_user_agent.__wrapped__, args.iterations),
+        "cached": measure(classify_user_agent, args.iterations),
+    }
+
+    print(f"{'mode':<12} {'ops/s':>12} {'us/op':>8}")
+    for mode, elapsed in results.items():
+        print(f"{mode:<12} {args.iterations / elapsed:>12.0f} {elapsed / args.iterations * 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Сборка офлайн-базы геолокации IP из CSV с диапазонами
+Запуск: python scripts/build_geoip_database.py ranges.csv [--output data/geoip.bin]
+
+Формат CSV: начало, конец (включительно), страна, город. Адреса задаются
+строкой (1.2.3.0, 2001:db8::) или целым числом, как в дампах вида ip_from/ip_to;
+целые числа трактуются как IPv4, если не передан --integers-ipv6.
+Строка заголовка пропускается. Страна и город обрезаются до длины колонок session.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import ipaddress
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.util.geoip import GeoIPRange, write_database
+
+# Длина колонок session.country и session.city
+MAX_FIELD_LENGTH = 50
+
+
+def parse_address(value: str, integers_ipv6: bool) -> ipaddress.IPv4Address | ipaddress.IPv6Address:
+    value = value.strip()
+    if value.isdigit():
+        number = int(value)
+        return ipaddress.IPv6Address(number) if integers_ipv6 else ipaddress.IPv4Address(number)
+    return ipaddress.ip_address(value)
+
+
+def read_ranges(path: Path, integers_ipv6: bool) -> list[GeoIPRange]:
+    ranges: list[GeoIPRange] = []
+    with path.open(newline="", encoding="utf-8") as file:
+        for line_number, row in enumerate(csv.reader(file), start=1):
+            if not row:
+                continue
+            try:
+                start = parse_address(row[0], integers_ipv6)
+                end = parse_address(row[1], integers_ipv6)
+            except (ValueError, IndexError):
+                if line_number == 1:
+                    # Заголовок
+                    continue
+                raise SystemExit(f"{path}:{line_number}: invalid range {row[:2]}") from None
+
+            country, city = (field.strip()[:MAX_FIELD_LENGTH] for field in [*row[2:4], "", ""][:2])
+            ranges.append((start, end, country or None, city or None))
+    return ranges
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", type=Path, help="CSV с диапазонами")
+    parser.add_argument("--output", type=Path, default=Path("data/geoip.bin"))
+    parser.add_argument("--integers-ipv6", action="store_true", help="целые адреса в CSV — IPv6")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ranges = read_ranges(args.csv, args.integers_ipv6)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    # Пишем во временный файл и переименовываем: воркеры, уже открывшие старую базу,
+    # продолжают читать ее отображение
+    temporary = args.output.with_suffix(args.output.suffix + ".tmp")
+    ipv4_ranges, ipv6_ranges = write_database(temporary, ranges)
+    temporary.replace(args.output)
+
+    print(f"Записано {ipv4_ranges} диапазонов IPv4 и {ipv6_ranges} IPv6 в {args.output}")
+    print(f"Размер файла: {args.output.stat().st_size / 1024 / 1024:.1f} MiB, {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
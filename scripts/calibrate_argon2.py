@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Подбор параметров argon2 под хост развертывания
+Запуск: python scripts/calibrate_argon2.py [--target-ms 250] [--max-memory-mib 64] [--workers 2]
+
+Измеряет время проверки пароля на текущей машине и подбирает параметры,
+при которых одна проверка укладывается в целевое время:
+- память перебирается от --max-memory-mib вниз (память важнее числа итераций
+  для стойкости к перебору на GPU);
+- для каждого объема памяти подбирается максимальный time_cost в пределах цели.
+
+Выводит строки для .env (ARGON2_*). Пользователи со старыми параметрами получат
+новый хеш автоматически при следующем входе.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.core.config import settings
+from src.core.password_executor import build_password_hash
+
+PASSWORD = "calibration-password"
+MIN_MEMORY_KIB = 8 * 1024
+MAX_TIME_COST = 10
+
+
+def measure_verify_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int) -> float:
+    password_hash = build_password_hash(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    hashed = password_hash.hash(PASSWORD)
+
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        password_hash.verify(PASSWORD, hashed)
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+
+def calibrate(target_ms: float, max_memory_kib: int, parallelism: int, samples: int) -> tuple[int, int, float] | None:
+    memory_cost = max_memory_kib
+    while memory_cost >= MIN_MEMORY_KIB:
+        best: tuple[int, int, float] | None = None
+        for time_cost in range(1, MAX_TIME_COST + 1):
+            elapsed = measure_verify_ms(time_cost, memory_cost, parallelism, samples)
+            print(f"  m={memory_cost // 1024:>4} MiB  t={time_cost:<2}  p={parallelism}  verify={elapsed:7.1f} ms")
+            if elapsed > target_ms:
+                break
+            best = (time_cost, memory_cost, elapsed)
+
+        if best is not None:
+            return best
+        memory_cost //= 2
+
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250, help="целевое время одной проверки пароля")
+    parser.add_argument("--max-memory-mib", type=int, default=64, help="максимум памяти на один хеш")
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS, help="воркеры пула хеширования")
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    current = measure_verify_ms(
+        settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM, args.samples
+    )
+    print(
+        f"Текущие параметры: t={settings.ARGON2_TIME_COST}, m={settings.ARGON2_MEMORY_COST // 1024} MiB, "
+        f"p={settings.ARGON2_PARALLELISM}, verify={current:.1f} ms"
+    )
+    print(f"Подбор под {args.target_ms:.0f} ms:")
+
+    result = calibrate(args.target_ms, args.max_memory_mib * 1024, args.parallelism, args.samples)
+    if result is None:
+        print(f"Даже минимальные параметры (m={MIN_MEMORY_KIB // 1024} MiB, t=1) медленнее цели")
+        sys.exit(1)
+
+    time_cost, memory_cost, elapsed = result
+    peak_mib = memory_cost // 1024 * args.workers
+    print()
+    print(f"Проверка пароля: {elapsed:.1f} ms, пик памяти пула ({args.workers} воркера): {peak_mib} MiB")
+    print("Добавьте в .env:")
+    print(f"ARGON2_TIME_COST={time_cost}")
+    print(f"ARGON2_MEMORY_COST={memory_cost}")
+    print(f"ARGON2_PARALLELISM={args.parallelism}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Миграция: индексы audit_logs под keyset-пагинацию по (performed_at, id).
+Создает недостающие индексы модели AuditLog и удаляет прежние ix_audit_logs_*,
+которых в модели больше нет. Запись в audit_logs при этом не блокируется:
+- у партиционированной таблицы индекс сначала создается только на родителе (ON ONLY),
+  затем на каждой партиции через CREATE INDEX CONCURRENTLY и присоединяется к родителю;
+- у обычной таблицы индекс создается через CREATE INDEX CONCURRENTLY.
+Скрипт идемпотентен. Запуск из корня проекта: python scripts/migrate_audit_indexes.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Добавляем корень проекта в путь для импорта src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import Index, text
+
+from src.core.audit_partitions import TABLE_NAME, attached_partitions, table_kind
+from src.core.database import engine
+from src.model.models import AuditLog
+
+INDEX_PREFIX = "ix_audit_logs_"
+
+
+def index_columns(index: Index) -> str:
+    return ", ".join(column.name for column in index.columns)
+
+
+async def existing_indexes(conn) -> set[str]:
+    result = await conn.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname LIKE :prefix"),
+        {"table": TABLE_NAME, "prefix": f"{INDEX_PREFIX}%"},
+    )
+    return set(result.scalars())
+
+
+async def create_partitioned_index(conn, index: Index, partitions: list[str]) -> None:
+    columns = index_columns(index)
+    await conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index.name} ON ONLY {TABLE_NAME} ({columns})"))
+    for partition in partitions:
+        partition_index = f"{partition}_{index.name.removeprefix(INDEX_PREFIX)}"
+        await conn.execute(
+            text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} ({columns})")
+        )
+        await conn.execute(text(f"ALTER INDEX {index.name} ATTACH PARTITION {partition_index}"))
+        print(f"  {partition_index}")
+
+
+async def migrate() -> None:
+    async with engine.connect() as connection:
+        # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+        conn = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        kind = await table_kind(conn)
+        if kind is None:
+            print("Таблицы audit_logs нет: индексы будут созданы при старте приложения")
+            return
+
+        existing = await existing_indexes(conn)
+        partitions = await attached_partitions(conn) if kind == "p" else []
+        model_indexes = {index.name: index for index in AuditLog.__table__.indexes}
+
+        for name, index in sorted(model_indexes.items()):
+            if name in existing:
+                continue
+            print(f"CREATE INDEX {name} ({index_columns(index)})")
+            if kind == "p":
+                await create_partitioned_index(conn, index, partitions)
+            else:
+                await conn.execute(
+                    text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {TABLE_NAME} ({index_columns(index)})")
+                )
+
+        for name in sorted(existing - model_indexes.keys()):
+            print(f"DROP INDEX {name}")
+            await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
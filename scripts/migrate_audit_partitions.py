@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Миграция: audit_logs в месячные партиции по performed_at.
+Скрипт переименовывает таблицу в audit_logs_unpartitioned, создает партиционированную
+audit_logs с первичным ключом (id, performed_at), партиции с месяца самой старой записи
+до AUDIT_PARTITION_PRECREATE_MONTHS месяцев вперед и партицию DEFAULT, переносит строки
+и создает индексы. Последовательность id сохраняется.
+
+Все выполняется в одной транзакции и блокирует audit_logs до конца переноса:
+запускайте в окно обслуживания. Партиции старше AUDIT_RETENTION_MONTHS архивируются
+фоновой задачей приложения или сразу, с флагом --archive.
+Запуск из корня проекта: python scripts/migrate_audit_partitions.py [--keep-legacy] [--archive]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+
+# Добавляем корень проекта в путь для импорта src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, select
+
+from src.core.audit_partitions import (
+    LEGACY_TABLE_NAME,
+    PARTITION_LOCK_KEY,
+    attached_partitions,
+    audit_partition_manager,
+    convert_to_partitioned,
+    table_kind,
+)
+from src.core.config import settings
+from src.core.database import engine
+
+
+async def migrate(keep_legacy: bool, archive: bool) -> None:
+    today = datetime.now(UTC).date()
+    async with engine.begin() as conn:
+        await conn.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK_KEY)))
+        kind = await table_kind(conn)
+        if kind == "p":
+            print("audit_logs уже партиционирована")
+        elif kind is None:
+            print("Таблицы audit_logs нет: она будет создана партиционированной при старте приложения")
+            return
+        else:
+            rows = await convert_to_partitioned(
+                conn, today, settings.AUDIT_PARTITION_PRECREATE_MONTHS, keep_legacy=keep_legacy
+            )
+            print(f"Перенесено строк: {rows}")
+            if keep_legacy:
+                print(f"Исходная таблица сохранена как {LEGACY_TABLE_NAME}")
+        partitions = sorted(await attached_partitions(conn))
+        print(f"Партиций: {len(partitions)} ({partitions[0]} .. {partitions[-1]})")
+
+    if archive:
+        archived = await audit_partition_manager.run_once(today)
+        print(f"Архивировано партиций: {len(archived or [])} в {settings.AUDIT_ARCHIVE_DIR}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-legacy", action="store_true", help="не удалять исходную таблицу")
+    parser.add_argument("--archive", action="store_true", help="сразу архивировать партиции старше срока хранения")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.keep_legacy, args.archive))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Миграция: audit_logs.old_values/new_values в JSONB и только изменившиеся колонки.
+Раньше listener'ы сохраняли в JSON колонки строки json.dumps (двойное кодирование),
+а для UPDATE — всю строку сущности. Скрипт:
+1. меняет тип колонок на JSONB, раскодируя строки в объекты;
+2. сокращает старые записи UPDATE до изменившихся колонок. Прежнее состояние берется из
+   предыдущей записи той же сущности (INSERT или старый UPDATE с полной строкой), а если
+   ее нет — из old_values, где были только изменившиеся не-NULL значения.
+Скрипт идемпотентен. Запуск из корня проекта: python scripts/migrate_audit_payloads.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Добавляем корень проекта в путь для импорта src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import bindparam, select, text, update
+
+from src.core.database import engine
+from src.model.models import AuditLog
+
+_table = AuditLog.__table__
+
+CONVERT_COLUMN = """
+ALTER TABLE audit_logs ALTER COLUMN {column} TYPE JSONB USING (
+    CASE WHEN json_typeof({column}::json) = 'string' THEN ({column}::json #>> '{{}}')::jsonb
+    ELSE {column}::jsonb END
+)
+"""
+
+UPDATE_ROW = (
+    update(_table)
+    .where(_table.c.id == bindparam("row_id"))
+    .values(old_values=bindparam("old"), new_values=bindparam("new"))
+)
+
+
+def diff_legacy_update(previous: dict | None, old_values: dict | None, new_values: dict) -> tuple[dict, dict]:
+    """Изменившиеся колонки старой записи UPDATE с полной строкой в new_values"""
+    if previous is None:
+        # Без предыдущего состояния изменившимися считаем колонки из old_values
+        changed = [key for key in new_values if key in (old_values or {})]
+        return {key: old_values[key] for key in changed}, {key: new_values[key] for key in changed}
+
+    changed = [key for key, value in new_values.items() if previous.get(key) != value]
+    return {key: previous.get(key) for key in changed}, {key: new_values[key] for key in changed}
+
+
+def is_legacy_update(action: str, new_values: dict | None) -> bool:
+    # Полная строка всегда содержит первичный ключ, а разница — только если он менялся
+    return action == "UPDATE" and new_values is not None and "id" in new_values
+
+
+async def column_type(conn, column: str) -> str:
+    return await conn.scalar(
+        text(
+            "SELECT data_type FROM information_schema.columns WHERE table_name = 'audit_logs' AND column_name = :column"
+        ),
+        {"column": column},
+    )
+
+
+async def table_size(conn) -> int:
+    return await conn.scalar(text("SELECT pg_total_relation_size('audit_logs')"))
+
+
+async def migrate(batch_size: int) -> None:
+    async with engine.begin() as conn:
+        size_before = await table_size(conn)
+        for column in ("old_values", "new_values"):
+            if await column_type(conn, column) != "jsonb":
+                await conn.execute(text(CONVERT_COLUMN.format(column=column)))
+                print(f"audit_logs.{column} -> JSONB")
+
+    reduced = 0
+    async with engine.connect() as reader, engine.connect() as writer:
+        result = await reader.stream(
+            select(_table)
+            .order_by(_table.c.entity_type, _table.c.entity_id, _table.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        # Последнее известное полное состояние сущности
+        entity: tuple[str, int] | None = None
+        state: dict | None = None
+        pending: list[dict] = []
+        async for row in result:
+            if (row.entity_type, row.entity_id) != entity:
+                entity, state = (row.entity_type, row.entity_id), None
+
+            if row.action == "INSERT":
+                state = row.new_values
+            elif is_legacy_update(row.action, row.new_values):
+                old_values, new_values = diff_legacy_update(state, row.old_values, row.new_values)
+                state = row.new_values
+                pending.append({"row_id": row.id, "old": old_values or None, "new": new_values})
+            elif state is not None and row.new_values:
+                state = {**state, **row.new_values}
+
+            if len(pending) >= batch_size:
+                await writer.execute(UPDATE_ROW, pending)
+                await writer.commit()
+                reduced += len(pending)
+                pending.clear()
+
+        if pending:
+            await writer.execute(UPDATE_ROW, pending)
+            await writer.commit()
+            reduced += len(pending)
+
+    async with engine.begin() as conn:
+        # Место освобождается только после VACUUM FULL, pg_total_relation_size покажет старый размер
+        size_after = await table_size(conn)
+    await engine.dispose()
+
+    print(f"Записей UPDATE сокращено до изменившихся колонок: {reduced}")
+    print(f"Размер audit_logs: {size_before / 1024 / 1024:.1f} -> {size_after / 1024 / 1024:.1f} MiB")
+    if reduced:
+        print("Чтобы вернуть место на диске, выполните VACUUM FULL audit_logs в окно обслуживания")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size))
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Миграция: колонка audit_logs.request_id — X-Request-ID запроса, в котором сделано изменение.
+create_all не добавляет колонки в существующие таблицы, поэтому для уже развернутой БД
+скрипт нужно запустить один раз. У партиционированной таблицы колонка добавляется
+на родителе и во всех партициях. Колонка допускает NULL, таблица не переписывается.
+Запуск из корня проекта: python scripts/migrate_audit_request_id.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Добавляем корень проекта в путь для импорта src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text
+
+from src.core.audit_partitions import TABLE_NAME
+from src.core.database import engine
+
+
+async def migrate() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(f"ALTER TABLE {TABLE_NAME} ADD COLUMN IF NOT EXISTS request_id VARCHAR(128)"))
+    await engine.dispose()
+    print(f"Колонка {TABLE_NAME}.request_id добавлена")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Миграция: колонка user.token_version для отзыва токенов при смене роли или пароля.
+create_all не добавляет колонки в существующие таблицы, поэтому для уже развернутой БД
+скрипт нужно запустить один раз. Запуск из корня проекта: python scripts/migrate_user_token_version.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Добавляем корень проекта в путь для импорта src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text
+
+from src.core.database import engine
+
+
+async def migrate() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text('ALTER TABLE "user" ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0'))
+    await engine.dispose()
+    print("Колонка user.token_version добавлена")
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
@@ -1,28 +1,65 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 
 from src.core.container import get_audit_service
-from src.core.dependencies import get_current_user
-from src.model.models import User
-from src.schema.audit import AuditLogResponse
+from src.core.dependencies import get_current_principal, require_teacher
+from src.core.principal import Principal
+from src.schema.audit import AuditLogFilter, AuditLogPage, AuditLogResponse
 from src.services.audit_service import AuditService
 
 audit_router = APIRouter(prefix="/audit", tags=["audit"])
 
 
-@audit_router.get("/{user_id}", response_model=list[AuditLogResponse])
-async def get_user_audit_logs(
-    user_id: int,
+@audit_router.get("/entity/{entity_type}/{entity_id}", response_model=list[AuditLogResponse])
+async def get_entity_audit_logs(
+    entity_type: str,
+    entity_id: int,
     audit_service: AuditService = Depends(get_audit_service),
-    current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(require_teacher),
 ) -> list[AuditLogResponse]:
-    """Получить audit логи пользователя"""
+    """Получить историю изменений сущности, включая архивированные записи"""
+
+    return await audit_service.get_entity_audit_logs(entity_type, entity_id)
+
 
+def _check_owner(current_user: Principal, user_id: int) -> None:
     if current_user.id != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
 
-    return await audit_service.get_user_audit_logs(user_id)
+
+@audit_router.get("/{user_id}", response_model=AuditLogPage)
+async def get_user_audit_logs(
+    user_id: int,
+    *,
+    filters: AuditLogFilter = Depends(),
+    limit: int = Query(50, ge=1, le=500, description="Количество записей на странице"),
+    cursor: str | None = Query(None, description="next_cursor из предыдущей страницы"),
+    audit_service: AuditService = Depends(get_audit_service),
+    current_user: Principal = Depends(get_current_principal),
+) -> AuditLogPage:
+    """Получить страницу audit логов пользователя (от новых к старым)"""
+
+    _check_owner(current_user, user_id)
+    return await audit_service.get_user_audit_page(user_id, filters, limit, cursor)
+
+
+@audit_router.get("/{user_id}/export")
+async def export_user_audit_logs(
+    user_id: int,
+    filters: AuditLogFilter = Depends(),
+    audit_service: AuditService = Depends(get_audit_service),
+    current_user: Principal = Depends(get_current_principal),
+) -> StreamingResponse:
+    """Выгрузить все audit логи пользователя в NDJSON потоком"""
+
+    _check_owner(current_user, user_id)
+    return StreamingResponse(
+        audit_service.export_user_audit_logs(user_id, filters),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="audit-{user_id}.ndjson"'},
+    )
@@ -6,9 +6,11 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
 
 from src.core.container import get_auth_service
-from src.core.dependencies import get_current_user
+from src.core.dependencies import get_current_principal, get_current_user
 from src.core.logging_config import api_logger
-from src.model.models import User
+from src.core.principal import Principal
+from src.core.principal_cache import UserSnapshot
+from src.core.request_context import request_elapsed
 from src.schema.auth import Token
 from src.services.auth_service import AuthService
 
@@ -34,7 +36,7 @@ async def login_for_access_token(
             user_id=None,  # Пользователь еще не аутентифицирован
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,  # Можно добавить измерение времени
+            response_time=request_elapsed(),
         )
     except Exception as e:
         # Логируем ошибку
@@ -47,7 +49,7 @@ async def login_for_access_token(
 @auth_router.post("/logout")
 async def logout(
     request: Request,
-    _current_user: Annotated[User, Depends(get_current_user)],
+    _current_user: Annotated[Principal, Depends(get_current_principal)],
 ) -> dict[str, str]:
     """Выход из системы (простое удаление токена на клиенте)"""
     client_ip = request.client.host if request.client else "unknown"
@@ -58,7 +60,7 @@ async def logout(
         user_id=None,  # Пользователь еще не определен из _current_user
         ip_address=client_ip,
         status_code=200,
-        response_time=0.0,
+        response_time=request_elapsed(),
     )
 
     return {"message": "Successfully logged out"}
@@ -67,13 +69,18 @@ async def logout(
 @auth_router.get("/me")
 async def get_current_user_info(
     request: Request,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[UserSnapshot, Depends(get_current_user)],
 ) -> dict[str, object]:
     """Получить информацию о текущем пользователе"""
     client_ip = request.client.host if request.client else "unknown"
 
     api_logger.log_request(
-        method="GET", path="/auth/me", user_id=current_user.id, ip_address=client_ip, status_code=200, response_time=0.0
+        method="GET",
+        path="/auth/me",
+        user_id=current_user.id,
+        ip_address=client_ip,
+        status_code=200,
+        response_time=request_elapsed(),
     )
 
     return {
@@ -5,8 +5,8 @@ from datetime import date
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from src.core.container import get_defense_service
-from src.core.dependencies import get_current_user, require_teacher
-from src.model.models import User
+from src.core.dependencies import get_current_principal, require_teacher
+from src.core.principal import Principal
 from src.schema.defense import (
     DefenseDayCreate,
     DefenseDayFull,
@@ -38,7 +38,7 @@ defense_router = APIRouter(prefix="/defense", tags=["defense"])
 @defense_router.get("/project-types", response_model=ProjectTypeListResponse)
 async def list_project_types(
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> ProjectTypeListResponse:
     """Получить список всех типов проектов."""
     types = await defense_service.get_all_project_types()
@@ -50,7 +50,7 @@ async def list_project_types(
 async def create_project_type(
     type_data: ProjectTypeCreate,
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(require_teacher),
+    _current_user: Principal = Depends(require_teacher),
 ) -> ProjectTypeFull:
     """Создать новый тип проекта (только преподаватель)."""
     try:
@@ -68,7 +68,7 @@ async def list_defense_days(
     page: int = Query(1, ge=1, description="Номер страницы"),
     limit: int = Query(10, ge=1, le=100, description="Количество дней на странице"),
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> DefenseDayListResponse:
     """Получить список дней защит с пагинацией."""
     days, total = await defense_service.get_days_paginated(page=page, limit=limit)
@@ -87,7 +87,7 @@ async def list_defense_days(
 async def get_defense_day(
     day_id: int,
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> DefenseDayFull:
     """Получить день защит по ID."""
     day = await defense_service.get_day_by_id(day_id)
@@ -100,7 +100,7 @@ async def get_defense_day(
 async def create_defense_day(
     day_data: DefenseDayCreate,
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(require_teacher),
+    _current_user: Principal = Depends(require_teacher),
 ) -> DefenseDayFull:
     """Создать день защит (только преподаватель)."""
     day = await defense_service.create_day(day_data)
@@ -117,7 +117,7 @@ async def list_defense_slots(
     date: date | None = Query(None, description="Фильтр по дате (YYYY-MM-DD)"),
     project_type_id: int | None = Query(None, description="Фильтр по ID типа проекта"),
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> DefenseSlotListResponse:
     """Получить список доступных слотов защит (слоты, на которые ещё никто не записан)."""
     slots, total = await defense_service.get_slots_paginated(
@@ -148,7 +148,7 @@ async def list_scheduled_defenses(
     date: date | None = Query(None, description="Фильтр по дате (YYYY-MM-DD)"),
     project_type_id: int | None = Query(None, description="Фильтр по ID типа проекта"),
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> ScheduledDefenseListResponse:
     """Получить список запланированных защит."""
     rows, total = await defense_service.get_scheduled_defenses_paginated(
@@ -177,7 +177,7 @@ async def list_scheduled_defenses(
 async def get_defense_slot(
     slot_id: int,
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> DefenseSlotFull:
     """Получить слот защиты по ID (is_available — свободен ли слот)."""
     slot, is_available = await defense_service.get_slot_with_availability(slot_id)
@@ -191,7 +191,7 @@ async def get_defense_slot(
 async def create_defense_slot(
     slot_data: DefenseSlotCreate,
     defense_service: DefenseService = Depends(get_defense_service),
-    _current_user: User = Depends(require_teacher),
+    _current_user: Principal = Depends(require_teacher),
 ) -> DefenseSlotFull:
     """Создать слот по дню и номеру (только преподаватель)."""
     try:
@@ -208,7 +208,7 @@ async def create_defense_slot(
 @defense_router.get("/my-registrations", response_model=MyDefenseListResponse)
 async def list_my_defenses(
     defense_service: DefenseService = Depends(get_defense_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> MyDefenseListResponse:
     """Получить список защит, на которые записан текущий пользователь."""
     registrations = await defense_service.get_my_registrations(user_id=current_user.id)
@@ -238,7 +238,7 @@ async def register_for_defense(
     slot_id: int,
     body: DefenseRegistrationCreate,
     defense_service: DefenseService = Depends(get_defense_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> DefenseRegistrationFull:
     """Записать текущего пользователя на защиту в указанный слот (можно передать project_id для оценивания)."""
     try:
@@ -260,7 +260,7 @@ async def register_for_defense(
 async def unregister_from_defense(
     slot_id: int,
     defense_service: DefenseService = Depends(get_defense_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> None:
     """Удалить запись текущего пользователя на защиту в указанном слоте."""
     try:
@@ -3,9 +3,9 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from src.core.container import get_evaluation_service
-from src.core.dependencies import get_current_user, setup_audit
+from src.core.dependencies import get_current_principal, setup_audit
 from src.core.exceptions import NotFoundError
-from src.model.models import User
+from src.core.principal import Principal
 from src.schema.evaluation import EvaluationCreate, EvaluationFull, EvaluationResultsResponse
 from src.services.evaluation_service import EvaluationService
 
@@ -16,7 +16,7 @@ evaluation_router = APIRouter(prefix="/evaluations", tags=["evaluation"])
 async def create_evaluation(
     evaluation_data: EvaluationCreate,
     evaluation_service: EvaluationService = Depends(get_evaluation_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     _audit=Depends(setup_audit),
 ) -> EvaluationFull:
     """Создать новую оценку для участника проекта (форма оценивания)."""
@@ -38,7 +38,7 @@ async def create_evaluation(
 async def get_project_results(
     project_id: int,
     evaluation_service: EvaluationService = Depends(get_evaluation_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> EvaluationResultsResponse:
     """Получить сводные результаты оценивания по проекту (форма представления результатов)."""
 
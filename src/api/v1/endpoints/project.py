@@ -3,8 +3,8 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from src.core.container import get_project_service
-from src.core.dependencies import get_current_user, setup_audit
-from src.model.models import User
+from src.core.dependencies import get_current_principal, setup_audit
+from src.core.principal import Principal
 from src.schema.project import ProjectCreate, ProjectFull, ProjectListItem, ProjectListResponse, ProjectUpdate
 from src.services.project_service import ProjectService
 
@@ -15,7 +15,7 @@ project_router = APIRouter(prefix="/projects", tags=["project"])
 async def fetch_project(
     project_id: int,
     project_service: ProjectService = Depends(get_project_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> ProjectFull:
     """Получить проект по ID"""
     project = await project_service.get_project_by_id(project_id)
@@ -30,7 +30,7 @@ async def fetch_projects(
     page: int = Query(1, ge=1, description="Номер страницы"),
     limit: int = Query(10, ge=1, le=100, description="Количество проектов на странице"),
     project_service: ProjectService = Depends(get_project_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> ProjectListResponse:
     """Получить список проектов с пагинацией"""
     projects, total = await project_service.get_projects_paginated(page, limit)
@@ -51,7 +51,7 @@ async def fetch_projects(
 async def create_project(
     project_data: ProjectCreate,
     project_service: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     _audit=Depends(setup_audit),
 ) -> ProjectFull:
     """Создать новый проект"""
@@ -65,7 +65,7 @@ async def update_project(
     project_id: int,
     project_data: ProjectUpdate = Depends(ProjectUpdate),
     project_service: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     _audit=Depends(setup_audit),
 ) -> ProjectFull:
     """Обновить проект (только автор может обновлять)"""
@@ -89,7 +89,7 @@ async def update_project(
 async def delete_project(
     project_id: int,
     project_service: ProjectService = Depends(get_project_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> dict[str, str]:
     """Удалить проект (только автор может удалять)"""
 
@@ -3,8 +3,8 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from src.core.container import get_resume_service
-from src.core.dependencies import get_current_user, setup_audit
-from src.model.models import User
+from src.core.dependencies import get_current_principal, setup_audit
+from src.core.principal import Principal
 from src.schema.resume import ResumeCreate, ResumeFull, ResumeListResponse, ResumeUpdate
 from src.services.resume_service import ResumeService
 
@@ -15,7 +15,7 @@ resume_router = APIRouter(prefix="/resumes", tags=["resume"])
 async def fetch_resume(
     resume_id: int,
     resume_service: ResumeService = Depends(get_resume_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> ResumeFull:
     """Получить резюме по ID"""
     resume = await resume_service.get_resume_by_id(resume_id)
@@ -30,7 +30,7 @@ async def fetch_resumes(
     page: int = Query(1, ge=1, description="Номер страницы"),
     limit: int = Query(10, ge=1, le=100, description="Количество резюме на странице"),
     resume_service: ResumeService = Depends(get_resume_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> ResumeListResponse:
     """Получить список резюме с пагинацией"""
     resumes, total = await resume_service.get_resumes_paginated(page, limit)
@@ -51,7 +51,7 @@ async def fetch_resumes(
 async def create_resume(
     resume_data: ResumeCreate,
     resume_service: ResumeService = Depends(get_resume_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     _audit=Depends(setup_audit),
 ) -> ResumeFull:
     """Создать новое резюме"""
@@ -65,7 +65,7 @@ async def update_resume(
     resume_id: int,
     resume_data: ResumeUpdate,
     resume_service: ResumeService = Depends(get_resume_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     _audit=Depends(setup_audit),
 ) -> ResumeFull:
     """Обновить резюме (только автор может обновлять)"""
@@ -89,7 +89,7 @@ async def update_resume(
 async def delete_resume(
     resume_id: int,
     resume_service: ResumeService = Depends(get_resume_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> dict[str, str]:
     """Удалить резюме (только автор может удалять)"""
 
@@ -5,9 +5,10 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Request
 
 from src.core.container import get_session_service
-from src.core.dependencies import get_current_user
+from src.core.dependencies import get_current_principal
 from src.core.logging_config import api_logger
-from src.model.models import User
+from src.core.principal import Principal
+from src.core.request_context import request_elapsed
 from src.schema.session import (
     SessionListResponse,
     SessionResponse,
@@ -24,7 +25,7 @@ sessions_router = APIRouter(prefix="/sessions", tags=["sessions"])
 @sessions_router.get("", response_model=SessionListResponse)
 async def get_user_sessions(
     request: Request,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> SessionListResponse:
     """Получить список сессий пользователя"""
@@ -43,7 +44,7 @@ async def get_user_sessions(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return result
@@ -52,7 +53,7 @@ async def get_user_sessions(
 @sessions_router.get("/stats", response_model=SessionStats)
 async def get_session_stats(
     request: Request,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> SessionStats:
     """Получить статистику сессий пользователя"""
@@ -71,7 +72,7 @@ async def get_session_stats(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return result
@@ -80,7 +81,7 @@ async def get_session_stats(
 @sessions_router.get("/summary")
 async def get_sessions_summary(
     request: Request,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> dict[str, object]:
     """Получить краткую информацию о сессиях пользователя"""
@@ -99,7 +100,7 @@ async def get_sessions_summary(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return result
@@ -109,7 +110,7 @@ async def get_sessions_summary(
 async def get_session(
     request: Request,
     session_id: str,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> SessionResponse:
     """Получить информацию о конкретной сессии"""
@@ -133,7 +134,7 @@ async def get_session(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return result
@@ -144,7 +145,7 @@ async def update_session(
     request: Request,
     session_id: str,
     session_data: SessionUpdate,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> SessionResponse:
     """Обновить информацию о сессии"""
@@ -169,7 +170,7 @@ async def update_session(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return result
@@ -179,7 +180,7 @@ async def update_session(
 async def terminate_sessions(
     request: Request,
     terminate_request: SessionTerminateRequest,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> SessionTerminateResponse:
     """Завершить сессии"""
@@ -198,7 +199,7 @@ async def terminate_sessions(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return result
@@ -208,7 +209,7 @@ async def terminate_sessions(
 async def set_current_session(
     request: Request,
     session_id: str,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> dict[str, str]:
     """Установить сессию как текущую"""
@@ -240,7 +241,7 @@ async def set_current_session(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return {"message": "Current session updated successfully"}
@@ -250,7 +251,7 @@ async def set_current_session(
 async def validate_session(
     request: Request,
     session_id: str,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> dict[str, bool]:
     """Проверить валидность сессии"""
@@ -269,7 +270,7 @@ async def validate_session(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return {"is_valid": is_valid}
@@ -278,7 +279,7 @@ async def validate_session(
 @sessions_router.post("/cleanup")
 async def cleanup_expired_sessions(
     request: Request,
-    current_user: Annotated[User, Depends(get_current_user)],
+    current_user: Annotated[Principal, Depends(get_current_principal)],
     session_service: SessionService = Depends(get_session_service),
 ) -> dict[str, int]:
     """Очистить истекшие сессии (административная функция)"""
@@ -298,7 +299,7 @@ async def cleanup_expired_sessions(
             user_id=current_user.id,
             ip_address=client_ip,
             status_code=200,
-            response_time=0.0,
+            response_time=request_elapsed(),
             user_agent=user_agent,
         )
         return {"cleaned_sessions": cleaned_count}
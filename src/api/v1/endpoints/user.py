@@ -3,8 +3,8 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from src.core.container import get_user_service
-from src.core.dependencies import get_current_user, setup_audit
-from src.model.models import User
+from src.core.dependencies import get_current_principal, setup_audit
+from src.core.principal import Principal
 from src.schema.user import UserCreate, UserFull, UserListResponse, UserUpdate
 from src.services.user_service import UserService
 
@@ -26,7 +26,7 @@ async def create_user(
 async def get_user(
     user_id: int,
     user_service: UserService = Depends(get_user_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> UserFull:
     """Получить пользователя по ID"""
     user = await user_service.get_user_by_id(user_id)
@@ -41,7 +41,7 @@ async def update_user(
     user_id: int,
     user_data: UserUpdate,
     user_service: UserService = Depends(get_user_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     _audit=Depends(setup_audit),
 ) -> UserFull:
     """Обновить пользователя (только сам пользователь или админ)"""
@@ -71,7 +71,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     user_service: UserService = Depends(get_user_service),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ) -> dict[str, str]:
     """Удалить пользователя (только сам пользователь или админ)"""
     if current_user.id != user_id:
@@ -92,7 +92,7 @@ async def get_users(
     page: int = Query(1, ge=1, description="Номер страницы"),
     limit: int = Query(10, ge=1, le=100, description="Количество пользователей на странице"),
     user_service: UserService = Depends(get_user_service),
-    _current_user: User = Depends(get_current_user),
+    _current_user: Principal = Depends(get_current_principal),
 ) -> UserListResponse:
     """Получить список пользователей с пагинацией"""
     return await user_service.get_users_paginated(page=page, limit=limit)
@@ -3,6 +3,8 @@ from __future__ import annotations
 from contextvars import ContextVar
 from dataclasses import dataclass
 
+from src.core.request_context import get_request_id
+
 
 @dataclass
 class AuditContext:
@@ -11,14 +13,15 @@ class AuditContext:
     user_id: int | None = None
     ip_address: str | None = None
     user_agent: str | None = None
+    request_id: str | None = None
 
 
 audit_context_var: ContextVar[AuditContext | None] = ContextVar("audit_context", default=None)
 
 
 def set_audit_context(user_id: int | None, ip_address: str | None, user_agent: str | None) -> None:
-    """Установить контекст аудита"""
-    context = AuditContext(user_id=user_id, ip_address=ip_address, user_agent=user_agent)
+    """Установить контекст аудита; id запроса берется из контекста запроса"""
+    context = AuditContext(user_id=user_id, ip_address=ip_address, user_agent=user_agent, request_id=get_request_id())
     audit_context_var.set(context)
 
 
@@ -1,222 +1,256 @@
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import UTC, datetime
-from json import dumps
+from typing import Any
 
-from sqlalchemy import event, insert
+from sqlalchemy import Date, DateTime, Time, event, insert
 from sqlalchemy.inspection import inspect as sqlalchemy_inspect
+from sqlalchemy.orm import InstanceState, Session, object_session
+from sqlalchemy.orm.attributes import instance_state
+from sqlalchemy.orm.base import NO_VALUE
 
 from src.core.audit_context import get_audit_context
+from src.core.audit_pipeline import audit_pipeline
+from src.core.config import settings
+from src.core.database import Base
 from src.core.logging_config import get_logger
-from src.model.models import AuditLog, Project, Resume, User
+from src.core.principal import token_versions
+from src.core.principal_cache import principal_cache
+from src.core.request_context import get_request_id
+from src.model.models import Auditable, AuditLog, User
 
 logger = get_logger(__name__)
 
-
-def _model_to_dict(obj) -> dict:
-    """Конвертирование ORM объекта в словарь"""
-    result = {}
-    mapper = sqlalchemy_inspect(obj.__class__)
-
-    for column in mapper.columns:
-        value = getattr(obj, column.name, None)
-
-        if isinstance(value, datetime):
-            value = value.isoformat()
-        result[column.name] = value
-    return result
-
-
-def _get_old_values(mapper, target) -> dict | None:
-    """Получить cтарые значения для before_update listener'а"""
-    insp = sqlalchemy_inspect(target)
-
-    if not insp.has_identity:
-        return None
-
-    committed = insp.committed_state
-    if not committed:
-        return None
-
-    old_values = {}
-    for column in mapper.columns:
-        old_value = committed.get(column.name)
-
-        if isinstance(old_value, datetime):
-            old_value = old_value.isoformat()
-
-        if old_value is not None:
-            old_values[column.name] = old_value
-
-    return old_values if old_values else None
-
-
-@event.listens_for(User, "before_update")
-def audit_user_update(mapper, connection, target: User) -> None:
-    """Логирование UPDATE user"""
+# Ключ в Session.info со списком записей аудита, накопленных за flush
+AUDIT_ENTRIES_KEY = "audit_entries"
+# Ключ в Session.info с записями, которые в режиме async отдаются в очередь после коммита
+AUDIT_COMMIT_KEY = "audit_committed_entries"
+# Ключ в Session.info с id пользователей, чьи кэши сбрасываются после коммита
+INVALIDATED_USERS_KEY = "invalidated_user_ids"
+# Строк в одном INSERT: 10 параметров на строку, лимит asyncpg — 32767 параметров
+AUDIT_INSERT_BATCH_SIZE = 1000
+
+
+def _isoformat(value):
+    """Дата и время — в ISO 8601, чтобы значение ложилось в JSON"""
+    return value.isoformat() if value is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class AuditColumn:
+    """Колонка аудируемой модели: ключ атрибута, имя колонки и преобразование значения"""
+
+    key: str
+    name: str
+    serialize: Callable[[Any], Any] | None
+
+
+@dataclass(frozen=True, slots=True)
+class AuditSpec:
+    """Заранее вычисленное описание аудируемой модели"""
+
+    entity_type: str
+    id_key: str
+    columns: tuple[AuditColumn, ...]
+    by_key: dict[str, AuditColumn]
+
+    def row_values(self, state: InstanceState) -> dict[str, Any]:
+        """Все загруженные колонки объекта; незагруженные (серверные значения по умолчанию) пропускаются"""
+        values = state.dict
+        row = {}
+        for column in self.columns:
+            if column.key in values:
+                value = values[column.key]
+                row[column.name] = column.serialize(value) if column.serialize else value
+        return row
+
+    def changes(self, state: InstanceState) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Изменившиеся колонки: (старые значения, новые значения)"""
+        old_values = {}
+        new_values = {}
+        # committed_state хранит исходные значения только измененных атрибутов
+        for key, original in state.committed_state.items():
+            column = self.by_key.get(key)
+            if column is None:
+                continue
+            before = None if original is NO_VALUE else original
+            after = state.dict.get(key)
+            if before == after:
+                continue
+            serialize = column.serialize
+            old_values[column.name] = serialize(before) if serialize else before
+            new_values[column.name] = serialize(after) if serialize else after
+        return old_values, new_values
+
+
+_audit_specs: dict[type, AuditSpec] = {}
+
+
+def build_audit_spec(model: type) -> AuditSpec:
+    """Описание аудируемой модели по ее mapper'у"""
+    mapper = sqlalchemy_inspect(model)
+    if len(mapper.primary_key) != 1:
+        raise TypeError(f"Auditable model {model.__name__} must have a single-column primary key")
+
+    exclude = model.__audit_exclude__
+    columns = []
+    for attr in mapper.column_attrs:
+        column = attr.columns[0]
+        if attr.key in exclude or column.name in exclude:
+            continue
+        serialize = _isoformat if isinstance(column.type, Date | DateTime | Time) else None
+        columns.append(AuditColumn(attr.key, column.name, serialize))
+
+    return AuditSpec(
+        entity_type=mapper.local_table.name,
+        id_key=mapper.get_property_by_column(mapper.primary_key[0]).key,
+        columns=tuple(columns),
+        by_key={column.key: column for column in columns},
+    )
+
+
+def audit_spec(model: type) -> AuditSpec:
+    """Описание модели из реестра; строится один раз на класс"""
+    spec = _audit_specs.get(model)
+    if spec is None:
+        spec = _audit_specs[model] = build_audit_spec(model)
+    return spec
+
+
+def _record_audit(
+    connection, state: InstanceState, spec: AuditSpec, action: str, *, old_values: dict | None, new_values: dict | None
+) -> None:
+    """Добавить запись аудита в пакет сессии (или записать сразу, если пакеты выключены)"""
     context_data = get_audit_context()
+    entity_id = state.dict.get(spec.id_key)
+    entry = {
+        "entity_type": spec.entity_type,
+        "entity_id": entity_id,
+        "action": action,
+        "old_values": old_values or None,
+        "new_values": new_values,
+        "performed_by": context_data.user_id if context_data else None,
+        "ip_address": context_data.ip_address if context_data else None,
+        "user_agent": context_data.user_agent if context_data else None,
+        # Вне setup_audit (например, вход в систему) id запроса берется напрямую
+        "request_id": context_data.request_id if context_data else get_request_id(),
+        "performed_at": datetime.now(UTC),
+    }
+
+    session = state.session
+    if (settings.AUDIT_BATCH_WRITES or audit_pipeline.running) and session is not None:
+        session.info.setdefault(AUDIT_ENTRIES_KEY, []).append(entry)
+    else:
+        connection.execute(insert(AuditLog).values(entry))
+
+    logger.debug(
+        f"Audit logged: {action} {spec.entity_type} (id={entity_id}) "
+        f"by user_id={context_data.user_id if context_data else 'system'}"
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def write_audit_entries(session: Session, flush_context) -> None:
+    """Записать накопленные за flush записи аудита одним многострочным INSERT"""
+    entries = session.info.pop(AUDIT_ENTRIES_KEY, None)
+    if not entries:
+        return
+
+    if audit_pipeline.running:
+        # Записи закоммиченной транзакции уйдут в очередь, запрос их не ждет
+        session.info.setdefault(AUDIT_COMMIT_KEY, []).extend(entries)
+        return
 
     try:
-        old_values = _get_old_values(mapper, target)
-        new_values = _model_to_dict(target)
-        stmt = insert(AuditLog).values(
-            entity_type="user",
-            entity_id=target.id,
-            action="UPDATE",
-            old_values=dumps(old_values) if old_values else None,
-            new_values=dumps(new_values),
-            performed_by=context_data.user_id if context_data else None,
-            ip_address=context_data.ip_address if context_data else None,
-            user_agent=context_data.user_agent if context_data else None,
-            performed_at=datetime.now(UTC),
-        )
-        connection.execute(stmt)
-
-        logger.debug(
-            f"Audit logged: UPDATE user (id={target.id}) "
-            f"by user_id={context_data.user_id if context_data else 'system'}"
-        )
+        connection = session.connection()
+        for start in range(0, len(entries), AUDIT_INSERT_BATCH_SIZE):
+            connection.execute(insert(AuditLog).values(entries[start : start + AUDIT_INSERT_BATCH_SIZE]))
     except Exception as e:
         logger.error(f"Failed to log audit: {e}", exc_info=True)
 
 
-@event.listens_for(User, "after_insert")
-def audit_user_insert(mapper, connection, target: User) -> None:
-    """Логирование INSERT user"""
-    context_data = get_audit_context()
+@event.listens_for(Session, "after_commit")
+def submit_audit_entries(session: Session) -> None:
+    """Передать записи аудита закоммиченной транзакции в фоновую запись.
+
+    Журнал дописывается уже после коммита: при гибели процесса между коммитом
+    и записью в журнал записи этой транзакции теряются (см. src/core/audit_pipeline.py).
+    """
+    entries = session.info.pop(AUDIT_COMMIT_KEY, None)
+    if not entries:
+        return
 
     try:
-        new_values = _model_to_dict(target)
-        stmt = insert(AuditLog).values(
-            entity_type="user",
-            entity_id=target.id,
-            action="INSERT",
-            old_values=None,
-            new_values=dumps(new_values),
-            performed_by=context_data.user_id,
-            ip_address=context_data.ip_address,
-            user_agent=context_data.user_agent,
-            performed_at=datetime.now(UTC),
-        )
-        connection.execute(stmt)
-
-        logger.debug(
-            f"Audit logged: INSERT user (id={target.id}) "
-            f"by user_id={context_data.user_id if context_data else 'system'}"
-        )
+        audit_pipeline.submit(entries)
     except Exception as e:
         logger.error(f"Failed to log audit: {e}", exc_info=True)
 
 
-@event.listens_for(Project, "before_update")
-def audit_project_update(mapper, connection, target: Project) -> None:
-    """Логирование UPDATE project"""
-    context_data = get_audit_context()
+@event.listens_for(Session, "after_soft_rollback")
+def discard_audit_entries(session: Session, previous_transaction) -> None:
+    """Отбросить записи аудита неудавшегося flush или откаченной транзакции"""
+    session.info.pop(AUDIT_ENTRIES_KEY, None)
+    session.info.pop(AUDIT_COMMIT_KEY, None)
+    session.info.pop(INVALIDATED_USERS_KEY, None)
 
-    try:
-        old_values = _get_old_values(mapper, target)
-        new_values = _model_to_dict(target)
-        stmt = insert(AuditLog).values(
-            entity_type="project",
-            entity_id=target.id,
-            action="UPDATE",
-            old_values=dumps(old_values) if old_values else None,
-            new_values=dumps(new_values),
-            performed_by=context_data.user_id if context_data else None,
-            ip_address=context_data.ip_address if context_data else None,
-            user_agent=context_data.user_agent if context_data else None,
-            performed_at=datetime.now(UTC),
-        )
-        connection.execute(stmt)
-
-        logger.debug(
-            f"Audit logged: UPDATE project (id={target.id}) "
-            f"by user_id={context_data.user_id if context_data else 'system'}"
-        )
-    except Exception as e:
-        logger.error(f"Failed to log audit: {e}", exc_info=True)
 
+@event.listens_for(User, "before_update")
+@event.listens_for(User, "before_delete")
+def invalidate_cached_principal(mapper, connection, target: User) -> None:
+    """Отметить пользователя: его снимок и версия токенов сбрасываются после коммита"""
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(INVALIDATED_USERS_KEY, set()).add(target.id)
 
-@event.listens_for(Project, "after_insert")
-def audit_project_insert(mapper, connection, target: Project) -> None:
-    """Логирование INSERT project"""
-    context_data = get_audit_context()
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_users(session: Session) -> None:
+    """Сбросить кэши пользователей, измененных закоммиченной транзакцией.
+
+    Сброс до коммита оставлял окно: параллельный запрос успевал закэшировать
+    прежнюю закоммиченную строку (старую роль, версию токенов до смены пароля),
+    и она жила в кэше до истечения TTL.
+    """
+    for user_id in session.info.pop(INVALIDATED_USERS_KEY, ()):
+        principal_cache.invalidate_user(user_id)
+        token_versions.invalidate(user_id)
+
+
+# Listener'ы объявлены на примеси и распространяются на все модели с Auditable
+@event.listens_for(Auditable, "after_insert", propagate=True)
+def audit_insert(mapper, connection, target: Auditable) -> None:
+    """Логирование INSERT аудируемой модели"""
     try:
-        new_values = _model_to_dict(target)
-        stmt = insert(AuditLog).values(
-            entity_type="project",
-            entity_id=target.id,
-            action="INSERT",
-            old_values=None,
-            new_values=dumps(new_values),
-            performed_by=context_data.user_id if context_data else None,
-            ip_address=context_data.ip_address if context_data else None,
-            user_agent=context_data.user_agent if context_data else None,
-            performed_at=datetime.now(UTC),
-        )
-        connection.execute(stmt)
-
-        logger.debug(
-            f"Audit logged: INSERT project (id={target.id}) "
-            f"by user_id={context_data.user_id if context_data else 'system'}"
-        )
+        spec = audit_spec(mapper.class_)
+        state = instance_state(target)
+        _record_audit(connection, state, spec, "INSERT", old_values=None, new_values=spec.row_values(state))
     except Exception as e:
         logger.error(f"Failed to log audit: {e}", exc_info=True)
 
 
-@event.listens_for(Resume, "before_update")
-def audit_resume_update(mapper, connection, target: Resume) -> None:
-    """Логирование UPDATE resume"""
-    context_data = get_audit_context()
-
+@event.listens_for(Auditable, "before_update", propagate=True)
+def audit_update(mapper, connection, target: Auditable) -> None:
+    """Логирование UPDATE аудируемой модели"""
     try:
-        old_values = _get_old_values(mapper, target)
-        new_values = _model_to_dict(target)
-        stmt = insert(AuditLog).values(
-            entity_type="resume",
-            entity_id=target.id,
-            action="UPDATE",
-            old_values=dumps(old_values) if old_values else None,
-            new_values=dumps(new_values),
-            performed_by=context_data.user_id if context_data else None,
-            ip_address=context_data.ip_address if context_data else None,
-            user_agent=context_data.user_agent if context_data else None,
-            performed_at=datetime.now(UTC),
-        )
-        connection.execute(stmt)
-
-        logger.debug(
-            f"Audit logged: UPDATE resume (id={target.id}) "
-            f"by user_id={context_data.user_id if context_data else 'system'}"
-        )
+        spec = audit_spec(mapper.class_)
+        state = instance_state(target)
+        old_values, new_values = spec.changes(state)
+        # Изменились только связи или значения совпали с прежними — записывать нечего
+        if new_values:
+            _record_audit(connection, state, spec, "UPDATE", old_values=old_values, new_values=new_values)
     except Exception as e:
         logger.error(f"Failed to log audit: {e}", exc_info=True)
 
 
-@event.listens_for(Resume, "after_insert")
-def audit_resume_insert(mapper, connection, target: Resume) -> None:
-    """Логирование INSERT resume"""
-    context_data = get_audit_context()
-
+@event.listens_for(Auditable, "after_delete", propagate=True)
+def audit_delete(mapper, connection, target: Auditable) -> None:
+    """Логирование DELETE аудируемой модели: последнее состояние строки"""
     try:
-        new_values = _model_to_dict(target)
-        stmt = insert(AuditLog).values(
-            entity_type="resume",
-            entity_id=target.id,
-            action="INSERT",
-            old_values=None,
-            new_values=dumps(new_values),
-            performed_by=context_data.user_id if context_data else None,
-            ip_address=context_data.ip_address if context_data else None,
-            user_agent=context_data.user_agent if context_data else None,
-            performed_at=datetime.now(UTC),
-        )
-        connection.execute(stmt)
-
-        logger.debug(
-            f"Audit logged: INSERT resume (id={target.id}) "
-            f"by user_id={context_data.user_id if context_data else 'system'}"
-        )
+        spec = audit_spec(mapper.class_)
+        state = instance_state(target)
+        _record_audit(connection, state, spec, "DELETE", old_values=spec.row_values(state), new_values=None)
     except Exception as e:
         logger.error(f"Failed to log audit: {e}", exc_info=True)
 
@@ -224,4 +258,13 @@ def audit_resume_insert(mapper, connection, target: Resume) -> None:
 def setup_audit_listeners() -> None:
     """
     Инициализирует все event listener'ы.
+
+    Listener'ы регистрируются при импорте модуля; здесь заранее строятся описания
+    всех аудируемых моделей, чтобы первый flush не тратил на это время.
     """
+    for mapper in Base.registry.mappers:
+        if issubclass(mapper.class_, Auditable):
+            audit_spec(mapper.class_)
+    logger.info(
+        f"Audit enabled for {len(_audit_specs)} models: {', '.join(sorted(spec.entity_type for spec in _audit_specs.values()))}"
+    )
@@ -0,0 +1,314 @@
+"""Месячные партиции audit_logs по performed_at, срок хранения и архивация.
+
+В PostgreSQL audit_logs — партиционированная таблица (PARTITION BY RANGE
+performed_at) с партицией на каждый месяц и партицией DEFAULT для строк вне
+созданных диапазонов. Первичный ключ — (id, performed_at): уникальный индекс
+партиционированной таблицы обязан включать ключ партиционирования.
+
+Фоновая задача заранее создает партиции на несколько месяцев вперед, а
+партиции старше срока хранения отсоединяет, выгружает в сжатый архив с
+индексом по сущностям (src/util/audit_archive.py) и удаляет. Запросы к
+свежему аудиту читают только нужные партиции, и их размер не зависит от
+того, сколько лет работает система.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import re
+from datetime import UTC, date, datetime
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.sql.elements import TextClause
+
+from src.core.config import settings
+from src.core.database import engine
+from src.core.logging_config import get_logger
+from src.model.models import AuditLog
+from src.util.audit_archive import BLOCK_ROWS, AuditArchiveWriter
+
+# Ключ advisory lock: партиции создает и архивирует только один воркер из всех процессов
+PARTITION_LOCK_KEY = 727_002
+TABLE_NAME = "audit_logs"
+LEGACY_TABLE_NAME = "audit_logs_unpartitioned"
+DEFAULT_PARTITION = "audit_logs_default"
+PARTITION_NAME = re.compile(r"^audit_logs_p(\d{4})_(\d{2})$")
+# Отсоединение партиции берет эксклюзивную блокировку audit_logs: не ждем ее дольше
+DETACH_LOCK_TIMEOUT = "5s"
+
+_columns = ", ".join(column.name for column in AuditLog.__table__.columns)
+
+# Исходная таблица переименовывается, партиционированная создается по ее образцу
+# (LIKE копирует типы, NOT NULL и DEFAULT, включая nextval последовательности id)
+CONVERT_STATEMENTS = (
+    f"ALTER TABLE {TABLE_NAME} RENAME TO {LEGACY_TABLE_NAME}",
+    f"ALTER TABLE {LEGACY_TABLE_NAME} RENAME CONSTRAINT {TABLE_NAME}_pkey TO {LEGACY_TABLE_NAME}_pkey",
+    f"CREATE TABLE {TABLE_NAME} (LIKE {LEGACY_TABLE_NAME} INCLUDING DEFAULTS) PARTITION BY RANGE (performed_at)",
+    f"ALTER TABLE {TABLE_NAME} ADD CONSTRAINT {TABLE_NAME}_pkey PRIMARY KEY (id, performed_at)",
+    f'ALTER TABLE {TABLE_NAME} ADD FOREIGN KEY (performed_by) REFERENCES "user" (id)',
+    f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE_NAME} DEFAULT",
+)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE_NAME}_p{month:%Y_%m}"
+
+
+def partition_month(name: str) -> date | None:
+    """Месяц партиции по имени, None — если это не месячная партиция"""
+    match = PARTITION_NAME.match(name)
+    if match is None:
+        return None
+    return date(int(match[1]), int(match[2]), 1)
+
+
+def create_partition_ddl(month: date) -> str:
+    """CREATE TABLE для партиции месяца; границы — полночь UTC, верхняя не входит"""
+    lower = f"{month.isoformat()} 00:00:00+00"
+    upper = f"{add_months(month, 1).isoformat()} 00:00:00+00"
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {TABLE_NAME} "
+        f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    )
+
+
+def expired_months(months: list[date], today: date, retention_months: int) -> list[date]:
+    """Месяцы, целиком вышедшие за срок хранения (текущий месяц не считается)"""
+    cutoff = add_months(month_start(today), -retention_months)
+    return sorted(month for month in months if month < cutoff)
+
+
+def build_export_query(name: str) -> TextClause:
+    """Строки партиции в порядке сущностей (побайтовая сортировка, как сравнение строк в Python)"""
+    if partition_month(name) is None:
+        raise ValueError(f"Not an audit partition: {name}")
+    return text(f'SELECT {_columns} FROM {name} ORDER BY entity_type COLLATE "C", entity_id, id').columns(
+        old_values=JSONB, new_values=JSONB
+    )
+
+
+async def table_kind(conn: AsyncConnection) -> str | None:
+    """relkind audit_logs: "p" — партиционированная, "r" — обычная таблица, None — таблицы нет"""
+    return await conn.scalar(text(f"SELECT relkind::text FROM pg_class WHERE oid = to_regclass('{TABLE_NAME}')"))
+
+
+async def ensure_partitions(conn: AsyncConnection, today: date, precreate_months: int) -> None:
+    """Создать партиции текущего и следующих precreate_months месяцев"""
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE_NAME} DEFAULT"))
+    current = month_start(today)
+    for offset in range(precreate_months + 1):
+        await conn.execute(text(create_partition_ddl(add_months(current, offset))))
+
+
+async def convert_to_partitioned(
+    conn: AsyncConnection, today: date, precreate_months: int, keep_legacy: bool = False
+) -> int:
+    """Превратить обычную audit_logs в партиционированную, перенеся строки; вернуть их число.
+
+    Выполняется в транзакции conn и держит эксклюзивную блокировку audit_logs до ее конца.
+    """
+    sequence = await conn.scalar(text(f"SELECT pg_get_serial_sequence('{TABLE_NAME}', 'id')"))
+    oldest = await conn.scalar(text(f"SELECT min(performed_at) FROM {TABLE_NAME}"))
+
+    if sequence is not None:
+        # Иначе последовательность удалится вместе со старой таблицей
+        await conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+    for statement in CONVERT_STATEMENTS:
+        await conn.execute(text(statement))
+    if sequence is not None:
+        await conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE_NAME}.id"))
+
+    month = month_start(oldest.astimezone(UTC).date()) if oldest is not None else month_start(today)
+    while month < month_start(today):
+        await conn.execute(text(create_partition_ddl(month)))
+        month = add_months(month, 1)
+    await ensure_partitions(conn, today, precreate_months)
+
+    result = await conn.execute(text(f"INSERT INTO {TABLE_NAME} SELECT * FROM {LEGACY_TABLE_NAME}"))
+
+    # Индексы с теми же именами были на старой таблице; на новой они создаются для каждой партиции
+    for index in AuditLog.__table__.indexes:
+        await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        await conn.run_sync(index.create)
+
+    if not keep_legacy:
+        await conn.execute(text(f"DROP TABLE {LEGACY_TABLE_NAME}"))
+    return result.rowcount
+
+
+async def attached_partitions(conn: AsyncConnection) -> list[str]:
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            f"WHERE pg_inherits.inhparent = to_regclass('{TABLE_NAME}')"
+        )
+    )
+    return list(result.scalars())
+
+
+async def detached_partitions(conn: AsyncConnection) -> list[str]:
+    """Месячные партиции, отсоединенные прошлым запуском, который не успел их выгрузить"""
+    result = await conn.execute(
+        text(
+            "SELECT relname FROM pg_class "
+            "WHERE relkind = 'r' AND NOT relispartition AND relname ~ :pattern AND pg_table_is_visible(oid)"
+        ),
+        {"pattern": PARTITION_NAME.pattern},
+    )
+    return list(result.scalars())
+
+
+class AuditPartitionManager:
+    """Создание партиций audit_logs заранее и архивация партиций старше срока хранения"""
+
+    def __init__(
+        self,
+        db_engine: AsyncEngine,
+        *,
+        archive_dir: str,
+        precreate_months: int,
+        retention_months: int,
+        interval_seconds: float,
+    ) -> None:
+        self._engine = db_engine
+        self._archive_dir = archive_dir
+        self._precreate_months = precreate_months
+        self._retention_months = retention_months
+        self._interval_seconds = interval_seconds
+        self._task: asyncio.Task | None = None
+        self._logger = get_logger(self.__class__.__name__)
+
+    async def prepare(self, conn: AsyncConnection) -> None:
+        """Подготовить партиции при старте (вызывается в lifespan после create_all).
+
+        Только что созданная пустая audit_logs сразу превращается в партиционированную;
+        таблицу с данными нужно перенести скриптом scripts/migrate_audit_partitions.py.
+        """
+        if conn.dialect.name != "postgresql":
+            return
+
+        await conn.execute(select(func.pg_advisory_xact_lock(PARTITION_LOCK_KEY)))
+        kind = await table_kind(conn)
+        today = datetime.now(UTC).date()
+        if kind == "r":
+            if await conn.scalar(text(f"SELECT EXISTS (SELECT 1 FROM {TABLE_NAME})")):
+                self._logger.warning(
+                    f"{TABLE_NAME} is not partitioned, run scripts/migrate_audit_partitions.py to enable retention"
+                )
+                return
+            await convert_to_partitioned(conn, today, self._precreate_months)
+            self._logger.info(f"{TABLE_NAME} converted to monthly partitions")
+        elif kind == "p":
+            await ensure_partitions(conn, today, self._precreate_months)
+
+    def start(self) -> None:
+        """Запустить периодическое обслуживание партиций (вызывается в lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def shutdown(self) -> None:
+        """Остановить обслуживание; недовыгруженная партиция будет выгружена при следующем запуске"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run_once(self, today: date | None = None) -> list[str] | None:
+        """Выполнить один проход.
+
+        Returns:
+            Имена архивированных партиций или None, если проход выполняет другой воркер
+        """
+        today = today or datetime.now(UTC).date()
+        async with self._engine.connect() as lock_conn:
+            acquired = await lock_conn.scalar(select(func.pg_try_advisory_lock(PARTITION_LOCK_KEY)))
+            await lock_conn.commit()
+            if not acquired:
+                self._logger.debug("Audit partition maintenance is running in another worker, skipping")
+                return None
+
+            try:
+                archived = await self._maintain(today)
+            finally:
+                await lock_conn.execute(select(func.pg_advisory_unlock(PARTITION_LOCK_KEY)))
+                await lock_conn.commit()
+
+        if archived:
+            self._logger.info(f"Audit partitions archived: {', '.join(archived)}")
+        return archived
+
+    async def _maintain(self, today: date) -> list[str]:
+        async with self._engine.begin() as conn:
+            if await table_kind(conn) != "p":
+                return []
+            await ensure_partitions(conn, today, self._precreate_months)
+            attached = await attached_partitions(conn)
+            detached = await detached_partitions(conn)
+
+        months = {month: name for name in attached + detached if (month := partition_month(name)) is not None}
+        archived = []
+        for month in expired_months(list(months), today, self._retention_months):
+            name = months[month]
+            if name in attached:
+                await self._detach(name)
+            rows = await self._archive(name, month)
+            self._logger.info(f"Audit partition {name}: {rows} rows archived to {self._archive_dir}")
+            archived.append(name)
+        return archived
+
+    async def _detach(self, name: str) -> None:
+        # DETACH ... CONCURRENTLY недоступен при наличии партиции DEFAULT
+        async with self._engine.begin() as conn:
+            await conn.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+            await conn.execute(text(f"ALTER TABLE {TABLE_NAME} DETACH PARTITION {name}"))
+
+    async def _archive(self, name: str, month: date) -> int:
+        """Выгрузить отсоединенную партицию в архив и удалить ее"""
+        writer = AuditArchiveWriter(self._archive_dir, name)
+        await asyncio.to_thread(writer.open)
+        try:
+            async with self._engine.connect() as conn:
+                result = await conn.stream(build_export_query(name).execution_options(yield_per=BLOCK_ROWS))
+                async for rows in result.mappings().partitions(BLOCK_ROWS):
+                    await asyncio.to_thread(writer.write_block, [dict(row) for row in rows])
+            rows = await asyncio.to_thread(writer.close, {"from": month, "to": add_months(month, 1)})
+        except BaseException:
+            writer.abort()
+            raise
+
+        async with self._engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE {name}"))
+        return rows
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._logger.exception("Audit partition maintenance failed")
+            await asyncio.sleep(self._interval_seconds)
+
+
+audit_partition_manager = AuditPartitionManager(
+    db_engine=engine,
+    archive_dir=settings.AUDIT_ARCHIVE_DIR,
+    precreate_months=settings.AUDIT_PARTITION_PRECREATE_MONTHS,
+    retention_months=settings.AUDIT_RETENTION_MONTHS,
+    interval_seconds=settings.AUDIT_RETENTION_INTERVAL_SECONDS,
+)
@@ -0,0 +1,288 @@
+"""Асинхронная запись аудита вне транзакции запроса с журналом на диске.
+
+Записи аудита закоммиченной транзакции сначала дописываются в локальный
+журнал (spool, JSON Lines), затем попадают в ограниченную очередь в памяти.
+Фоновая задача пишет их в audit_logs большими пачками и отмечает в файле
+.ack номер последней записанной записи. Если очередь переполнена, записи
+остаются только в журнале и дочитываются из него, когда очередь освободится:
+запрос не ждет и память не растет.
+
+Каждый воркер пишет в свой журнал и держит на нем flock. При старте воркер
+дочитывает журналы остановившихся процессов (на которых нет блокировки).
+Доставка — не менее одного раза: при падении между INSERT и записью .ack
+пачка будет записана повторно.
+
+Записи попадают в журнал после коммита транзакции запроса (в after_commit),
+поэтому между коммитом и записью в журнал есть окно, в котором гарантия —
+не более одного раза: если процесс погибнет после коммита, но до записи
+в журнал, записи аудита этой транзакции будут потеряны. Без fsync
+(AUDIT_SPOOL_FSYNC) к нему добавляется падение ОС до сброса страниц журнала
+на диск. Кому нужен аудит без потерь, использует AUDIT_MODE="inline": там
+записи пишутся в той же транзакции, что и изменения.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import os
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+from src.core.database import engine
+from src.core.logging_config import get_logger
+from src.model.models import AuditLog
+
+# Строк в одном INSERT: 10 параметров на строку, лимит asyncpg — 32767 параметров
+INSERT_CHUNK_SIZE = 1000
+
+
+def _encode(sequence: int, entry: dict[str, Any]) -> bytes:
+    record = dict(entry, performed_at=entry["performed_at"].isoformat())
+    return json.dumps({"seq": sequence, "entry": record}).encode() + b"\n"
+
+
+def _decode(line: bytes) -> tuple[int, dict[str, Any]]:
+    record = json.loads(line)
+    entry = record["entry"]
+    entry["performed_at"] = datetime.fromisoformat(entry["performed_at"])
+    # Записи из спула прежней версии: в многострочном INSERT у всех строк одинаковые ключи
+    entry.setdefault("request_id", None)
+    return record["seq"], entry
+
+
+class AuditSpool:
+    """Журнал записей аудита одного воркера: записи и номер последней сохраненной в БД"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.ack_path = path.with_name(path.name + ".ack")
+        self._fd: int | None = None
+        self.last_sequence = 0
+
+    def open(self) -> None:
+        """Создать журнал и захватить его блокировку"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._fd)
+            self._fd = None
+            raise
+        self.last_sequence = max(self.acked(), max((seq for seq, _ in self.read()), default=0))
+
+    def append(self, entries: Iterable[dict[str, Any]], fsync: bool) -> int:
+        """Дописать записи, вернуть номер последней"""
+        lines = []
+        for entry in entries:
+            self.last_sequence += 1
+            lines.append(_encode(self.last_sequence, entry))
+        os.write(self._fd, b"".join(lines))
+        if fsync:
+            os.fsync(self._fd)
+        return self.last_sequence
+
+    def read(self, after: int = 0) -> list[tuple[int, dict[str, Any]]]:
+        """Прочитать записи с номером больше after (оборванная последняя строка пропускается)"""
+        records = []
+        with open(self.path, "rb") as file:
+            for line in file:
+                try:
+                    sequence, entry = _decode(line)
+                except (ValueError, KeyError):
+                    continue
+                if sequence > after:
+                    records.append((sequence, entry))
+        return records
+
+    def acked(self) -> int:
+        """Номер последней записи, сохраненной в БД"""
+        try:
+            return int(self.ack_path.read_text() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def ack(self, sequence: int) -> None:
+        """Отметить записи до sequence включительно как сохраненные"""
+        temporary = self.ack_path.with_name(self.ack_path.name + ".tmp")
+        temporary.write_text(str(sequence))
+        temporary.replace(self.ack_path)
+
+    def truncate(self) -> None:
+        """Очистить журнал, когда все записи сохранены"""
+        os.ftruncate(self._fd, 0)
+        self.last_sequence = 0
+        self.ack(0)
+
+    def close(self, remove: bool) -> None:
+        """Снять блокировку; удалить журнал, если в нем ничего не осталось"""
+        if self._fd is not None:
+            if remove:
+                self.path.unlink(missing_ok=True)
+                self.ack_path.unlink(missing_ok=True)
+            os.close(self._fd)
+            self._fd = None
+
+
+class AuditPipeline:
+    """Очередь записей аудита с фоновой пакетной записью в БД"""
+
+    def __init__(
+        self,
+        db_engine: AsyncEngine,
+        *,
+        spool_dir: str,
+        max_queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+        fsync: bool,
+    ) -> None:
+        self._engine = db_engine
+        self._spool_dir = Path(spool_dir)
+        self._max_queue_size = max_queue_size
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._fsync = fsync
+        self._spool: AuditSpool | None = None
+        self._queue: list[tuple[int, dict[str, Any]]] = []
+        # Записи вытеснены из очереди и ждут дочитывания из журнала
+        self._overflowed = False
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._logger = get_logger(self.__class__.__name__)
+
+    @property
+    def running(self) -> bool:
+        return self._spool is not None
+
+    def start(self) -> None:
+        """Открыть журнал воркера и запустить запись (вызывается в lifespan)"""
+        if self._spool is not None:
+            return
+        self._spool = AuditSpool(self._spool_dir / f"audit-{os.getpid()}.jsonl")
+        self._spool.open()
+        self._overflowed = self._spool.last_sequence > self._spool.acked()
+        self._task = asyncio.create_task(self._run())
+
+    def submit(self, entries: list[dict[str, Any]]) -> None:
+        """Принять записи закоммиченной транзакции (синхронно, без обращения к БД)"""
+        if self._spool is None:
+            raise RuntimeError("Audit pipeline is not started")
+
+        first = self._spool.last_sequence + 1
+        self._spool.append(entries, self._fsync)
+        if self._overflowed or len(self._queue) + len(entries) > self._max_queue_size:
+            if not self._overflowed:
+                self._logger.warning(f"Audit queue is full ({len(self._queue)}), spilling to {self._spool.path}")
+            self._overflowed = True
+        else:
+            self._queue.extend(enumerate(entries, start=first))
+
+        if len(self._queue) >= self._batch_size or self._overflowed:
+            self._wakeup.set()
+
+    async def shutdown(self) -> None:
+        """Записать очередь и остановить запись; несохраненное останется в журнале"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._spool is not None:
+            with contextlib.suppress(Exception):
+                await self.flush()
+            self._spool.close(remove=self._spool.acked() >= self._spool.last_sequence)
+            self._spool = None
+
+    async def flush(self) -> int:
+        """Записать все, что есть в очереди и журнале, вернуть число записей"""
+        written = 0
+        while True:
+            if not self._queue and self._overflowed:
+                self._refill()
+            if not self._queue:
+                break
+            batch = self._queue[: self._batch_size]
+            await self._write([entry for _, entry in batch])
+            del self._queue[: len(batch)]
+            self._spool.ack(batch[-1][0])
+            written += len(batch)
+
+        # Все сохранено: журнал можно обнулить (между await новых записей быть не могло)
+        if self._spool.last_sequence and self._spool.acked() >= self._spool.last_sequence:
+            self._spool.truncate()
+        return written
+
+    async def replay_orphaned(self) -> int:
+        """Дописать в БД журналы воркеров, которые остановились, не сохранив записи"""
+        replayed = 0
+        for path in sorted(self._spool_dir.glob("audit-*.jsonl")):
+            if self._spool is not None and path == self._spool.path:
+                continue
+            spool = AuditSpool(path)
+            try:
+                spool.open()
+            except BlockingIOError:
+                # Журнал живого воркера
+                continue
+            try:
+                records = spool.read(after=spool.acked())
+                for start in range(0, len(records), self._batch_size):
+                    batch = records[start : start + self._batch_size]
+                    await self._write([entry for _, entry in batch])
+                    spool.ack(batch[-1][0])
+                    replayed += len(batch)
+            finally:
+                spool.close(remove=spool.acked() >= spool.last_sequence)
+
+        if replayed:
+            self._logger.info(f"Replayed {replayed} audit entries from spool")
+        return replayed
+
+    def _refill(self) -> None:
+        """Дочитать вытесненные записи из журнала, сколько поместится в очередь"""
+        after = self._queue[-1][0] if self._queue else self._spool.acked()
+        records = self._spool.read(after=after)
+        free = self._max_queue_size - len(self._queue)
+        self._queue.extend(records[:free])
+        self._overflowed = len(records) > free
+
+    async def _write(self, entries: list[dict[str, Any]]) -> None:
+        async with self._engine.begin() as conn:
+            for start in range(0, len(entries), INSERT_CHUNK_SIZE):
+                await conn.execute(insert(AuditLog).values(entries[start : start + INSERT_CHUNK_SIZE]))
+
+    async def _run(self) -> None:
+        try:
+            await self.replay_orphaned()
+        except Exception:
+            self._logger.exception("Failed to replay audit spool")
+
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Записи остаются в очереди и журнале, повторим на следующем шаге
+                self._logger.exception("Failed to write audit batch, will retry")
+
+
+audit_pipeline = AuditPipeline(
+    db_engine=engine,
+    spool_dir=settings.AUDIT_SPOOL_DIR,
+    max_queue_size=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_QUEUE_BATCH_SIZE,
+    flush_interval=settings.AUDIT_QUEUE_FLUSH_INTERVAL_SECONDS,
+    fsync=settings.AUDIT_SPOOL_FSYNC,
+)
@@ -15,6 +15,82 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 43200
+    # Библиотека для JWT: "jose" (python-jose) или "pyjwt"
+    JWT_BACKEND: str = "jose"
+    # Кэш проверенных токенов (hash токена -> claims)
+    JWT_DECODE_CACHE_MAX_SIZE: int = 10000
+    JWT_DECODE_CACHE_TTL_SECONDS: int = 300
+
+    # Кэш пользователей по токену (get_current_user)
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # Время, через которое другие воркеры узнают об отзыве токенов пользователя
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 60
+
+    # Хеширование паролей: "process" или "thread"
+    PASSWORD_HASH_EXECUTOR: str = "process"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Параметры argon2 (подбираются скриптом scripts/calibrate_argon2.py под хост)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    # Защита входа: кэш несуществующих email и ограничение частоты попыток
+    LOGIN_NEGATIVE_CACHE_TTL_SECONDS: int = 30
+    LOGIN_GUARD_MAX_KEYS: int = 10000
+    LOGIN_IP_BUCKET_CAPACITY: int = 20
+    LOGIN_IP_REFILL_PER_SECOND: float = 0.5
+    LOGIN_ACCOUNT_BUCKET_CAPACITY: int = 5
+    LOGIN_ACCOUNT_REFILL_PER_SECOND: float = 0.1
+    LOGIN_GUARD_REPORT_INTERVAL_SECONDS: int = 60
+
+    # Отложенная запись last_activity сессий: период записи пакетом, размер буфера
+    # и допустимое отставание значения в БД (более частая активность не записывается)
+    SESSION_ACTIVITY_FLUSH_INTERVAL_SECONDS: int = 10
+    SESSION_ACTIVITY_MAX_PENDING: int = 10000
+    SESSION_ACTIVITY_STALENESS_SECONDS: int = 60
+
+    # Фоновая очистка сессий: период, размер пачки, бюджет времени одной пачки
+    # и срок хранения неактивных сессий перед удалением
+    SESSION_REAPER_ENABLED: bool = True
+    SESSION_REAPER_INTERVAL_SECONDS: int = 300
+    SESSION_REAPER_BATCH_SIZE: int = 500
+    SESSION_REAPER_BATCH_TIME_BUDGET_MS: int = 200
+    SESSION_REAPER_RETENTION_DAYS: int = 90
+
+    # Аудит: записи, накопленные за flush, пишутся одним INSERT после flush
+    AUDIT_BATCH_WRITES: bool = True
+    # "inline" — аудит пишется в транзакции запроса, "async" — после коммита фоновой
+    # задачей большими пачками через журнал на диске (src/core/audit_pipeline.py).
+    # В async записи, не успевшие попасть в журнал между коммитом и падением
+    # процесса, теряются; без потерь — только inline
+    AUDIT_MODE: str = "inline"
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_QUEUE_BATCH_SIZE: int = 500
+    AUDIT_QUEUE_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_SPOOL_DIR: str = "data/audit_spool"
+    # fsync после каждой транзакции: записи переживают падение ОС, а не только процесса
+    AUDIT_SPOOL_FSYNC: bool = False
+
+    # audit_logs разбита на месячные партиции по performed_at (scripts/migrate_audit_partitions.py).
+    # Партиции создаются заранее на AUDIT_PARTITION_PRECREATE_MONTHS месяцев вперед; партиции
+    # старше AUDIT_RETENTION_MONTHS отсоединяются, выгружаются в AUDIT_ARCHIVE_DIR и удаляются
+    AUDIT_PARTITION_PRECREATE_MONTHS: int = 3
+    AUDIT_RETENTION_ENABLED: bool = True
+    AUDIT_RETENTION_MONTHS: int = 12
+    AUDIT_RETENTION_INTERVAL_SECONDS: int = 3600
+    AUDIT_ARCHIVE_DIR: str = "data/audit_archive"
+
+    # Хранилище сессий для проверки и учета активности: "sql" (только БД), "memory"
+    # (кэш в процессе, один воркер) или "socket" (общий кэш воркеров за unix-сокетом)
+    SESSION_STORE_BACKEND: str = "sql"
+    SESSION_STORE_MAX_SIZE: int = 50000
+    SESSION_STORE_TTL_SECONDS: int = 30
+    SESSION_STORE_SOCKET_PATH: str = "/tmp/backend-session-store.sock"
+
+    # Офлайн-база геолокации IP (scripts/build_geoip_database.py); пустой путь отключает геолокацию
+    GEOIP_DATABASE_PATH: str = "data/geoip.bin"
 
     # CORS - исправленные настройки для Docker
     CORS_ORIGINS: list = [
@@ -32,10 +108,37 @@ class Settings(BaseSettings):
 
     # Logging
     LOG_LEVEL: str = "INFO"
-    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
     LOG_FILE: str = "app.log"
     ENABLE_FILE_LOGGING: bool = True
     ENABLE_CONSOLE_LOGGING: bool = True
+    # Записи передаются обработчикам через ограниченную очередь в отдельном потоке,
+    # чтобы event loop не ждал записи на диск. При переполнении "drop_debug_first"
+    # вытесняет сначала DEBUG, затем INFO; "drop_new" отбрасывает новую запись
+    LOG_QUEUE_ENABLED: bool = True
+    LOG_QUEUE_MAX_SIZE: int = 10000
+    LOG_QUEUE_OVERFLOW: str = "drop_debug_first"
+    # JSON строка на запись во всех обработчиках вместо текстового формата
+    LOG_JSON: bool = False
+    # Сэмплирование: "логгер:УРОВЕНЬ:шаблон сообщения" -> доля сохраняемых записей,
+    # например {"*Repository:INFO:Retrieved %(count)d*": 0.01}
+    LOG_SAMPLING: dict[str, float] = {}
+
+    # Метрики Prometheus на /metrics. При нескольких воркерах uvicorn задайте
+    # METRICS_MULTIPROCESS_DIR: каждый воркер пишет туда снимок раз в
+    # METRICS_FLUSH_INTERVAL_SECONDS, /metrics суммирует снимки всех воркеров.
+    # Каталог локален для контейнера (жизнь воркера проверяется по pid) и
+    # очищается при деплое
+    METRICS_ENABLED: bool = True
+    METRICS_MULTIPROCESS_DIR: str | None = None
+    METRICS_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # Замеры SQL: запросы дольше DB_SLOW_QUERY_THRESHOLD_SECONDS пишутся в лог с
+    # нормализованным SQL; запрос, повторенный DB_N_PLUS_ONE_THRESHOLD раз за один
+    # HTTP запрос, отмечается как подозрение на N+1
+    DB_INSTRUMENTATION_ENABLED: bool = True
+    DB_SLOW_QUERY_THRESHOLD_SECONDS: float = 0.5
+    DB_N_PLUS_ONE_THRESHOLD: int = 5
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
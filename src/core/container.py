@@ -1,9 +1,21 @@
 from __future__ import annotations
 
 from collections.abc import AsyncGenerator
+from functools import cached_property
 
 from fastapi import Depends
 
+from src.core.audit_partitions import AuditPartitionManager, audit_partition_manager
+from src.core.audit_pipeline import AuditPipeline, audit_pipeline
+from src.core.config import Settings, settings
+from src.core.logging_config import get_logger
+from src.core.metrics import MetricsRegistry, metrics_registry
+from src.core.password_executor import PasswordExecutor, password_executor
+from src.core.principal import TokenVersionCache, token_versions
+from src.core.principal_cache import PrincipalCache, principal_cache
+from src.core.session_activity import SessionActivityBuffer, session_activity_buffer
+from src.core.session_reaper import SessionReaper, session_reaper
+from src.core.session_store import SessionStore, session_store
 from src.core.uow import IUnitOfWork, SqlAlchemyUoW
 from src.repository.audit_repository import AuditRepository
 from src.repository.defense_repository import (
@@ -27,6 +39,160 @@ from src.services.project_service import ProjectService
 from src.services.resume_service import ResumeService
 from src.services.session_service import SessionService
 from src.services.user_service import UserService
+from src.util.audit_archive import AuditArchive, audit_archive
+from src.util.geoip import GeoIPResolver, geoip_resolver
+
+
+class AppContainer:
+    """Компоненты уровня приложения.
+
+    Создаются один раз на процесс и запускаются/останавливаются в lifespan.
+    Они не зависят от запроса и разделяются всеми запросами воркера.
+    """
+
+    def __init__(self) -> None:
+        self.settings: Settings = settings
+        self.password_executor: PasswordExecutor = password_executor
+        self.principal_cache: PrincipalCache = principal_cache
+        self.token_versions: TokenVersionCache = token_versions
+        self.session_activity: SessionActivityBuffer = session_activity_buffer
+        self.session_reaper: SessionReaper = session_reaper
+        self.session_store: SessionStore = session_store
+        self.audit_pipeline: AuditPipeline = audit_pipeline
+        self.audit_partitions: AuditPartitionManager = audit_partition_manager
+        self.audit_archive: AuditArchive = audit_archive
+        self.geoip: GeoIPResolver = geoip_resolver
+        self.metrics: MetricsRegistry = metrics_registry
+        self._logger = get_logger(self.__class__.__name__)
+
+    def start(self) -> None:
+        """Запустить компоненты при старте приложения"""
+        self.password_executor.start()
+        self.session_activity.start()
+        if self.settings.SESSION_REAPER_ENABLED:
+            self.session_reaper.start()
+        if self.settings.AUDIT_MODE == "async":
+            self.audit_pipeline.start()
+        if self.settings.AUDIT_RETENTION_ENABLED:
+            self.audit_partitions.start()
+        if self.settings.METRICS_ENABLED:
+            self.metrics.start()
+        self._logger.info("Application container started")
+
+    async def shutdown(self) -> None:
+        """Остановить компоненты при остановке приложения"""
+        await self.session_reaper.shutdown()
+        await self.audit_partitions.shutdown()
+        await self.session_store.close()
+        await self.audit_pipeline.shutdown()
+        await self.session_activity.shutdown()
+        await self.metrics.shutdown()
+        self.password_executor.shutdown()
+        self.geoip.close()
+        self.principal_cache.clear()
+        self.token_versions.clear()
+        self._logger.info("Application container stopped")
+
+
+app_container = AppContainer()
+
+
+class RequestScope:
+    """Граф репозиториев и сервисов одного запроса, привязанный к его UoW.
+
+    Объекты создаются лениво при первом обращении, поэтому запрос строит
+    только то, что реально использует эндпоинт.
+    """
+
+    def __init__(self, uow: IUnitOfWork) -> None:
+        self.uow = uow
+
+    # Repository
+    @cached_property
+    def project_repository(self) -> ProjectRepository:
+        return ProjectRepository(self.uow)
+
+    @cached_property
+    def resume_repository(self) -> ResumeRepository:
+        return ResumeRepository(self.uow)
+
+    @cached_property
+    def user_repository(self) -> UserRepository:
+        return UserRepository(self.uow)
+
+    @cached_property
+    def session_repository(self) -> SessionRepository:
+        return SessionRepository(self.uow)
+
+    @cached_property
+    def audit_repository(self) -> AuditRepository:
+        return AuditRepository(self.uow)
+
+    @cached_property
+    def evaluation_repository(self) -> EvaluationRepository:
+        return EvaluationRepository(self.uow)
+
+    @cached_property
+    def defense_project_type_repository(self) -> DefenseProjectTypeRepository:
+        return DefenseProjectTypeRepository(self.uow)
+
+    @cached_property
+    def defense_day_repository(self) -> DefenseDayRepository:
+        return DefenseDayRepository(self.uow)
+
+    @cached_property
+    def defense_slot_repository(self) -> DefenseSlotRepository:
+        return DefenseSlotRepository(self.uow)
+
+    @cached_property
+    def defense_registration_repository(self) -> DefenseRegistrationRepository:
+        return DefenseRegistrationRepository(self.uow)
+
+    @cached_property
+    def grading_criteria_repository(self) -> GradingCriteriaRepository:
+        return GradingCriteriaRepository(self.uow)
+
+    # Service
+    @cached_property
+    def session_service(self) -> SessionService:
+        return SessionService(self.session_repository, app_container.session_store)
+
+    @cached_property
+    def resume_service(self) -> ResumeService:
+        return ResumeService(self.resume_repository)
+
+    @cached_property
+    def project_service(self) -> ProjectService:
+        return ProjectService(self.project_repository)
+
+    @cached_property
+    def auth_service(self) -> AuthService:
+        return AuthService(self.user_repository, self.session_service)
+
+    @cached_property
+    def user_service(self) -> UserService:
+        return UserService(self.user_repository, self.auth_service)
+
+    @cached_property
+    def audit_service(self) -> AuditService:
+        return AuditService(self.audit_repository, app_container.audit_archive)
+
+    @cached_property
+    def evaluation_service(self) -> EvaluationService:
+        return EvaluationService(self.evaluation_repository, self.project_repository)
+
+    @cached_property
+    def defense_service(self) -> DefenseService:
+        return DefenseService(
+            self.defense_project_type_repository,
+            self.defense_day_repository,
+            self.defense_slot_repository,
+            self.defense_registration_repository,
+        )
+
+    @cached_property
+    def grading_criteria_service(self) -> GradingCriteriaService:
+        return GradingCriteriaService(self.grading_criteria_repository)
 
 
 async def get_uow() -> AsyncGenerator[IUnitOfWork, None]:
@@ -34,105 +200,93 @@ async def get_uow() -> AsyncGenerator[IUnitOfWork, None]:
         yield uow
 
 
+async def get_request_scope(uow: IUnitOfWork = Depends(get_uow)) -> RequestScope:
+    return RequestScope(uow)
+
+
 # Repository
-async def get_project_repository(uow: IUnitOfWork = Depends(get_uow)) -> ProjectRepository:
-    return ProjectRepository(uow)
+async def get_project_repository(scope: RequestScope = Depends(get_request_scope)) -> ProjectRepository:
+    return scope.project_repository
 
 
-async def get_resume_repository(uow: IUnitOfWork = Depends(get_uow)) -> ResumeRepository:
-    return ResumeRepository(uow)
+async def get_resume_repository(scope: RequestScope = Depends(get_request_scope)) -> ResumeRepository:
+    return scope.resume_repository
 
 
-async def get_user_repository(uow: IUnitOfWork = Depends(get_uow)) -> UserRepository:
-    return UserRepository(uow)
+async def get_user_repository(scope: RequestScope = Depends(get_request_scope)) -> UserRepository:
+    return scope.user_repository
 
 
-async def get_session_repository(uow: IUnitOfWork = Depends(get_uow)) -> SessionRepository:
-    return SessionRepository(uow)
+async def get_session_repository(scope: RequestScope = Depends(get_request_scope)) -> SessionRepository:
+    return scope.session_repository
 
 
-async def get_audit_repository(uow: IUnitOfWork = Depends(get_uow)) -> AuditRepository:
-    return AuditRepository(uow)
+async def get_audit_repository(scope: RequestScope = Depends(get_request_scope)) -> AuditRepository:
+    return scope.audit_repository
 
 
-async def get_evaluation_repository(uow: IUnitOfWork = Depends(get_uow)) -> EvaluationRepository:
-    return EvaluationRepository(uow)
+async def get_evaluation_repository(scope: RequestScope = Depends(get_request_scope)) -> EvaluationRepository:
+    return scope.evaluation_repository
 
 
-async def get_defense_project_type_repository(uow: IUnitOfWork = Depends(get_uow)) -> DefenseProjectTypeRepository:
-    return DefenseProjectTypeRepository(uow)
+async def get_defense_project_type_repository(
+    scope: RequestScope = Depends(get_request_scope),
+) -> DefenseProjectTypeRepository:
+    return scope.defense_project_type_repository
 
 
-async def get_defense_day_repository(uow: IUnitOfWork = Depends(get_uow)) -> DefenseDayRepository:
-    return DefenseDayRepository(uow)
+async def get_defense_day_repository(scope: RequestScope = Depends(get_request_scope)) -> DefenseDayRepository:
+    return scope.defense_day_repository
 
 
-async def get_defense_slot_repository(uow: IUnitOfWork = Depends(get_uow)) -> DefenseSlotRepository:
-    return DefenseSlotRepository(uow)
+async def get_defense_slot_repository(scope: RequestScope = Depends(get_request_scope)) -> DefenseSlotRepository:
+    return scope.defense_slot_repository
 
 
-async def get_defense_registration_repository(uow: IUnitOfWork = Depends(get_uow)) -> DefenseRegistrationRepository:
-    return DefenseRegistrationRepository(uow)
+async def get_defense_registration_repository(
+    scope: RequestScope = Depends(get_request_scope),
+) -> DefenseRegistrationRepository:
+    return scope.defense_registration_repository
 
 
-async def get_grading_criteria_repository(uow: IUnitOfWork = Depends(get_uow)) -> GradingCriteriaRepository:
-    return GradingCriteriaRepository(uow)
+async def get_grading_criteria_repository(
+    scope: RequestScope = Depends(get_request_scope),
+) -> GradingCriteriaRepository:
+    return scope.grading_criteria_repository
 
 
 # Service
-async def get_session_service(
-    session_repository: SessionRepository = Depends(get_session_repository),
-) -> SessionService:
-    return SessionService(session_repository)
+async def get_session_service(scope: RequestScope = Depends(get_request_scope)) -> SessionService:
+    return scope.session_service
 
 
-async def get_resume_service(resume_repository: ResumeRepository = Depends(get_resume_repository)) -> ResumeService:
-    return ResumeService(resume_repository)
+async def get_resume_service(scope: RequestScope = Depends(get_request_scope)) -> ResumeService:
+    return scope.resume_service
 
 
-async def get_project_service(
-    project_repository: ProjectRepository = Depends(get_project_repository),
-) -> ProjectService:
-    return ProjectService(project_repository)
+async def get_project_service(scope: RequestScope = Depends(get_request_scope)) -> ProjectService:
+    return scope.project_service
 
 
-async def get_auth_service(
-    user_repository: UserRepository = Depends(get_user_repository),
-    session_service: SessionService = Depends(get_session_service),
-) -> AuthService:
-    return AuthService(user_repository, session_service)
+async def get_auth_service(scope: RequestScope = Depends(get_request_scope)) -> AuthService:
+    return scope.auth_service
 
 
-async def get_user_service(
-    user_repository: UserRepository = Depends(get_user_repository),
-    auth_service: AuthService = Depends(get_auth_service),
-) -> UserService:
-    return UserService(user_repository, auth_service)
+async def get_user_service(scope: RequestScope = Depends(get_request_scope)) -> UserService:
+    return scope.user_service
 
 
-async def get_audit_service(
-    audit_repository: AuditRepository = Depends(get_audit_repository),
-) -> AuditService:
-    return AuditService(audit_repository)
+async def get_audit_service(scope: RequestScope = Depends(get_request_scope)) -> AuditService:
+    return scope.audit_service
 
 
-async def get_evaluation_service(
-    evaluation_repository: EvaluationRepository = Depends(get_evaluation_repository),
-    project_repository: ProjectRepository = Depends(get_project_repository),
-) -> EvaluationService:
-    return EvaluationService(evaluation_repository, project_repository)
+async def get_evaluation_service(scope: RequestScope = Depends(get_request_scope)) -> EvaluationService:
+    return scope.evaluation_service
 
 
-async def get_defense_service(
-    project_type_repository: DefenseProjectTypeRepository = Depends(get_defense_project_type_repository),
-    day_repository: DefenseDayRepository = Depends(get_defense_day_repository),
-    slot_repository: DefenseSlotRepository = Depends(get_defense_slot_repository),
-    registration_repository: DefenseRegistrationRepository = Depends(get_defense_registration_repository),
-) -> DefenseService:
-    return DefenseService(project_type_repository, day_repository, slot_repository, registration_repository)
+async def get_defense_service(scope: RequestScope = Depends(get_request_scope)) -> DefenseService:
+    return scope.defense_service
 
 
-async def get_grading_criteria_service(
-    repository: GradingCriteriaRepository = Depends(get_grading_criteria_repository),
-) -> GradingCriteriaService:
-    return GradingCriteriaService(repository)
+async def get_grading_criteria_service(scope: RequestScope = Depends(get_request_scope)) -> GradingCriteriaService:
+    return scope.grading_criteria_service
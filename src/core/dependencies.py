@@ -10,14 +10,15 @@ from src.core.logging_config import get_logger
 from src.core.security import oauth2_scheme
 
 if TYPE_CHECKING:
-    from src.model.models import User
+    from src.core.principal import Principal
+    from src.core.principal_cache import UserSnapshot
     from src.services.auth_service import AuthService
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     auth_service: AuthService = Depends(get_auth_service),
-) -> User:
+) -> UserSnapshot:
     """Получить текущего пользователя с использованием AuthService (асинхронно)"""
     logger = get_logger(__name__)
 
@@ -31,20 +32,36 @@ async def get_current_user(
         return user
 
 
-async def require_teacher(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme),
+    auth_service: AuthService = Depends(get_auth_service),
+) -> Principal:
+    """Получить идентичность и роль пользователя из токена без загрузки пользователя из БД"""
+    logger = get_logger(__name__)
+
+    try:
+        principal = await auth_service.get_current_principal(token)
+    except HTTPException as e:
+        logger.warning(f"Failed to get current principal - Status: {e.status_code}, Detail: {e.detail}")
+        raise
+    else:
+        return principal
+
+
+async def require_teacher(principal: Principal = Depends(get_current_principal)) -> Principal:
     """Проверить, что текущий пользователь — преподаватель."""
-    if current_user.role != "teacher":
+    if principal.role != "teacher":
         raise HTTPException(
             status_code=403,
             detail="Only teachers can perform this action",
         )
-    return current_user
+    return principal
 
 
 async def get_current_user_no_exception(
     token: str = Depends(oauth2_scheme),
     auth_service: AuthService = Depends(get_auth_service),
-) -> User | None:
+) -> UserSnapshot | None:
     """Получить текущего пользователя без исключения (возвращает None если ошибка)"""
     logger = get_logger(__name__)
 
@@ -58,13 +75,13 @@ async def get_current_user_no_exception(
         return user
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     """Получить текущего активного пользователя (для будущего использования)"""
     # В будущем здесь можно добавить проверку активности пользователя
     return current_user
 
 
-async def get_current_super_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_super_user(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     """Получить текущего супер-пользователя (для будущего использования)"""
     # В будущем здесь можно добавить проверку ролей
     return current_user
@@ -72,12 +89,12 @@ async def get_current_super_user(current_user: User = Depends(get_current_user))
 
 async def setup_audit(
     request: Request,
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
 ):
     """Установить контекстных переменных для аудита пользователей"""
     ip_address = request.client.host if request.client else None
     user_agent = request.headers.get("user-agent")
 
-    user_id = current_user.id
+    user_id = principal.id
 
     set_audit_context(user_id=user_id, ip_address=ip_address, user_agent=user_agent)
@@ -83,3 +83,17 @@ class BusinessLogicError(BaseAppException):
 
     def __init__(self, detail: Any = "Business logic error", headers: dict[str, Any] | None = None) -> None:
         super().__init__(status.HTTP_409_CONFLICT, detail, headers)
+
+
+class ServiceUnavailableError(BaseAppException):
+    """Исключение для временно перегруженных компонентов"""
+
+    def __init__(self, detail: Any = "Service temporarily unavailable", headers: dict[str, Any] | None = None) -> None:
+        super().__init__(status.HTTP_503_SERVICE_UNAVAILABLE, detail, headers)
+
+
+class TooManyRequestsError(BaseAppException):
+    """Исключение для превышения лимита запросов"""
+
+    def __init__(self, detail: Any = "Too many requests", headers: dict[str, Any] | None = None) -> None:
+        super().__init__(status.HTTP_429_TOO_MANY_REQUESTS, detail, headers)
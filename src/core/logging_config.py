@@ -2,18 +2,282 @@
 
 from __future__ import annotations
 
+import atexit
+import copy
+import fnmatch
+import json
 import logging
 import logging.handlers
+import queue
+import random
+import re
 import sys
+import threading
+from collections import Counter, deque
+from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
 from src.core.config import settings
+from src.core.request_context import get_request_id
+
+# Уровни записей, которые вытесняются из переполненной очереди, от первых к последним
+EVICTABLE_LEVELS = (logging.DEBUG, logging.INFO)
+OVERFLOW_POLICIES = ("drop_debug_first", "drop_new")
+# Именованные аргументы вызова логгера, которые не являются полями контекста
+LOG_CALL_KEYWORDS = frozenset({"exc_info", "stack_info", "stacklevel", "extra"})
+
+
+class LogQueue:
+    """Ограниченная очередь записей лога для QueueHandler/QueueListener.
+
+    Записи хранятся в трех очередях (DEBUG, INFO, WARNING и выше) с общим
+    порядковым номером, поэтому вытеснить самую старую запись низкого уровня
+    можно за O(1), а выдаются записи в исходном порядке. Запись не ждет
+    свободного места: при переполнении она либо вытесняет запись более низкого
+    уровня (drop_debug_first), либо отбрасывается. Число отброшенных записей
+    listener выводит отдельным предупреждением.
+    """
+
+    def __init__(self, maxsize: int, overflow: str = "drop_debug_first") -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log queue overflow policy: {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._tiers: tuple[deque, ...] = (deque(), deque(), deque())
+        self._size = 0
+        self._sequence = 0
+        self._dropped: Counter[str] = Counter()
+        self._not_empty = threading.Condition(threading.Lock())
+
+    def qsize(self) -> int:
+        return self._size
+
+    def put_nowait(self, record: logging.LogRecord | None) -> None:
+        """Добавить запись; None — сигнал остановки listener'а, он не отбрасывается"""
+        tier = self._tier(record)
+        with self._not_empty:
+            if record is not None and self._size >= self.maxsize and not self._make_room(tier):
+                self._dropped[record.levelname] += 1
+                return
+            self._sequence += 1
+            self._tiers[tier].append((self._sequence, record))
+            self._size += 1
+            # Listener ждет только на пустой очереди: будить его нужно лишь при первой записи
+            if self._size == 1:
+                self._not_empty.notify()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> logging.LogRecord | None:
+        with self._not_empty:
+            if not self._not_empty.wait_for(self._ready, timeout if block else 0):
+                raise queue.Empty
+            if self._dropped:
+                return self._dropped_record()
+            self._size -= 1
+            return min((tier for tier in self._tiers if tier), key=self._head_sequence).popleft()[1]
+
+    def get_nowait(self) -> logging.LogRecord | None:
+        return self.get(block=False)
+
+    def _ready(self) -> bool:
+        return bool(self._size or self._dropped)
+
+    @staticmethod
+    def _head_sequence(tier: deque) -> int:
+        return tier[0][0]
+
+    def _make_room(self, tier: int) -> bool:
+        """Вытеснить самую старую запись уровня ниже tier; False — если таких нет"""
+        if self.overflow == "drop_new":
+            return False
+        for lower in range(min(tier, len(EVICTABLE_LEVELS))):
+            if self._tiers[lower]:
+                _, evicted = self._tiers[lower].popleft()
+                self._dropped[evicted.levelname] += 1
+                self._size -= 1
+                return True
+        return False
+
+    def _dropped_record(self) -> logging.LogRecord:
+        counts = ", ".join(f"{level}: {count}" for level, count in sorted(self._dropped.items()))
+        self._dropped.clear()
+        return logging.makeLogRecord(
+            {
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"Log queue overflow, records dropped - {counts}",
+                # Запись идет прямо в обработчики listener'а, минуя RequestIdFilter
+                "request_id": "-",
+            }
+        )
+
+    @staticmethod
+    def _tier(record: logging.LogRecord | None) -> int:
+        if record is None:
+            return len(EVICTABLE_LEVELS)
+        for tier, level in enumerate(EVICTABLE_LEVELS):
+            if record.levelno <= level:
+                return tier
+        return len(EVICTABLE_LEVELS)
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler, который подставляет аргументы в сообщение, но не форматирует вывод.
+
+    Стандартный prepare прогоняет запись через Formatter и склеивает traceback с
+    сообщением; здесь traceback сохраняется в exc_text, а поля контекста остаются
+    в записи, чтобы JsonFormatter в потоке listener'а вывел их отдельно.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна JSON строка: время, уровень, логгер, сообщение и поля контекста"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, UTC).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", None),
+            "message": record.getMessage(),
+        }
+        for key, value in getattr(record, "fields", {}).items():
+            entry.setdefault(key, value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускает заданную долю записей, подходящих под правила сэмплирования.
+
+    Правило — "логгер:УРОВЕНЬ:сообщение" и доля от 0 до 1, шаблоны в формате fnmatch.
+    Сообщение сравнивается до подстановки аргументов, то есть с шаблоном вызова:
+    {"*Repository:INFO:Retrieved %(count)d*": 0.01} оставит 1% таких записей,
+    остальные записи этих логгеров (в том числе WARNING) не затрагиваются.
+    Решение сохраняется в записи, поэтому несколько обработчиков не сэмплируют
+    одну запись независимо.
+    """
+
+    def __init__(self, rules: dict[str, float]) -> None:
+        super().__init__()
+        self._rules: list[tuple[str, int, re.Pattern[str], float]] = []
+        for rule, rate in rules.items():
+            logger_pattern, level_name, *message = rule.split(":", 2)
+            level = logging.getLevelName(level_name.upper())
+            if not isinstance(level, int) or not 0 <= rate <= 1:
+                raise ValueError(f"Invalid log sampling rule: {rule}={rate}")
+            message_pattern = re.compile(fnmatch.translate(message[0] if message else "*"))
+            self._rules.append((logger_pattern, level, message_pattern, rate))
+        self._candidates: dict[tuple[str, int], list[tuple[re.Pattern[str], float]]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        sampled = getattr(record, "sampled", None)
+        if sampled is None:
+            sampled = record.sampled = self._sample(record)
+        return sampled
+
+    def _sample(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.levelno)
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            candidates = self._candidates[key] = [
+                (message_pattern, rate)
+                for logger_pattern, level, message_pattern, rate in self._rules
+                if level == record.levelno and fnmatch.fnmatchcase(record.name, logger_pattern)
+            ]
+        for message_pattern, rate in candidates:
+            if message_pattern.match(str(record.msg)):
+                return random.random() < rate
+        return True
+
+
+class RequestIdFilter(logging.Filter):
+    """Добавляет в запись id текущего HTTP запроса ("-" вне запроса)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = get_request_id() or "-"
+        return True
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Логгер с ленивой сборкой сообщения и полями контекста.
+
+    Именованные аргументы вызова (кроме exc_info, stack_info, stacklevel и extra)
+    становятся полями записи и подставляются в шаблон сообщения:
+    logger.info("Retrieved %(count)d %(model)s objects", count=3, model="User").
+    Строка собирается, только если уровень включен и запись прошла
+    сэмплирование; для отключенного уровня вызов стоит одной проверки уровня.
+    """
+
+    # Методы уровней переопределены, чтобы отключенный уровень отсекался одной
+    # проверкой, без цепочки вызовов LoggerAdapter
+
+    def debug(self, msg: object, *args: object, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emit(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg: object, *args: object, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emit(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg: object, *args: object, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emit(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg: object, *args: object, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, msg, args, kwargs)
+
+    def exception(self, msg: object, *args: object, exc_info: Any = True, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, msg, args, {**kwargs, "exc_info": exc_info})
+
+    def critical(self, msg: object, *args: object, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self._emit(logging.CRITICAL, msg, args, kwargs)
+
+    def log(self, level: int, msg: object, *args: object, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(level):
+            self._emit(level, msg, args, kwargs)
+
+    def _emit(self, level: int, msg: object, args: tuple[object, ...], kwargs: dict[str, Any]) -> None:
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in LOG_CALL_KEYWORDS}
+        if fields:
+            kwargs["extra"] = {**(kwargs.get("extra") or {}), "fields": fields}
+            if not args:
+                args = (fields,)
+        # Место вызова — код, вызвавший debug/info/..., а не _emit и метод уровня
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 2
+        self.logger._log(level, msg, args, **kwargs)
+
+
+_listener: logging.handlers.QueueListener | None = None
 
 
 def setup_logging() -> None:
     """Настройка системы логирования"""
 
+    shutdown_logging()
+
     # Создаем директорию для логов если её нет
     log_dir = Path("logs")
     log_dir.mkdir(exist_ok=True)
@@ -26,16 +290,24 @@ def setup_logging() -> None:
     root_logger.handlers.clear()
 
     # Форматтер для логов
-    detailed_formatter = logging.Formatter(fmt=settings.LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S")
+    # request_id по умолчанию — для записей, не прошедших через RequestIdFilter
+    detailed_formatter = logging.Formatter(
+        fmt=settings.LOG_FORMAT, datefmt="%Y-%m-%d %H:%M:%S", defaults={"request_id": "-"}
+    )
 
     simple_formatter = logging.Formatter(fmt="%(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S")
 
+    if settings.LOG_JSON:
+        detailed_formatter = simple_formatter = JsonFormatter()
+
+    handlers: list[logging.Handler] = []
+
     # Консольный обработчик
     if settings.ENABLE_CONSOLE_LOGGING:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
         console_handler.setFormatter(simple_formatter)
-        root_logger.addHandler(console_handler)
+        handlers.append(console_handler)
 
     # Файловый обработчик с ротацией
     if settings.ENABLE_FILE_LOGGING:
@@ -47,7 +319,7 @@ def setup_logging() -> None:
         )
         file_handler.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
         file_handler.setFormatter(detailed_formatter)
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
 
         # Отдельный файл для ошибок
         error_handler = logging.handlers.RotatingFileHandler(
@@ -58,12 +330,49 @@ def setup_logging() -> None:
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(detailed_formatter)
-        root_logger.addHandler(error_handler)
+        handlers.append(error_handler)
+
+    # Фильтры выполняются в потоке, создавшем запись: там виден id текущего запроса
+    record_filters: list[logging.Filter] = [SamplingFilter(settings.LOG_SAMPLING)] if settings.LOG_SAMPLING else []
+    record_filters.append(RequestIdFilter())
 
+    if not settings.LOG_QUEUE_ENABLED:
+        for handler in handlers:
+            for record_filter in record_filters:
+                handler.addFilter(record_filter)
+            root_logger.addHandler(handler)
+        return
 
-def get_logger(name: str) -> logging.Logger:
+    # Вызывающий поток только кладет запись в очередь; форматирование вывода,
+    # запись в файлы и ротация выполняются в потоке listener'а
+    global _listener
+    log_queue = LogQueue(settings.LOG_QUEUE_MAX_SIZE, settings.LOG_QUEUE_OVERFLOW)
+    queue_handler = LogQueueHandler(log_queue)
+    # Отброшенная сэмплированием запись не попадает в очередь и не форматируется
+    for record_filter in record_filters:
+        queue_handler.addFilter(record_filter)
+    root_logger.addHandler(queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Дописать записи из очереди и закрыть обработчики (вызывается при остановке приложения)"""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> StructuredLogger:
     """Получить логгер с указанным именем"""
-    return logging.getLogger(name)
+    return StructuredLogger(logging.getLogger(name))
 
 
 class SecurityLogger:
@@ -92,6 +401,10 @@ class SecurityLogger:
             f"Permission denied - User ID: {user_id}, Action: {action}, Resource: {resource}, IP: {ip_address}"
         )
 
+    def log_login_throttled(self, counters: dict[str, int], interval_seconds: float) -> None:
+        """Логирование счетчиков отклоненных попыток входа за интервал"""
+        self.logger.warning(f"Login throttling - Interval: {interval_seconds:.0f}s, Counters: {counters}")
+
     def log_suspicious_activity(self, user_id: int, activity: str, details: dict[str, Any]) -> None:
         """Логирование подозрительной активности"""
         self.logger.error(f"Suspicious activity - User ID: {user_id}, Activity: {activity}, Details: {details}")
@@ -0,0 +1,195 @@
+"""Защита входа от перебора: кэш несуществующих email и ограничение частоты попыток"""
+
+from __future__ import annotations
+
+import math
+import secrets
+import time
+from collections import OrderedDict
+
+from src.core.config import settings
+from src.core.exceptions import TooManyRequestsError
+from src.core.logging_config import security_logger
+from src.core.metrics import auth_login_total
+from src.core.password_executor import password_executor
+
+
+class NegativeEmailCache:
+    """Ограниченный кэш email, для которых пользователь не найден.
+
+    Живет в памяти процесса: новый пользователь, созданный через другой воркер,
+    сможет войти не позже чем через TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_size: int) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_size = max_size
+        self._entries: OrderedDict[str, float] = OrderedDict()
+
+    def __contains__(self, email: str) -> bool:
+        expires_at = self._entries.get(email)
+        if expires_at is None:
+            return False
+
+        if expires_at <= time.monotonic():
+            del self._entries[email]
+            return False
+        return True
+
+    def add(self, email: str) -> None:
+        """Запомнить несуществующий email"""
+        if self._max_size <= 0:
+            return
+
+        self._entries[email] = time.monotonic() + self._ttl_seconds
+        self._entries.move_to_end(email)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, email: str) -> None:
+        """Забыть email (пользователь с ним создан)"""
+        self._entries.pop(email, None)
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        self._entries.clear()
+
+
+class TokenBucketLimiter:
+    """Token bucket по ключу (IP или email) с ограниченным числом ключей.
+
+    Ведро вмещает capacity попыток и пополняется со скоростью refill_per_second.
+    Давно не использовавшиеся ключи вытесняются (LRU).
+    """
+
+    def __init__(self, capacity: int, refill_per_second: float, max_keys: int) -> None:
+        self._capacity = capacity
+        self._refill_per_second = refill_per_second
+        self._max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def acquire(self, key: str) -> float:
+        """Забрать одну попытку.
+
+        Returns:
+            0, если попытка разрешена, иначе число секунд до появления следующей
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (self._capacity, now))
+        tokens = min(self._capacity, tokens + (now - updated_at) * self._refill_per_second)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        elif self._refill_per_second > 0:
+            retry_after = (1 - tokens) / self._refill_per_second
+        else:
+            retry_after = math.inf
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def clear(self) -> None:
+        """Сбросить все ведра"""
+        self._buckets.clear()
+
+
+class LoginGuard:
+    """Контроль допуска перед AuthService.authenticate_user.
+
+    - ведра по IP и по email отсекают перебор до обращения к БД и argon2;
+    - несуществующие email кэшируются, чтобы не делать запрос к БД повторно;
+    - для неизвестного email выполняется проверка фиктивного хеша, поэтому
+      время ответа не выдает, существует ли пользователь.
+
+    Счетчики отказов периодически пишутся в security лог.
+    """
+
+    def __init__(
+        self,
+        negative_cache: NegativeEmailCache,
+        ip_limiter: TokenBucketLimiter,
+        account_limiter: TokenBucketLimiter,
+        report_interval_seconds: float,
+    ) -> None:
+        self.negative_cache = negative_cache
+        self._ip_limiter = ip_limiter
+        self._account_limiter = account_limiter
+        self._report_interval_seconds = report_interval_seconds
+        self._counters = {"ip_throttled": 0, "account_throttled": 0, "unknown_email_cached": 0}
+        self._reported_at = time.monotonic()
+        self._dummy_hash: str | None = None
+
+    @property
+    def counters(self) -> dict[str, int]:
+        """Счетчики отказов с момента запуска"""
+        return dict(self._counters)
+
+    def admit(self, email: str, ip_address: str) -> None:
+        """Пропустить попытку входа или выбросить 429"""
+        retry_after = self._ip_limiter.acquire(ip_address)
+        if retry_after:
+            self._reject("ip_throttled", retry_after)
+
+        retry_after = self._account_limiter.acquire(email)
+        if retry_after:
+            self._reject("account_throttled", retry_after)
+
+    def is_unknown_email(self, email: str) -> bool:
+        """Проверить, что email недавно не был найден в БД"""
+        if email in self.negative_cache:
+            self._count("unknown_email_cached")
+            return True
+        return False
+
+    async def dummy_verify(self, password: str) -> None:
+        """Проверить пароль против фиктивного хеша, чтобы выровнять время ответа"""
+        if self._dummy_hash is None:
+            self._dummy_hash = await password_executor.hash(secrets.token_urlsafe(32))
+        await password_executor.verify(password, self._dummy_hash)
+
+    def reset(self) -> None:
+        """Сбросить кэш, ведра и счетчики"""
+        self.negative_cache.clear()
+        self._ip_limiter.clear()
+        self._account_limiter.clear()
+        self._counters = dict.fromkeys(self._counters, 0)
+        self._reported_at = time.monotonic()
+
+    def _reject(self, counter: str, retry_after: float) -> None:
+        self._count(counter)
+        auth_login_total.inc(counter)
+        raise TooManyRequestsError(
+            "Too many login attempts, try again later",
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))},
+        )
+
+    def _count(self, counter: str) -> None:
+        self._counters[counter] += 1
+
+        now = time.monotonic()
+        if now - self._reported_at >= self._report_interval_seconds:
+            security_logger.log_login_throttled(self.counters, now - self._reported_at)
+            self._reported_at = now
+
+
+login_guard = LoginGuard(
+    negative_cache=NegativeEmailCache(
+        ttl_seconds=settings.LOGIN_NEGATIVE_CACHE_TTL_SECONDS,
+        max_size=settings.LOGIN_GUARD_MAX_KEYS,
+    ),
+    ip_limiter=TokenBucketLimiter(
+        capacity=settings.LOGIN_IP_BUCKET_CAPACITY,
+        refill_per_second=settings.LOGIN_IP_REFILL_PER_SECOND,
+        max_keys=settings.LOGIN_GUARD_MAX_KEYS,
+    ),
+    account_limiter=TokenBucketLimiter(
+        capacity=settings.LOGIN_ACCOUNT_BUCKET_CAPACITY,
+        refill_per_second=settings.LOGIN_ACCOUNT_REFILL_PER_SECOND,
+        max_keys=settings.LOGIN_GUARD_MAX_KEYS,
+    ),
+    report_interval_seconds=settings.LOGIN_GUARD_REPORT_INTERVAL_SECONDS,
+)
@@ -0,0 +1,406 @@
+"""Метрики приложения: реестр в процессе и вывод в текстовом формате Prometheus"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any
+
+from src.core.config import settings
+from src.core.database import engine
+from src.core.logging_config import get_logger
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SNAPSHOT_GLOB = "metrics-*.json"
+ARCHIVE_FILE = "archive.json"
+LOCK_FILE = "metrics.lock"
+
+
+class Counter:
+    """Монотонный счетчик; значения метки передаются позиционно в порядке labelnames"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: defaultdict[tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] += amount
+
+    def samples(self) -> list[list[Any]]:
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Gauge:
+    """Текущее значение; collect — функция, которая читает значение в момент снимка"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        collect: Callable[[], float] | None = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._collect = collect
+        self._values: defaultdict[tuple[str, ...], float] = defaultdict(float)
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] += amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] -= amount
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> list[list[Any]]:
+        if self._collect is not None:
+            return [[[], float(self._collect())]]
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Histogram:
+    """Гистограмма: число наблюдений в каждом интервале bucket'ов и их сумма"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Счетчики не накопительные (последний — выше всех границ), накопление — при выводе
+        self._values: dict[tuple[str, ...], list[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self) -> list[list[Any]]:
+        return [[list(labels), [list(counts), total]] for labels, (counts, total) in self._values.items()]
+
+
+Metric = Counter | Gauge | Histogram
+
+
+class MetricsRegistry:
+    """Реестр метрик процесса.
+
+    Метрики обновляются из потока event loop без блокировок. В режиме нескольких
+    процессов (multiprocess_dir) каждый воркер раз в flush_interval_seconds пишет
+    снимок своих метрик в отдельный файл, а /metrics складывает снимки всех
+    воркеров: счетчики и гистограммы — всех, включая завершившиеся (счетчики не
+    убывают при перезапуске воркера), gauge — только живых процессов. Снимки
+    завершившихся воркеров при старте сворачиваются в archive.json под блокировкой.
+    """
+
+    def __init__(self, multiprocess_dir: str | None, flush_interval_seconds: float) -> None:
+        self._metrics: dict[str, Metric] = {}
+        self._directory = Path(multiprocess_dir) if multiprocess_dir else None
+        self._flush_interval_seconds = flush_interval_seconds
+        self._snapshot_path: Path | None = None
+        self._started = time.time_ns()
+        self._task: asyncio.Task | None = None
+        self._logger = get_logger(self.__class__.__name__)
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        collect: Callable[[], float] | None = None,
+    ) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, collect))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(self, include_gauges: bool = True) -> dict[str, Any]:
+        """Снимок метрик процесса в виде, пригодном для JSON"""
+        metrics = {}
+        for metric in self._metrics.values():
+            if metric.kind == "gauge" and not include_gauges:
+                continue
+            metrics[metric.name] = {
+                "kind": metric.kind,
+                "help": metric.documentation,
+                "labels": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", [])),
+                "samples": metric.samples(),
+            }
+        return {"pid": os.getpid(), "started": self._started, "metrics": metrics}
+
+    async def exposition(self) -> str:
+        """Метрики всех воркеров в текстовом формате Prometheus"""
+        if self._directory is None or self._snapshot_path is None:
+            return render(merge_snapshots([self.snapshot()]))
+        own = self.snapshot()
+        others = await asyncio.to_thread(self._read_snapshots)
+        return render(merge_snapshots([own, *others]))
+
+    def start(self) -> None:
+        """Начать запись снимков для /metrics других воркеров (вызывается в lifespan)"""
+        if self._directory is None or self._task is not None:
+            return
+        self._directory.mkdir(parents=True, exist_ok=True)
+        # Момент старта воркера, а не импорта: при fork после импорта он у всех разный
+        self._started = time.time_ns()
+        self._snapshot_path = self._directory / f"metrics-{os.getpid()}-{self._started}.json"
+        self._compact()
+        self._write_snapshot(self.snapshot())
+        self._task = asyncio.create_task(self._loop())
+
+    async def shutdown(self) -> None:
+        """Записать итоговый снимок без gauge: счетчики воркера остаются в сумме"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self._write_snapshot(self.snapshot(include_gauges=False))
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval_seconds)
+            try:
+                await asyncio.to_thread(self._write_snapshot, self.snapshot())
+            except OSError:
+                self._logger.exception("Failed to write metrics snapshot")
+
+    def _register(self, metric: Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def _write_snapshot(self, snapshot: dict[str, Any]) -> None:
+        # Запись во временный файл и rename: читатель не увидит файл наполовину
+        temporary = self._snapshot_path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(snapshot))
+        temporary.replace(self._snapshot_path)
+
+    def _read_snapshots(self) -> list[dict[str, Any]]:
+        """Снимки других воркеров и архив завершившихся"""
+        with self._lock(fcntl.LOCK_SH):
+            paths = [path for path in self._directory.glob(SNAPSHOT_GLOB) if path != self._snapshot_path]
+            snapshots = list(_load(paths))
+            archive = self._directory / ARCHIVE_FILE
+            if archive.exists():
+                snapshots.extend(_load([archive]))
+        # gauge живого процесса — только из его последнего снимка: pid мог достаться
+        # новому воркеру от завершившегося
+        latest: dict[int, int] = {os.getpid(): self._started}
+        for snapshot in snapshots:
+            if _is_alive(snapshot["pid"]):
+                latest[snapshot["pid"]] = max(latest.get(snapshot["pid"], 0), snapshot["started"])
+        for snapshot in snapshots:
+            if latest.get(snapshot["pid"]) != snapshot.get("started"):
+                snapshot["metrics"] = {
+                    name: metric for name, metric in snapshot["metrics"].items() if metric["kind"] != "gauge"
+                }
+        return snapshots
+
+    def _compact(self) -> None:
+        """Свернуть снимки завершившихся воркеров в архив, чтобы каталог не рос"""
+        with self._lock(fcntl.LOCK_EX):
+            archive = self._directory / ARCHIVE_FILE
+            dead = []
+            for path in self._directory.glob(SNAPSHOT_GLOB):
+                snapshots = list(_load([path]))
+                # Снимок с pid этого процесса остался от прежнего воркера с тем же pid
+                if snapshots and (snapshots[0]["pid"] == os.getpid() or not _is_alive(snapshots[0]["pid"])):
+                    dead.append((path, snapshots[0]))
+            if not dead:
+                return
+            previous = list(_load([archive])) if archive.exists() else []
+            merged = merge_snapshots([*previous, *(snapshot for _, snapshot in dead)], include_gauges=False)
+            temporary = archive.with_suffix(".tmp")
+            temporary.write_text(json.dumps({"pid": None, "started": None, "metrics": _to_snapshot_metrics(merged)}))
+            temporary.replace(archive)
+            for path, _ in dead:
+                path.unlink(missing_ok=True)
+            self._logger.info(f"Compacted {len(dead)} metrics snapshots of finished workers")
+
+    @contextlib.contextmanager
+    def _lock(self, operation: int) -> Iterator[None]:
+        with open(self._directory / LOCK_FILE, "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def merge_snapshots(snapshots: Iterable[dict[str, Any]], include_gauges: bool = True) -> dict[str, dict[str, Any]]:
+    """Сложить снимки процессов: значения с одинаковыми метками суммируются"""
+    merged: dict[str, dict[str, Any]] = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot["metrics"].items():
+            if metric["kind"] == "gauge" and not include_gauges:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif metric["kind"] == "histogram":
+                    target["samples"][key] = [
+                        [left + right for left, right in zip(current[0], value[0], strict=True)],
+                        current[1] + value[1],
+                    ]
+                else:
+                    target["samples"][key] = current + value
+    return merged
+
+
+def render(merged: dict[str, dict[str, Any]]) -> str:
+    """Текстовый формат Prometheus (version 0.0.4)"""
+    lines = []
+    for name in sorted(merged):
+        metric = merged[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        for labels, value in sorted(metric["samples"].items()):
+            pairs = list(zip(metric["labels"], labels, strict=True))
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(pairs)} {_format_value(value)}")
+                continue
+            counts, total = value
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], "+Inf"], counts, strict=True):
+                cumulative += count
+                bucket_labels = _format_labels([*pairs, ("le", _format_value(bound))])
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(pairs)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(pairs)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_labels(pairs: list[tuple[str, Any]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return repr(float(value))
+
+
+def _to_snapshot_metrics(merged: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    return {
+        name: {**metric, "samples": [[list(labels), value] for labels, value in metric["samples"].items()]}
+        for name, metric in merged.items()
+    }
+
+
+def _load(paths: Iterable[Path]) -> Iterator[dict[str, Any]]:
+    for path in paths:
+        try:
+            yield json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Файл удален при сворачивании или заменен между glob и чтением
+            continue
+
+
+def _is_alive(pid: int | None) -> bool:
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _pool_value(name: str) -> float:
+    """Значение из пула соединений engine; у пулов без очереди (NullPool и т.п.) — 0"""
+    method = getattr(engine.pool, name, None)
+    return max(0, method()) if method else 0
+
+
+# Глобальный реестр и метрики приложения
+metrics_registry = MetricsRegistry(settings.METRICS_MULTIPROCESS_DIR, settings.METRICS_FLUSH_INTERVAL_SECONDS)
+
+http_requests_total = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration_seconds = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency including the response body", ("method", "route")
+)
+http_requests_in_progress = metrics_registry.gauge(
+    "http_requests_in_progress", "HTTP requests currently being processed", ("method",)
+)
+db_pool_checked_out = metrics_registry.gauge(
+    "db_pool_checked_out", "Database connections checked out from the pool", collect=lambda: _pool_value("checkedout")
+)
+db_pool_overflow = metrics_registry.gauge(
+    "db_pool_overflow", "Database connections open above pool_size", collect=lambda: _pool_value("overflow")
+)
+db_pool_size = metrics_registry.gauge(
+    "db_pool_size", "Configured database pool size", collect=lambda: _pool_value("size")
+)
+auth_login_total = metrics_registry.counter(
+    "auth_login_total",
+    "Login attempts by result: success, invalid_credentials, ip_throttled, account_throttled",
+    ("result",),
+)
+db_queries_total = metrics_registry.counter("db_queries_total", "SQL statements executed")
+db_query_duration_seconds = metrics_registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time, cursor execute only"
+)
+db_slow_queries_total = metrics_registry.counter(
+    "db_slow_queries_total", "SQL statements slower than DB_SLOW_QUERY_THRESHOLD_SECONDS"
+)
+db_n_plus_one_total = metrics_registry.counter(
+    "db_n_plus_one_total", "Requests where a statement repeated DB_N_PLUS_ONE_THRESHOLD times (suspected N+1)"
+)
+db_queries_per_request = metrics_registry.histogram(
+    "db_queries_per_request",
+    "SQL statements per HTTP request",
+    buckets=(0.0, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0),
+)
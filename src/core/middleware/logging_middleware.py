@@ -3,89 +3,175 @@
 from __future__ import annotations
 
 import time
-from collections.abc import Callable
 
-from fastapi import FastAPI, Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from src.core.logging_config import get_logger
+from src.core.metrics import db_queries_per_request
+from src.core.request_context import REQUEST_ID_HEADER, request_id_var, request_started_var, resolve_request_id
+from src.core.sql_instrumentation import QueryStats, query_stats_var
 
 HTTP_STATUS_ERROR_THRESHOLD = 400
+SERVER_TIMING_HEADER = "Server-Timing"
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware для логирования HTTP запросов"""
+class LoggingMiddleware:
+    """ASGI middleware для логирования HTTP запросов.
 
-    def __init__(self, app: FastAPI, exclude_paths: list[str] | None = None):
-        super().__init__(app)
-        self.logger = get_logger(self.__class__.__name__)
-        self.exclude_paths = exclude_paths or ["/docs", "/redoc", "/openapi.json", "/health", "/favicon.ico"]
+    Работает на уровне ASGI, без BaseHTTPMiddleware: не создает задач и потоков
+    памяти на запрос и не буферизует потоковые ответы. Назначает запросу id
+    (из X-Request-ID или новый), который попадает в логи, контекст аудита и
+    заголовок ответа. Собирает статистику SQL запроса: число запросов и время в БД
+    попадают в лог, метрики и заголовок Server-Timing.
+    """
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp, exclude_paths: list[str] | None = None) -> None:
+        self.app = app
+        self.logger = get_logger(self.__class__.__name__)
+        self.exclude_paths = frozenset(
+            exclude_paths or ["/docs", "/redoc", "/openapi.json", "/health", "/favicon.ico", "/metrics"]
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_id = resolve_request_id(headers.get(REQUEST_ID_HEADER))
+        token = request_id_var.set(request_id)
+        started_token = request_started_var.set(time.perf_counter())
+        stats = QueryStats()
+        stats_token = query_stats_var.set(stats)
+        try:
+            # Проверяем, нужно ли логировать этот путь
+            if scope["path"] in self.exclude_paths:
+                await self.app(scope, receive, self._with_request_id(send, request_id))
+                return
+            await self._call_logged(scope, receive, send, headers, request_id, stats=stats)
+        finally:
+            query_stats_var.reset(stats_token)
+            request_started_var.reset(started_token)
+            request_id_var.reset(token)
+
+    async def _call_logged(
+        self, scope: Scope, receive: Receive, send: Send, headers: Headers, request_id: str, *, stats: QueryStats
+    ) -> None:
         start_time = time.time()
 
-        # Проверяем, нужно ли логировать этот путь
-        if request.url.path in self.exclude_paths:
-            return await call_next(request)
-
         # Получаем информацию о запросе
-        client_ip = self._get_client_ip(request)
-        user_agent = request.headers.get("user-agent", "unknown")
-        method = request.method
-        path = request.url.path
+        client_ip = self._get_client_ip(scope, headers)
+        user_agent = headers.get("user-agent", "unknown")
+        method = scope["method"]
+        path = scope["path"]
+        response: dict[str, float | int] = {}
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Время до начала ответа, как и прежде при возврате из call_next
+                response["process_time"] = time.time() - start_time
+                response["status_code"] = message["status"]
+                response_headers = MutableHeaders(scope=message)
+                response_headers["X-Process-Time"] = str(response["process_time"])
+                response_headers[REQUEST_ID_HEADER] = request_id
+                response_headers.append(SERVER_TIMING_HEADER, self._server_timing(stats, response["process_time"]))
+            await send(message)
 
         # Логируем начало запроса
-        self.logger.debug(f"Request started - {method} {path} - IP: {client_ip} - User-Agent: {user_agent}")
+        self.logger.debug(
+            "Request started - %(method)s %(path)s - IP: %(client_ip)s - User-Agent: %(user_agent)s",
+            method=method,
+            path=path,
+            client_ip=client_ip,
+            user_agent=user_agent,
+        )
 
         try:
             # Выполняем запрос
-            response = await call_next(request)
-
-            # Вычисляем время выполнения
-            process_time = time.time() - start_time
-
-            # Получаем статус код и информацию об аутентификации
-            status_code = response.status_code
-            user_id = getattr(request.state, "user_id", None)
-
-            # Логируем завершение запроса
-            if status_code >= HTTP_STATUS_ERROR_THRESHOLD:  # HTTP error status codes
-                self.logger.warning(
-                    f"Request completed with error - {method} {path} - "
-                    f"Status: {status_code} - Time: {process_time:.3f}s - "
-                    f"IP: {client_ip} - User: {user_id or 'Anonymous'}"
-                )
-            else:
-                self.logger.info(
-                    f"Request completed - {method} {path} - "
-                    f"Status: {status_code} - Time: {process_time:.3f}s - "
-                    f"IP: {client_ip} - User: {user_id or 'Anonymous'}"
-                )
-
-            # Добавляем заголовок с временем выполнения
-            response.headers["X-Process-Time"] = str(process_time)
-
+            await self.app(scope, receive, send_with_headers)
         except Exception:
             # Логируем ошибки
-            process_time = time.time() - start_time
-            self.logger.exception(f"Request failed - {method} {path} - Time: {process_time:.3f}s - IP: {client_ip}")
+            self.logger.exception(
+                "Request failed - %(method)s %(path)s - Time: %(process_time).3fs - IP: %(client_ip)s",
+                method=method,
+                path=path,
+                process_time=time.time() - start_time,
+                client_ip=client_ip,
+            )
             raise
+        finally:
+            db_queries_per_request.observe(stats.count)
+
+        if "status_code" not in response:
+            return
+
+        # Получаем статус код и информацию об аутентификации
+        status_code = response["status_code"]
+        user_id = scope.get("state", {}).get("user_id")
+
+        # Логируем завершение запроса
+        if status_code >= HTTP_STATUS_ERROR_THRESHOLD:  # HTTP error status codes
+            self.logger.warning(
+                "Request completed with error - %(method)s %(path)s - Status: %(status_code)s - "
+                "Time: %(process_time).3fs - DB: %(db_queries)d queries %(db_time).3fs - "
+                "IP: %(client_ip)s - User: %(user)s",
+                method=method,
+                path=path,
+                status_code=status_code,
+                process_time=response["process_time"],
+                db_queries=stats.count,
+                db_time=stats.duration,
+                client_ip=client_ip,
+                user=user_id or "Anonymous",
+            )
         else:
-            return response
-
-    def _get_client_ip(self, request: Request) -> str:
+            self.logger.info(
+                "Request completed - %(method)s %(path)s - Status: %(status_code)s - "
+                "Time: %(process_time).3fs - DB: %(db_queries)d queries %(db_time).3fs - "
+                "IP: %(client_ip)s - User: %(user)s",
+                method=method,
+                path=path,
+                status_code=status_code,
+                process_time=response["process_time"],
+                db_queries=stats.count,
+                db_time=stats.duration,
+                client_ip=client_ip,
+                user=user_id or "Anonymous",
+            )
+
+    @staticmethod
+    def _server_timing(stats: QueryStats, process_time: float) -> str:
+        """Значение Server-Timing: время в БД с числом запросов и общее время, в миллисекундах"""
+        return f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", app;dur={process_time * 1000:.1f}'
+
+    @staticmethod
+    def _with_request_id(send: Send, request_id: str) -> Send:
+        """Обертка send, добавляющая X-Request-ID в ответ"""
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        return send_with_request_id
+
+    @staticmethod
+    def _get_client_ip(scope: Scope, headers: Headers) -> str:
         """Получить IP адрес клиента"""
         # Проверяем различные источники IP адреса
-        forwarded_for = request.headers.get("X-Forwarded-For")
+        forwarded_for = headers.get("X-Forwarded-For")
         if forwarded_for:
             return forwarded_for.split(",")[0].strip()
 
-        real_ip = request.headers.get("X-Real-IP")
+        real_ip = headers.get("X-Real-IP")
         if real_ip:
             return real_ip
 
-        if request.client and request.client.host:
-            return request.client.host
+        client = scope.get("client")
+        if client and client[0]:
+            return client[0]
 
         return "unknown"
 
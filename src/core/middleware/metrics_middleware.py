@@ -0,0 +1,54 @@
+"""Middleware для метрик HTTP запросов"""
+
+from __future__ import annotations
+
+import time
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.metrics import http_request_duration_seconds, http_requests_in_progress, http_requests_total
+
+# Метка маршрута для запросов, не попавших ни в один маршрут (404): сырой путь
+# в метке дал бы неограниченное число рядов
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: счетчики, гистограмма задержек и число запросов в обработке.
+
+    Маршрут берется как шаблон (/users/{user_id}), который роутер кладет в scope,
+    а не как фактический путь запроса.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start_time = time.perf_counter()
+        # Если приложение упало до начала ответа, ServerErrorMiddleware ответит 500
+        response = {"status_code": 500}
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response["status_code"] = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc(method)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec(method)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            http_requests_total.inc(method, route, str(response["status_code"]))
+            http_request_duration_seconds.observe(time.perf_counter() - start_time, method, route)
+
+
+def setup_metrics_middleware(app: FastAPI) -> None:
+    """Настройка middleware для метрик"""
+    app.add_middleware(MetricsMiddleware)
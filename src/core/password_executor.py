@@ -0,0 +1,140 @@
+"""Выполнение хеширования и проверки паролей вне event loop"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TypeVar
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from src.core.config import settings
+from src.core.exceptions import ServiceUnavailableError
+from src.core.logging_config import get_logger
+
+T = TypeVar("T")
+
+# Хешер создается один раз в каждом процессе пула (или в основном процессе для пула потоков)
+_password_hash: PasswordHash | None = None
+
+
+def build_password_hash(time_cost: int, memory_cost: int, parallelism: int) -> PasswordHash:
+    """Хешер argon2 с заданными параметрами"""
+    return PasswordHash((Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism),))
+
+
+def _get_password_hash() -> PasswordHash:
+    global _password_hash
+    if _password_hash is None:
+        _password_hash = build_password_hash(
+            time_cost=settings.ARGON2_TIME_COST,
+            memory_cost=settings.ARGON2_MEMORY_COST,
+            parallelism=settings.ARGON2_PARALLELISM,
+        )
+    return _password_hash
+
+
+def _hash_password(password: str) -> str:
+    return _get_password_hash().hash(password)
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return _get_password_hash().verify(password, hashed_password)
+
+
+class PasswordExecutor:
+    """Ограниченный пул для argon2.
+
+    По умолчанию используется пул процессов, чтобы хеширование не занимало GIL
+    воркера; пул потоков используется как запасной вариант. Если в очереди уже
+    max_pending задач, новые запросы сразу получают 503 вместо ожидания.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_pending: int) -> None:
+        self._kind = kind
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._logger = get_logger(self.__class__.__name__)
+
+    @property
+    def pending(self) -> int:
+        """Количество задач в работе и в очереди"""
+        return self._pending
+
+    def start(self) -> None:
+        """Создать пул (вызывается при старте приложения)"""
+        if self._executor is not None:
+            return
+
+        if self._kind == "process":
+            try:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, NotImplementedError):
+                self._logger.warning("Process pool is unavailable, falling back to thread pool for password hashing")
+            else:
+                self._logger.info(f"Password executor started: process pool, {self._max_workers} workers")
+                return
+
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="password")
+        self._kind = "thread"
+        self._logger.info(f"Password executor started: thread pool, {self._max_workers} workers")
+
+    def shutdown(self) -> None:
+        """Остановить пул (вызывается при остановке приложения)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        """Хешировать пароль"""
+        return await self._run(_hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Проверить пароль"""
+        return await self._run(_verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Проверить, что argon2 хеш создан с параметрами, отличными от текущих.
+
+        Параметры только разбираются из строки хеша, поэтому проверка выполняется
+        прямо в event loop.
+        """
+        hasher = _get_password_hash().current_hasher
+        return hasher.identify(hashed_password) and hasher.check_needs_rehash(hashed_password)
+
+    async def _run(self, func: Callable[..., T], *args: object) -> T:
+        if self._pending >= self._max_pending:
+            self._logger.warning(f"Password executor saturated ({self._pending} pending), rejecting request")
+            raise ServiceUnavailableError(
+                "Authentication service is busy, try again later", headers={"Retry-After": "1"}
+            )
+
+        self.start()
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        except BrokenProcessPool:
+            # Процесс пула упал (например, OOM) — переходим на пул потоков
+            self._logger.exception("Password process pool is broken, switching to thread pool")
+            self._executor = None
+            self._kind = "thread"
+            self.start()
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+
+
+password_executor = PasswordExecutor(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,104 @@
+"""Самоописывающие claims токена доступа и версии токенов пользователей"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from src.core.config import settings
+
+if TYPE_CHECKING:
+    from src.core.principal_cache import UserSnapshot
+    from src.model.models import User
+
+# Версия набора claims. Токены без claim "cv" или с другой версией считаются устаревшими
+# и проверяются по старой схеме (через загрузку пользователя).
+TOKEN_CLAIMS_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Аутентифицированный пользователь, восстановленный только из токена"""
+
+    id: int
+    email: str | None
+    role: str
+    token_version: int
+
+    @classmethod
+    def from_claims(cls, payload: dict[str, Any]) -> Principal | None:
+        """Восстановить principal из claims, None — если токен старого формата"""
+        if payload.get("cv") != TOKEN_CLAIMS_VERSION:
+            return None
+
+        try:
+            return cls(
+                id=int(payload["uid"]),
+                email=payload.get("sub"),
+                role=str(payload["role"]),
+                token_version=int(payload["tv"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @classmethod
+    def from_snapshot(cls, snapshot: UserSnapshot) -> Principal:
+        """Создать principal из снимка пользователя"""
+        return cls(
+            id=snapshot.id,
+            email=snapshot.email,
+            role=snapshot.role,
+            token_version=snapshot.token_version,
+        )
+
+
+def build_access_claims(user: User) -> dict[str, Any]:
+    """Claims токена доступа: идентичность, роль и версия токенов пользователя"""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": user.role,
+        "tv": user.token_version or 0,
+        "cv": TOKEN_CLAIMS_VERSION,
+    }
+
+
+class TokenVersionCache:
+    """Кэш текущих версий токенов пользователей с TTL.
+
+    Версия увеличивается при смене роли или пароля, и все токены со старой версией
+    перестают приниматься. Кэш процесса сбрасывается сразу, остальные воркеры
+    подхватывают новую версию не позже чем через TTL.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._versions: dict[int, tuple[int, float]] = {}
+
+    def get(self, user_id: int) -> int | None:
+        """Получить закэшированную версию или None"""
+        entry = self._versions.get(user_id)
+        if entry is None:
+            return None
+
+        version, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._versions[user_id]
+            return None
+        return version
+
+    def set(self, user_id: int, version: int) -> None:
+        """Сохранить версию, прочитанную из БД"""
+        self._versions[user_id] = (version, time.monotonic() + self._ttl_seconds)
+
+    def invalidate(self, user_id: int) -> None:
+        """Сбросить версию пользователя (после ее изменения)"""
+        self._versions.pop(user_id, None)
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        self._versions.clear()
+
+
+token_versions = TokenVersionCache(ttl_seconds=settings.TOKEN_VERSION_CACHE_TTL_SECONDS)
@@ -0,0 +1,139 @@
+"""Кэш аутентифицированных пользователей (principal) по токену"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from src.core.config import settings
+
+if TYPE_CHECKING:
+    from src.model.models import User
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """Неизменяемый снимок пользователя, не привязанный к сессии БД"""
+
+    id: int
+    email: str | None
+    first_name: str
+    middle_name: str
+    last_name: str | None
+    isu_number: int | None
+    tg_nickname: str | None
+    role: str
+    token_version: int
+
+    @classmethod
+    def from_user(cls, user: User) -> UserSnapshot:
+        """Создать снимок из ORM объекта"""
+        return cls(
+            id=user.id,
+            email=user.email,
+            first_name=user.first_name,
+            middle_name=user.middle_name,
+            last_name=user.last_name,
+            isu_number=user.isu_number,
+            tg_nickname=user.tg_nickname,
+            role=user.role,
+            token_version=user.token_version or 0,
+        )
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    snapshot: UserSnapshot
+    expires_at: float
+
+
+class PrincipalCache:
+    """Ограниченный LRU кэш с TTL: хэш токена -> снимок пользователя.
+
+    Кэш живет в памяти процесса, поэтому каждый воркер uvicorn держит свою копию.
+    Все операции синхронные и не содержат await, поэтому безопасны в event loop.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+
+    @staticmethod
+    def key_for(token: str) -> str:
+        """Ключ кэша — хэш токена, сам токен в памяти не хранится"""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, key: str) -> UserSnapshot | None:
+        """Получить снимок пользователя, если запись еще не истекла"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry.snapshot
+
+    def put(self, key: str, snapshot: UserSnapshot, token_exp: float | None = None) -> None:
+        """Сохранить снимок пользователя.
+
+        Args:
+            key: Ключ, полученный через key_for
+            snapshot: Снимок пользователя
+            token_exp: Время истечения токена (unix timestamp, claim exp), запись не переживет токен
+        """
+        if self._max_size <= 0:
+            return
+
+        ttl = self._ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = _CacheEntry(snapshot=snapshot, expires_at=time.monotonic() + ttl)
+        self._keys_by_user.setdefault(snapshot.id, set()).add(key)
+
+        while len(self._entries) > self._max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Удалить все записи пользователя (после изменения или удаления)"""
+        for key in self._keys_by_user.pop(user_id, set()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        self._entries.clear()
+        self._keys_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        user_keys = self._keys_by_user.get(entry.snapshot.id)
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[entry.snapshot.id]
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import re
+import time
+import uuid
+from contextvars import ContextVar
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Входящий id принимается только в безопасном виде: он попадает в логи и заголовок ответа
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+request_started_var: ContextVar[float | None] = ContextVar("request_started", default=None)
+
+
+def get_request_id() -> str | None:
+    """Получить id текущего запроса"""
+    return request_id_var.get()
+
+
+def request_elapsed() -> float:
+    """Секунды с начала обработки текущего запроса (0.0 вне запроса)"""
+    started = request_started_var.get()
+    return time.perf_counter() - started if started is not None else 0.0
+
+
+def resolve_request_id(incoming: str | None) -> str:
+    """Id запроса из заголовка клиента или прокси, если он корректен, иначе новый"""
+    if incoming and _REQUEST_ID_PATTERN.fullmatch(incoming):
+        return incoming
+    return uuid.uuid4().hex
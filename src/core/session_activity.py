@@ -0,0 +1,117 @@
+"""Отложенная запись времени последней активности сессий"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, column, update, values
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+from src.core.database import engine
+from src.core.logging_config import get_logger
+from src.model.models import Session
+
+# Сколько сессий обновляется одним UPDATE
+FLUSH_BATCH_SIZE = 1000
+
+
+class SessionActivityBuffer:
+    """Буфер last_activity: session_id -> последнее время активности.
+
+    Запросы только записывают время в память, а фоновая задача раз в flush_interval
+    секунд (или раньше, если накопилось max_pending сессий) сохраняет все значения
+    одним пакетным UPDATE. Значение в БД отстает от реального не больше чем на
+    flush_interval; при остановке приложения буфер сбрасывается.
+    """
+
+    def __init__(self, db_engine: AsyncEngine, flush_interval: float, max_pending: int) -> None:
+        self._engine = db_engine
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._pending: dict[str, datetime] = {}
+        self._task: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+        self._logger = get_logger(self.__class__.__name__)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(self, session_id: str, timestamp: datetime) -> None:
+        """Запомнить активность сессии (хранится только самое позднее время)"""
+        current = self._pending.get(session_id)
+        if current is None or current < timestamp:
+            self._pending[session_id] = timestamp
+
+        if len(self._pending) >= self._max_pending:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        """Запустить фоновую запись (вызывается в lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self) -> None:
+        """Остановить фоновую запись и сохранить накопленное"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Сохранить накопленные значения, вернуть число обновленных сессий"""
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        items = list(pending.items())
+        updated = 0
+        try:
+            async with self._engine.begin() as conn:
+                for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                    result = await conn.execute(_build_update(items[start : start + FLUSH_BATCH_SIZE]))
+                    updated += result.rowcount
+        except Exception:
+            self._logger.exception(f"Failed to flush activity for {len(items)} sessions, will retry")
+            for session_id, timestamp in items:
+                self.record(session_id, timestamp)
+            return 0
+
+        self._logger.debug(f"Flushed activity for {len(items)} sessions ({updated} rows updated)")
+        return updated
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+            self._wakeup.clear()
+            await self.flush()
+
+
+def _build_update(items: list[tuple[str, datetime]]):
+    """UPDATE session ... FROM (VALUES ...) для пачки сессий.
+
+    Более раннее время не перезаписывает более позднее, уже сохраненное другим воркером.
+    """
+    activity = values(
+        column("id", String),
+        column("last_activity", DateTime(timezone=True)),
+        name="activity",
+    ).data(items)
+    table = Session.__table__
+    return (
+        update(table)
+        .where(table.c.id == activity.c.id, table.c.last_activity < activity.c.last_activity)
+        .values(last_activity=activity.c.last_activity)
+    )
+
+
+session_activity_buffer = SessionActivityBuffer(
+    db_engine=engine,
+    flush_interval=settings.SESSION_ACTIVITY_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.SESSION_ACTIVITY_MAX_PENDING,
+)
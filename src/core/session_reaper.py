@@ -0,0 +1,179 @@
+"""Фоновая очистка сессий: деактивация истекших и удаление старых неактивных"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from functools import partial
+
+from sqlalchemy import Delete, Update, delete, func, select, text, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+from src.core.database import engine
+from src.core.logging_config import get_logger
+from src.model.models import Session
+
+# Ключ advisory lock: очистку выполняет только один воркер из всех процессов и хостов
+REAPER_LOCK_KEY = 727_001
+MIN_BATCH_SIZE = 10
+# SQLSTATE query_canceled: пачка прервана по statement_timeout
+QUERY_CANCELED = "57014"
+
+_table = Session.__table__
+
+
+def build_deactivate_batch(after_id: str, batch_size: int) -> Update:
+    """Деактивировать следующую пачку истекших сессий (keyset по id)"""
+    batch = (
+        select(_table.c.id)
+        .where(_table.c.is_active, _table.c.expires_at < func.now(), _table.c.id > after_id)
+        .order_by(_table.c.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("batch")
+    )
+    return (
+        update(_table).where(_table.c.id == batch.c.id).values(is_active=False, is_current=False).returning(_table.c.id)
+    )
+
+
+def build_purge_batch(after_id: str, batch_size: int, cutoff: datetime) -> Delete:
+    """Удалить следующую пачку неактивных сессий старше cutoff (keyset по id)"""
+    batch = (
+        select(_table.c.id)
+        .where(~_table.c.is_active, _table.c.last_activity < cutoff, _table.c.id > after_id)
+        .order_by(_table.c.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("batch")
+    )
+    return delete(_table).where(_table.c.id == batch.c.id).returning(_table.c.id)
+
+
+def _is_query_canceled(error: DBAPIError) -> bool:
+    orig = error.orig
+    return getattr(orig, "sqlstate", None) == QUERY_CANCELED or getattr(orig, "pgcode", None) == QUERY_CANCELED
+
+
+class SessionReaper:
+    """Периодическая очистка таблицы session короткими транзакциями.
+
+    Каждая пачка — отдельная транзакция с statement_timeout, равным бюджету
+    времени пачки. Размер пачки подстраивается: уменьшается вдвое при превышении
+    бюджета и растет обратно, пока пачки укладываются в четверть бюджета.
+    """
+
+    def __init__(
+        self,
+        db_engine: AsyncEngine,
+        interval_seconds: float,
+        batch_size: int,
+        batch_time_budget_ms: int,
+        retention_days: int,
+    ) -> None:
+        self._engine = db_engine
+        self._interval_seconds = interval_seconds
+        self._max_batch_size = batch_size
+        self._batch_size = batch_size
+        self._batch_time_budget_ms = batch_time_budget_ms
+        self._retention = timedelta(days=retention_days)
+        self._task: asyncio.Task | None = None
+        self._logger = get_logger(self.__class__.__name__)
+
+    def start(self) -> None:
+        """Запустить периодическую очистку (вызывается в lifespan)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def shutdown(self) -> None:
+        """Остановить очистку; текущая пачка откатывается"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run_once(self) -> tuple[int, int] | None:
+        """Выполнить один проход.
+
+        Returns:
+            (деактивировано, удалено) или None, если очистку выполняет другой воркер
+        """
+        async with self._engine.connect() as lock_conn:
+            acquired = await lock_conn.scalar(select(func.pg_try_advisory_lock(REAPER_LOCK_KEY)))
+            await lock_conn.commit()
+            if not acquired:
+                self._logger.debug("Session reaper is running in another worker, skipping")
+                return None
+
+            try:
+                deactivated = await self._stream(build_deactivate_batch)
+                cutoff = datetime.now(UTC) - self._retention
+                purged = await self._stream(partial(build_purge_batch, cutoff=cutoff))
+            finally:
+                await lock_conn.execute(select(func.pg_advisory_unlock(REAPER_LOCK_KEY)))
+                await lock_conn.commit()
+
+        if deactivated or purged:
+            self._logger.info(f"Session reaper: {deactivated} expired sessions deactivated, {purged} purged")
+        return deactivated, purged
+
+    async def _stream(self, build_batch: Callable[[str, int], Update | Delete]) -> int:
+        """Обработать все подходящие строки пачками, каждая в своей транзакции"""
+        total = 0
+        after_id = ""
+        while True:
+            started = time.monotonic()
+            try:
+                async with self._engine.begin() as conn:
+                    await conn.execute(text(f"SET LOCAL statement_timeout = {int(self._batch_time_budget_ms)}"))
+                    result = await conn.execute(build_batch(after_id, self._batch_size))
+                    ids = result.scalars().all()
+            except DBAPIError as e:
+                if not _is_query_canceled(e) or self._batch_size <= MIN_BATCH_SIZE:
+                    raise
+                self._batch_size = max(MIN_BATCH_SIZE, self._batch_size // 2)
+                self._logger.warning(f"Session reaper batch exceeded time budget, batch size -> {self._batch_size}")
+                continue
+
+            elapsed_ms = (time.monotonic() - started) * 1000
+            requested = self._batch_size
+            self._adjust_batch_size(elapsed_ms)
+
+            total += len(ids)
+            if len(ids) < requested:
+                return total
+            after_id = max(ids)
+
+            # Отдаем event loop и БД другим запросам между пачками
+            await asyncio.sleep(0)
+
+    def _adjust_batch_size(self, elapsed_ms: float) -> None:
+        if elapsed_ms > self._batch_time_budget_ms:
+            self._batch_size = max(MIN_BATCH_SIZE, self._batch_size // 2)
+        elif elapsed_ms < self._batch_time_budget_ms / 4:
+            self._batch_size = min(self._max_batch_size, self._batch_size * 2)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._logger.exception("Session reaper run failed")
+            await asyncio.sleep(self._interval_seconds)
+
+
+session_reaper = SessionReaper(
+    db_engine=engine,
+    interval_seconds=settings.SESSION_REAPER_INTERVAL_SECONDS,
+    batch_size=settings.SESSION_REAPER_BATCH_SIZE,
+    batch_time_budget_ms=settings.SESSION_REAPER_BATCH_TIME_BUDGET_MS,
+    retention_days=settings.SESSION_REAPER_RETENTION_DAYS,
+)
@@ -0,0 +1,501 @@
+"""Хранилища состояния сессий для проверки и учета активности.
+
+SqlSessionStore читает таблицу session в транзакции запроса и остается
+надежным хранилищем. MemorySessionStore и SocketSessionStore держат снимки
+сессий в памяти (в процессе или в общем для всех воркеров процессе-хосте
+за unix-сокетом) и только при промахе читают закоммиченную строку отдельным
+соединением. Активность записывается в БД асинхронно через
+SessionActivityBuffer, а создание и завершение сессий — в транзакции запроса
+через SessionRepository; измененные сессии забываются хранилищем только
+после коммита этой транзакции (discard_after_commit).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from dataclasses import asdict, dataclass, field, fields, replace
+from datetime import UTC, datetime, timedelta
+from typing import Any, Protocol
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.util import await_only
+
+from src.core.config import Settings, settings
+from src.core.database import engine
+from src.core.logging_config import get_logger
+from src.core.session_activity import SessionActivityBuffer, session_activity_buffer
+from src.model.models import Session
+
+_DATETIME_FIELDS = frozenset({"created_at", "last_activity", "expires_at"})
+# Ключ в Session.info с сессиями и пользователями, которых хранилища забывают после коммита
+DISCARDED_SESSIONS_KEY = "discarded_session_ids"
+
+
+@dataclass(frozen=True, slots=True)
+class SessionSnapshot:
+    """Неизменяемый снимок сессии, не привязанный к сессии БД"""
+
+    id: str
+    user_id: int
+    device_name: str | None = None
+    browser_name: str | None = None
+    browser_version: str | None = None
+    operating_system: str | None = None
+    device_type: str | None = None
+    ip_address: str | None = None
+    country: str | None = None
+    city: str | None = None
+    created_at: datetime | None = None
+    last_activity: datetime | None = None
+    expires_at: datetime | None = None
+    is_active: bool = True
+    is_current: bool = False
+    user_agent: str | None = None
+    fingerprint: str | None = None
+
+    @classmethod
+    def from_session(cls, session: Session) -> SessionSnapshot:
+        """Создать снимок из ORM объекта"""
+        return cls(**{field.name: getattr(session, field.name) for field in fields(cls)})
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> SessionSnapshot:
+        """Создать снимок из строки таблицы или словаря to_dict"""
+        values = {field.name: data.get(field.name) for field in fields(cls)}
+        for name in _DATETIME_FIELDS:
+            if isinstance(values[name], str):
+                values[name] = datetime.fromisoformat(values[name])
+        return cls(**values)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Сериализуемое в JSON представление"""
+        data = asdict(self)
+        for name in _DATETIME_FIELDS:
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return data
+
+    def touched(self, at: datetime) -> SessionSnapshot:
+        """Снимок с обновленным временем активности (более раннее время игнорируется)"""
+        if self.last_activity is not None and self.last_activity >= at:
+            return self
+        return replace(self, last_activity=at)
+
+    def needs_touch(self, at: datetime) -> bool:
+        """Нужно ли записывать активность: записанная старше SESSION_ACTIVITY_STALENESS_SECONDS"""
+        if self.last_activity is None:
+            return True
+        last_activity = self.last_activity
+        if last_activity.tzinfo is None:
+            last_activity = last_activity.replace(tzinfo=UTC)
+        return at - last_activity >= timedelta(seconds=settings.SESSION_ACTIVITY_STALENESS_SECONDS)
+
+
+class SessionStore(Protocol):
+    """Хранилище сессий для горячего пути: проверка сессии и учет активности"""
+
+    async def get(self, session_id: str, db_session: AsyncSession) -> SessionSnapshot | None:
+        """Получить снимок сессии; db_session — сессия БД текущего запроса"""
+        ...
+
+    async def save(self, snapshot: SessionSnapshot) -> None:
+        """Запомнить актуальное состояние сессии"""
+        ...
+
+    async def touch(self, snapshot: SessionSnapshot, at: datetime) -> SessionSnapshot:
+        """Отметить активность сессии, если записанная устарела; возвращает актуальный снимок"""
+        ...
+
+    async def discard(self, session_ids: Iterable[str]) -> None:
+        """Забыть сессии (после изменения их строк в БД)"""
+        ...
+
+    async def discard_user(self, user_id: int) -> None:
+        """Забыть все сессии пользователя"""
+        ...
+
+    async def close(self) -> None:
+        """Освободить ресурсы (вызывается при остановке приложения)"""
+        ...
+
+
+@dataclass(slots=True)
+class PendingDiscards:
+    """Сессии и пользователи, которых хранилище забудет после коммита"""
+
+    session_ids: set[str] = field(default_factory=set)
+    user_ids: set[int] = field(default_factory=set)
+
+
+def discard_after_commit(
+    db_session: AsyncSession | OrmSession,
+    store: SessionStore,
+    session_ids: Iterable[str] = (),
+    user_id: int | None = None,
+) -> None:
+    """Забыть сессии в хранилище, когда транзакция db_session закоммитится.
+
+    Пока транзакция не закоммичена, другие запросы читают прежнюю активную строку
+    и могут снова положить ее в кэш; сброс после коммита гарантирует, что следующий
+    промах прочитает уже завершенную сессию.
+    """
+    pending = db_session.info.setdefault(DISCARDED_SESSIONS_KEY, {}).setdefault(store, PendingDiscards())
+    pending.session_ids.update(session_ids)
+    if user_id is not None:
+        pending.user_ids.add(user_id)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def discard_committed_sessions(session: OrmSession) -> None:
+    """Сбросить в хранилищах сессии, измененные закоммиченной транзакцией"""
+    for store, pending in session.info.pop(DISCARDED_SESSIONS_KEY, {}).items():
+        # after_commit AsyncSession вызывается внутри greenlet: ждем сброса до возврата из commit
+        if pending.session_ids:
+            await_only(store.discard(pending.session_ids))
+        for user_id in pending.user_ids:
+            await_only(store.discard_user(user_id))
+
+
+@event.listens_for(OrmSession, "after_soft_rollback")
+def forget_pending_discards(session: OrmSession, previous_transaction) -> None:
+    """Откаченная транзакция не меняла строк: сбрасывать нечего"""
+    session.info.pop(DISCARDED_SESSIONS_KEY, None)
+
+
+class SqlSessionStore:
+    """Сессии в таблице session: чтение по первичному ключу, активность через буфер.
+
+    Строки создаются и завершаются SessionRepository в транзакции запроса,
+    поэтому save и discard здесь ничего не делают.
+    """
+
+    def __init__(self, db_engine: AsyncEngine, activity_buffer: SessionActivityBuffer) -> None:
+        self._engine = db_engine
+        self._activity_buffer = activity_buffer
+        self._statement = select(Session.__table__)
+
+    async def get(self, session_id: str, db_session: AsyncSession) -> SessionSnapshot | None:
+        """Получить снимок сессии в транзакции запроса, без отдельного соединения"""
+        result = await db_session.execute(self._statement.where(Session.__table__.c.id == session_id))
+        row = result.first()
+        return SessionSnapshot.from_mapping(row._mapping) if row is not None else None
+
+    async def load(self, session_id: str) -> SessionSnapshot | None:
+        """Получить закоммиченный снимок отдельным соединением (для кэшей при промахе).
+
+        Кэш общий для запросов, поэтому в него нельзя класть строку, прочитанную
+        в чужой незакоммиченной транзакции.
+        """
+        async with self._engine.connect() as conn:
+            result = await conn.execute(self._statement.where(Session.__table__.c.id == session_id))
+            row = result.first()
+        return SessionSnapshot.from_mapping(row._mapping) if row is not None else None
+
+    async def save(self, snapshot: SessionSnapshot) -> None:
+        """Строка уже записана репозиторием"""
+
+    async def touch(self, snapshot: SessionSnapshot, at: datetime) -> SessionSnapshot:
+        """Записать активность пакетом в фоне"""
+        if not snapshot.needs_touch(at):
+            return snapshot
+        self._activity_buffer.record(snapshot.id, at)
+        return snapshot.touched(at)
+
+    async def discard(self, session_ids: Iterable[str]) -> None:
+        """Кэша нет"""
+
+    async def discard_user(self, user_id: int) -> None:
+        """Кэша нет"""
+
+    async def close(self) -> None:
+        """Соединения принадлежат общему engine"""
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    snapshot: SessionSnapshot
+    expires_at: float
+
+
+class SessionCache:
+    """Ограниченный LRU кэш снимков сессий с TTL и индексом по пользователю.
+
+    TTL ограничивает время, в течение которого кэш может не видеть изменений,
+    сделанных в обход хранилища (фоновая очистка, другие воркеры для
+    MemorySessionStore).
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._ids_by_user: dict[int, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, session_id: str) -> SessionSnapshot | None:
+        """Получить снимок, если запись еще не истекла"""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(session_id)
+            return None
+        self._entries.move_to_end(session_id)
+        return entry.snapshot
+
+    def put(self, snapshot: SessionSnapshot) -> None:
+        """Сохранить снимок"""
+        self._remove(snapshot.id)
+        self._entries[snapshot.id] = _CacheEntry(snapshot, time.monotonic() + self._ttl_seconds)
+        self._ids_by_user.setdefault(snapshot.user_id, set()).add(snapshot.id)
+        while len(self._entries) > self._max_size:
+            self._remove(next(iter(self._entries)))
+
+    def touch(self, session_id: str, at: datetime) -> None:
+        """Обновить время активности, не продлевая TTL записи"""
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            entry.snapshot = entry.snapshot.touched(at)
+
+    def discard(self, session_ids: Iterable[str]) -> None:
+        """Удалить снимки сессий"""
+        for session_id in session_ids:
+            self._remove(session_id)
+
+    def discard_user(self, user_id: int) -> None:
+        """Удалить снимки всех сессий пользователя"""
+        for session_id in self._ids_by_user.pop(user_id, set()):
+            self._entries.pop(session_id, None)
+
+    def clear(self) -> None:
+        """Очистить кэш"""
+        self._entries.clear()
+        self._ids_by_user.clear()
+
+    def _remove(self, session_id: str) -> None:
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        ids = self._ids_by_user.get(entry.snapshot.user_id)
+        if ids is not None:
+            ids.discard(session_id)
+            if not ids:
+                del self._ids_by_user[entry.snapshot.user_id]
+
+
+class MemorySessionStore:
+    """Кэш сессий в памяти процесса поверх SQL хранилища (для одного воркера)"""
+
+    def __init__(self, sink: SqlSessionStore, max_size: int, ttl_seconds: float) -> None:
+        self._sink = sink
+        self._cache = SessionCache(max_size, ttl_seconds)
+
+    async def get(self, session_id: str, _db_session: AsyncSession) -> SessionSnapshot | None:
+        """Получить снимок из памяти, при промахе — закоммиченный из БД, вне транзакции запроса"""
+        snapshot = self._cache.get(session_id)
+        if snapshot is None:
+            snapshot = await self._sink.load(session_id)
+            if snapshot is not None:
+                self._cache.put(snapshot)
+        return snapshot
+
+    async def save(self, snapshot: SessionSnapshot) -> None:
+        """Запомнить состояние сессии"""
+        self._cache.put(snapshot)
+
+    async def touch(self, snapshot: SessionSnapshot, at: datetime) -> SessionSnapshot:
+        """Обновить активность в памяти и поставить запись в БД в очередь"""
+        if not snapshot.needs_touch(at):
+            return snapshot
+        self._cache.touch(snapshot.id, at)
+        return await self._sink.touch(snapshot, at)
+
+    async def discard(self, session_ids: Iterable[str]) -> None:
+        """Забыть сессии"""
+        self._cache.discard(session_ids)
+
+    async def discard_user(self, user_id: int) -> None:
+        """Забыть все сессии пользователя"""
+        self._cache.discard_user(user_id)
+
+    async def close(self) -> None:
+        """Очистить кэш"""
+        self._cache.clear()
+
+
+class SocketSessionStore:
+    """Кэш сессий, общий для всех воркеров, за локальным unix-сокетом.
+
+    Кэш живет в одном из воркеров: первый воркер, которому не удалось
+    подключиться к сокету, под файловой блокировкой становится хостом и
+    поднимает сервер. Если хост остановился, следующий запрос переизбирает
+    хоста (кэш при этом начинается с нуля). Протокол — JSON по строке на
+    запрос и ответ. При ошибках сокета хранилище работает напрямую с БД.
+    """
+
+    def __init__(self, sink: SqlSessionStore, path: str, max_size: int, ttl_seconds: float) -> None:
+        self._sink = sink
+        self._path = path
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.StreamWriter] = set()
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+        self._logger = get_logger(self.__class__.__name__)
+
+    async def get(self, session_id: str, _db_session: AsyncSession) -> SessionSnapshot | None:
+        """Получить снимок из общего кэша, при промахе — закоммиченный из БД, вне транзакции запроса"""
+        response = await self._call({"op": "get", "id": session_id})
+        if response and response.get("snapshot"):
+            return SessionSnapshot.from_mapping(response["snapshot"])
+
+        snapshot = await self._sink.load(session_id)
+        if snapshot is not None and response is not None:
+            await self._call({"op": "save", "snapshot": snapshot.to_dict()})
+        return snapshot
+
+    async def save(self, snapshot: SessionSnapshot) -> None:
+        """Запомнить состояние сессии"""
+        await self._call({"op": "save", "snapshot": snapshot.to_dict()})
+
+    async def touch(self, snapshot: SessionSnapshot, at: datetime) -> SessionSnapshot:
+        """Обновить активность в общем кэше и поставить запись в БД в очередь"""
+        if not snapshot.needs_touch(at):
+            return snapshot
+        await self._call({"op": "touch", "id": snapshot.id, "at": at.isoformat()})
+        return await self._sink.touch(snapshot, at)
+
+    async def discard(self, session_ids: Iterable[str]) -> None:
+        """Забыть сессии"""
+        await self._call({"op": "discard", "ids": list(session_ids)})
+
+    async def discard_user(self, user_id: int) -> None:
+        """Забыть все сессии пользователя"""
+        await self._call({"op": "discard_user", "user_id": user_id})
+
+    async def close(self) -> None:
+        """Закрыть соединение и, если этот воркер — хост, остановить сервер"""
+        self._disconnect()
+        if self._server is not None:
+            self._server.close()
+            # wait_closed ждет закрытия всех соединений других воркеров
+            for connection in list(self._connections):
+                connection.close()
+            await self._server.wait_closed()
+            self._server = None
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._path)
+
+    async def _call(self, request: dict[str, Any]) -> dict[str, Any] | None:
+        """Выполнить запрос к хосту; None, если общий кэш недоступен"""
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                self._writer.write(json.dumps(request).encode() + b"\n")
+                await self._writer.drain()
+                line = await self._reader.readline()
+                if not line:
+                    raise ConnectionResetError("Session store host closed the connection")
+                return json.loads(line)
+            except (OSError, ValueError) as e:
+                self._logger.warning(f"Shared session store is unavailable, using database: {e}")
+                self._disconnect()
+                return None
+
+    async def _connect(self) -> None:
+        try:
+            self._reader, self._writer = await asyncio.open_unix_connection(self._path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            await self._elect_host()
+            self._reader, self._writer = await asyncio.open_unix_connection(self._path)
+
+    async def _elect_host(self) -> None:
+        """Стать хостом, если под блокировкой к сокету все еще нельзя подключиться"""
+        with open(f"{self._path}.lock", "w") as lock_file:
+            await asyncio.to_thread(fcntl.flock, lock_file, fcntl.LOCK_EX)
+            try:
+                _, writer = await asyncio.open_unix_connection(self._path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                pass
+            else:
+                # Хоста уже выбрал другой воркер
+                writer.close()
+                return
+
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._path)
+            cache = SessionCache(self._max_size, self._ttl_seconds)
+            self._server = await asyncio.start_unix_server(
+                lambda reader, writer: _serve(cache, reader, writer, self._connections), path=self._path
+            )
+            self._logger.info(f"Hosting shared session store at {self._path} in worker {os.getpid()}")
+
+    def _disconnect(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+
+async def _serve(
+    cache: SessionCache,
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    connections: set[asyncio.StreamWriter],
+) -> None:
+    """Обслуживать соединение одного воркера"""
+    connections.add(writer)
+    try:
+        while line := await reader.readline():
+            request = json.loads(line)
+            response: dict[str, Any] = {}
+            match request["op"]:
+                case "get":
+                    snapshot = cache.get(request["id"])
+                    response["snapshot"] = snapshot.to_dict() if snapshot is not None else None
+                case "save":
+                    cache.put(SessionSnapshot.from_mapping(request["snapshot"]))
+                case "touch":
+                    cache.touch(request["id"], datetime.fromisoformat(request["at"]))
+                case "discard":
+                    cache.discard(request["ids"])
+                case "discard_user":
+                    cache.discard_user(request["user_id"])
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+    except (OSError, ValueError, KeyError):
+        pass
+    finally:
+        connections.discard(writer)
+        writer.close()
+
+
+def build_session_store(config: Settings) -> SessionStore:
+    """Создать хранилище по SESSION_STORE_BACKEND: sql, memory или socket"""
+    sink = SqlSessionStore(engine, session_activity_buffer)
+    backend = config.SESSION_STORE_BACKEND
+    if backend == "sql":
+        return sink
+    if backend == "memory":
+        return MemorySessionStore(sink, config.SESSION_STORE_MAX_SIZE, config.SESSION_STORE_TTL_SECONDS)
+    if backend == "socket":
+        return SocketSessionStore(
+            sink, config.SESSION_STORE_SOCKET_PATH, config.SESSION_STORE_MAX_SIZE, config.SESSION_STORE_TTL_SECONDS
+        )
+    raise ValueError(f"Unknown SESSION_STORE_BACKEND: {backend!r}")
+
+
+session_store = build_session_store(settings)
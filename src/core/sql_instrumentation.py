@@ -0,0 +1,125 @@
+"""Инструментирование SQL: статистика запросов на HTTP запрос, медленные запросы и подозрение на N+1"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.core.config import settings
+from src.core.logging_config import get_logger
+from src.core.metrics import db_n_plus_one_total, db_queries_total, db_query_duration_seconds, db_slow_queries_total
+
+logger = get_logger(__name__)
+
+# Ключ в Connection.info со стеком времен начала выполнения курсора
+_QUERY_STARTED_KEY = "query_started"
+# Ограничение длины нормализованного SQL в логах
+_MAX_LOGGED_SQL_LENGTH = 2000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|\$\d+|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|\$\d+|%\(\w+\)s|:\w+))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryStats:
+    """Статистика SQL запросов одного HTTP запроса"""
+
+    __slots__ = ("count", "duration", "statements", "suspected_n_plus_one")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        # Нормализованный SQL -> число выполнений
+        self.statements: Counter[str] = Counter()
+        self.suspected_n_plus_one: list[str] = []
+
+    def record(self, statement: str, duration: float) -> int:
+        """Учесть выполненный запрос; возвращает число его повторов в рамках HTTP запроса"""
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        return self.statements[statement]
+
+
+query_stats_var: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def get_query_stats() -> QueryStats | None:
+    """Получить статистику SQL текущего HTTP запроса"""
+    return query_stats_var.get()
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(statement: str) -> str:
+    """SQL без литералов и с одним плейсхолдером вместо списков IN, в одну строку.
+
+    Запросы, различающиеся только значениями, дают одну строку: по ней считаются
+    повторы и группируются медленные запросы. Результат кэшируется — скомпилированные
+    SQLAlchemy запросы повторяются.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?)", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return normalized[:_MAX_LOGGED_SQL_LENGTH]
+
+
+def _before_cursor_execute(conn, **_kw) -> None:
+    conn.info.setdefault(_QUERY_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, statement, **_kw) -> None:
+    started = conn.info[_QUERY_STARTED_KEY].pop()
+    duration = time.perf_counter() - started
+    db_queries_total.inc()
+    db_query_duration_seconds.observe(duration)
+
+    stats = query_stats_var.get()
+    slow = duration >= settings.DB_SLOW_QUERY_THRESHOLD_SECONDS
+    if stats is None and not slow:
+        return
+
+    normalized = normalize_sql(statement)
+    if slow:
+        db_slow_queries_total.inc()
+        logger.warning("Slow query %(duration).3fs: %(sql)s", duration=duration, sql=normalized)
+    if stats is not None and stats.record(normalized, duration) == settings.DB_N_PLUS_ONE_THRESHOLD:
+        # Сообщаем один раз на запрос, при достижении порога
+        stats.suspected_n_plus_one.append(normalized)
+        db_n_plus_one_total.inc()
+        logger.warning(
+            "Suspected N+1: statement executed %(count)d times in one request: %(sql)s",
+            count=settings.DB_N_PLUS_ONE_THRESHOLD,
+            sql=normalized,
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute не вызывается при ошибке: снимаем время начала, чтобы стек не рос
+    conn = exception_context.connection
+    if conn is not None and exception_context.cursor is not None and conn.info.get(_QUERY_STARTED_KEY):
+        conn.info[_QUERY_STARTED_KEY].pop()
+
+
+def setup_sql_instrumentation(engine: Engine | AsyncEngine) -> None:
+    """Подключить замеры SQL к движку (повторный вызов ничего не меняет)"""
+    sync_engine: Any = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute, named=True)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute, named=True)
+    event.listen(sync_engine, "handle_error", _handle_error)
+    logger.info(
+        "SQL instrumentation enabled: slow query threshold %(threshold).3fs, N+1 threshold %(repeats)d",
+        threshold=settings.DB_SLOW_QUERY_THRESHOLD_SECONDS,
+        repeats=settings.DB_N_PLUS_ONE_THRESHOLD,
+    )
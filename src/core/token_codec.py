@@ -0,0 +1,129 @@
+"""Кодирование и проверка JWT с кэшем уже проверенных токенов"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+import jwt as pyjwt
+from jose import JWTError
+from jose import jwt as jose_jwt
+
+from src.core.config import settings
+
+
+class TokenDecodeError(Exception):
+    """Токен не прошел проверку подписи или срока действия"""
+
+
+class JWTBackend(Protocol):
+    def encode(self, claims: dict[str, Any], key: str, algorithm: str) -> str: ...
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict[str, Any]: ...
+
+
+class JoseBackend:
+    """Бэкенд на python-jose"""
+
+    def encode(self, claims: dict[str, Any], key: str, algorithm: str) -> str:
+        return jose_jwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict[str, Any]:
+        try:
+            return jose_jwt.decode(token, key, algorithms=[algorithm])
+        except JWTError as e:
+            raise TokenDecodeError(str(e)) from e
+
+
+class PyJWTBackend:
+    """Бэкенд на PyJWT"""
+
+    def encode(self, claims: dict[str, Any], key: str, algorithm: str) -> str:
+        return pyjwt.encode(claims, key, algorithm=algorithm)
+
+    def decode(self, token: str, key: str, algorithm: str) -> dict[str, Any]:
+        try:
+            return pyjwt.decode(token, key, algorithms=[algorithm])
+        except pyjwt.PyJWTError as e:
+            raise TokenDecodeError(str(e)) from e
+
+
+JWT_BACKENDS: dict[str, type[JWTBackend]] = {
+    "jose": JoseBackend,
+    "pyjwt": PyJWTBackend,
+}
+
+
+class TokenCodec:
+    """Выпуск и проверка токенов доступа.
+
+    Проверенные claims кэшируются по хэшу токена (ограниченный LRU), запись живет
+    не дольше TTL и не дольше claim exp, поэтому истекший токен снова уходит
+    в полную проверку и отклоняется.
+    """
+
+    def __init__(
+        self,
+        backend: JWTBackend,
+        secret_key: str,
+        algorithm: str,
+        cache_max_size: int,
+        cache_ttl_seconds: float,
+    ) -> None:
+        self._backend = backend
+        self._secret_key = secret_key
+        self._algorithm = algorithm
+        self._cache_max_size = cache_max_size
+        self._cache_ttl_seconds = cache_ttl_seconds
+        self._cache: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        """Подписать claims"""
+        return self._backend.encode(claims, self._secret_key, self._algorithm)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        """Проверить токен и вернуть копию его claims"""
+        key = hashlib.sha256(token.encode()).hexdigest()
+
+        entry = self._cache.get(key)
+        if entry is not None:
+            claims, expires_at = entry
+            if expires_at > time.monotonic():
+                self._cache.move_to_end(key)
+                return dict(claims)
+            del self._cache[key]
+
+        claims = self._backend.decode(token, self._secret_key, self._algorithm)
+        self._remember(key, claims)
+        return dict(claims)
+
+    def clear(self) -> None:
+        """Очистить кэш проверенных токенов"""
+        self._cache.clear()
+
+    def _remember(self, key: str, claims: dict[str, Any]) -> None:
+        if self._cache_max_size <= 0:
+            return
+
+        ttl = self._cache_ttl_seconds
+        exp = claims.get("exp")
+        if isinstance(exp, int | float):
+            ttl = min(ttl, exp - time.time())
+        if ttl <= 0:
+            return
+
+        self._cache[key] = (claims, time.monotonic() + ttl)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_max_size:
+            self._cache.popitem(last=False)
+
+
+token_codec = TokenCodec(
+    backend=JWT_BACKENDS[settings.JWT_BACKEND](),
+    secret_key=settings.SECRET_KEY,
+    algorithm=settings.ALGORITHM,
+    cache_max_size=settings.JWT_DECODE_CACHE_MAX_SIZE,
+    cache_ttl_seconds=settings.JWT_DECODE_CACHE_TTL_SECONDS,
+)
@@ -3,15 +3,20 @@ from __future__ import annotations
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.api.v1.routes import routers as v1_router
 from src.core.audit_listeners import setup_audit_listeners
+from src.core.audit_partitions import audit_partition_manager
 from src.core.config import settings
+from src.core.container import app_container
 from src.core.database import Base, engine
-from src.core.logging_config import get_logger, setup_logging
+from src.core.logging_config import get_logger, setup_logging, shutdown_logging
+from src.core.metrics import CONTENT_TYPE, metrics_registry
 from src.core.middleware.logging_middleware import setup_logging_middleware
+from src.core.middleware.metrics_middleware import setup_metrics_middleware
+from src.core.sql_instrumentation import setup_sql_instrumentation
 
 
 @asynccontextmanager
@@ -27,14 +32,22 @@ async def lifespan(_app: FastAPI):
 
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await audit_partition_manager.prepare(conn)
         logger.info("Database tables created/verified")
 
     setup_audit_listeners()
+    if settings.DB_INSTRUMENTATION_ENABLED:
+        setup_sql_instrumentation(engine)
+    app_container.start()
 
     logger.info("API startup completed successfully")
     yield
 
     logger.info("API shutdown initiated")
+    await app_container.shutdown()
+    logger.info("API shutdown completed")
+    # Дописать записи из очереди логов до выхода процесса
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -48,6 +61,16 @@ app.include_router(v1_router)
 # Настройка middleware для логирования
 setup_logging_middleware(app)
 
+if settings.METRICS_ENABLED:
+    # Внешний слой: время запроса включает логирование
+    setup_metrics_middleware(app)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> Response:
+        """Метрики в текстовом формате Prometheus"""
+        return Response(await metrics_registry.exposition(), media_type=CONTENT_TYPE)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
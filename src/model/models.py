@@ -1,15 +1,28 @@
 from __future__ import annotations
 
 from datetime import date, datetime, time
+from typing import ClassVar
 
-from sqlalchemy import JSON, Date, DateTime, ForeignKey, Integer, String, Time, func
+from sqlalchemy import JSON, Date, DateTime, ForeignKey, Index, Integer, String, Time, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.database import Base
 
 
-class User(Base):
+class Auditable:
+    """Модель, изменения которой записываются в audit_logs (src/core/audit_listeners.py).
+
+    entity_type записи — __tablename__ модели. Колонки из __audit_exclude__ в аудит не попадают.
+    """
+
+    __audit_exclude__: ClassVar[frozenset[str]] = frozenset()
+
+
+class User(Auditable, Base):
     __tablename__ = "user"
+    # Хэш пароля не должен оседать в журнале аудита
+    __audit_exclude__ = frozenset({"password_hashed"})
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
@@ -23,6 +36,8 @@ class User(Base):
 
     password_hashed: Mapped[str] = mapped_column(String, nullable=False)
     role: Mapped[str] = mapped_column(String(20), nullable=False, default="student")
+    # Увеличивается при смене роли или пароля, токены со старой версией отзываются
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     resumes: Mapped[list[Resume]] = relationship(
         back_populates="user",
@@ -49,7 +64,7 @@ class User(Base):
         return f"User(id={self.id!r}, first_name={self.first_name!r}, isu_number={self.isu_number!r})"
 
 
-class Resume(Base):
+class Resume(Auditable, Base):
     __tablename__ = "resume"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -70,7 +85,7 @@ class Resume(Base):
         return f"Resume(id={self.id!r}, author_id={self.author_id!r}, header={self.header!r})"
 
 
-class Project(Base):
+class Project(Auditable, Base):
     __tablename__ = "project"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -99,7 +114,7 @@ class Project(Base):
         return f"Project(id={self.id!r}, author_id={self.author_id!r}, description={self.description!r})"
 
 
-class ProjectParticipation(Base):
+class ProjectParticipation(Auditable, Base):
     __tablename__ = "project_participation"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -114,7 +129,7 @@ class ProjectParticipation(Base):
     )
 
 
-class Response(Base):
+class Response(Auditable, Base):
     __tablename__ = "response"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -134,7 +149,7 @@ class Response(Base):
         return f"Response(id={self.id!r}, respondent_id={self.respondent_id!r}, note={self.note!r})"
 
 
-class Evaluation(Base):
+class Evaluation(Auditable, Base):
     __tablename__ = "evaluation"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -200,17 +215,28 @@ class Session(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # В PostgreSQL таблица разбита на месячные партиции по performed_at, индексы создаются
+    # на каждой партиции (src/core/audit_partitions.py). Индексы заканчиваются на
+    # (performed_at, id) — порядок keyset-пагинации (scripts/migrate_audit_indexes.py)
+    __table_args__ = (
+        Index("ix_audit_logs_user_keyset", "performed_by", "performed_at", "id"),
+        Index("ix_audit_logs_user_entity_keyset", "performed_by", "entity_type", "entity_id", "performed_at", "id"),
+        Index("ix_audit_logs_entity_keyset", "entity_type", "entity_id", "performed_at", "id"),
+    )
 
     id: Mapped[Integer] = mapped_column(Integer, primary_key=True, autoincrement=True)
 
     entity_type: Mapped[str] = mapped_column(String(100), nullable=False)  # user, project, resume, etc
     entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
-    action: Mapped[str] = mapped_column(String(10), nullable=False)  # INSERT, UPDATE
-    old_values: Mapped[dict | None] = mapped_column(JSON, nullable=True)
-    new_values: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    action: Mapped[str] = mapped_column(String(10), nullable=False)  # INSERT, UPDATE, DELETE
+    # Только изменившиеся колонки; JSONB в PostgreSQL (scripts/migrate_audit_payloads.py)
+    old_values: Mapped[dict | None] = mapped_column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    new_values: Mapped[dict | None] = mapped_column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     performed_by: Mapped[int | None] = mapped_column(ForeignKey("user.id"), nullable=True)
     ip_address: Mapped[str | None] = mapped_column(String(45), nullable=True)
     user_agent: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    # X-Request-ID запроса, в котором сделано изменение (scripts/migrate_audit_request_id.py)
+    request_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
     performed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     user: Mapped[User | None] = relationship()
@@ -219,7 +245,7 @@ class AuditLog(Base):
         return f"AuditLog(id={self.id}, entity_type={self.entity_type!r}, entity_id={self.entity_id}, action={self.action!r})"
 
 
-class DefenseProjectType(Base):
+class DefenseProjectType(Auditable, Base):
     __tablename__ = "defense_project_type"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -234,7 +260,7 @@ class DefenseProjectType(Base):
         return f"DefenseProjectType(id={self.id!r}, name={self.name!r})"
 
 
-class DefenseDay(Base):
+class DefenseDay(Auditable, Base):
     __tablename__ = "defense_day"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -260,7 +286,7 @@ class DefenseDay(Base):
         return f"DefenseDay(id={self.id!r}, date={self.date!r}, max_slots={self.max_slots!r})"
 
 
-class DefenseSlot(Base):
+class DefenseSlot(Auditable, Base):
     __tablename__ = "defense_slot"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -294,7 +320,7 @@ class DefenseSlot(Base):
         return f"DefenseSlot(id={self.id!r}, title={self.title!r}, start_at={self.start_at!r})"
 
 
-class DefenseRegistration(Base):
+class DefenseRegistration(Auditable, Base):
     __tablename__ = "defense_registration"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -312,13 +338,12 @@ class DefenseRegistration(Base):
     def __repr__(self) -> str:
         return f"DefenseRegistration(id={self.id!r}, slot_id={self.slot_id!r}, user_id={self.user_id!r})"
 
-class GradingCriteria(Base):
+
+class GradingCriteria(Auditable, Base):
     """Критерии оценивания проектов"""
 
     __tablename__ = "grading_criteria"
-    __table_args__ = (
-        {"comment": "Критерии оценивания для разных типов проектов"},
-    )
+    __table_args__ = ({"comment": "Критерии оценивания для разных типов проектов"},)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_type_id: Mapped[int] = mapped_column(
@@ -327,25 +352,13 @@ class GradingCriteria(Base):
         nullable=False,
         comment="ID типа проекта",
     )
-    name: Mapped[str] = mapped_column(
-        String(100), nullable=False, comment="Название критерия"
-    )
-    description: Mapped[str | None] = mapped_column(
-        String(200), nullable=True, comment="Описание критерия"
-    )
-    max_score: Mapped[int] = mapped_column(
-        Integer, nullable=False, comment="Максимальный балл (1-100)"
-    )
-    weight: Mapped[int] = mapped_column(
-        Integer, nullable=False, default=1, comment="Вес критерия (1-5)"
-    )
-    order_index: Mapped[int] = mapped_column(
-        Integer, nullable=False, default=0, comment="Порядок отображения"
-    )
+    name: Mapped[str] = mapped_column(String(100), nullable=False, comment="Название критерия")
+    description: Mapped[str | None] = mapped_column(String(200), nullable=True, comment="Описание критерия")
+    max_score: Mapped[int] = mapped_column(Integer, nullable=False, comment="Максимальный балл (1-100)")
+    weight: Mapped[int] = mapped_column(Integer, nullable=False, default=1, comment="Вес критерия (1-5)")
+    order_index: Mapped[int] = mapped_column(Integer, nullable=False, default=0, comment="Порядок отображения")
 
-    created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), server_default=func.now(), nullable=False
-    )
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -355,7 +368,5 @@ class GradingCriteria(Base):
 
     def __repr__(self):
         return (
-            f"GradingCriteria(id={self.id!r}, name={self.name!r}, "
-            f"max_score={self.max_score!r}, weight={self.weight!r})"
+            f"GradingCriteria(id={self.id!r}, name={self.name!r}, max_score={self.max_score!r}, weight={self.weight!r})"
         )
-
@@ -1,10 +1,33 @@
 from __future__ import annotations
 
-from sqlalchemy import Sequence, desc, select
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from sqlalchemy import Select, Sequence, desc, select, tuple_
 
 from src.core.logging_config import get_logger
 from src.core.uow import IUnitOfWork
 from src.model.models import AuditLog
+from src.schema.audit import AuditLogFilter
+
+# Строк, которые драйвер забирает с серверного курсора за раз при выгрузке
+STREAM_BATCH_SIZE = 500
+
+
+def build_user_logs_query(user_id: int, filters: AuditLogFilter) -> Select[tuple[AuditLog]]:
+    """Логи пользователя с фильтрами, от новых к старым по (performed_at, id)"""
+    query = select(AuditLog).where(AuditLog.performed_by == user_id)
+    if filters.entity_type is not None:
+        query = query.where(AuditLog.entity_type == filters.entity_type)
+    if filters.entity_id is not None:
+        query = query.where(AuditLog.entity_id == filters.entity_id)
+    if filters.action is not None:
+        query = query.where(AuditLog.action == filters.action)
+    if filters.performed_from is not None:
+        query = query.where(AuditLog.performed_at >= filters.performed_from)
+    if filters.performed_to is not None:
+        query = query.where(AuditLog.performed_at < filters.performed_to)
+    return query.order_by(desc(AuditLog.performed_at), desc(AuditLog.id))
 
 
 class AuditRepository:
@@ -14,18 +37,60 @@ class AuditRepository:
         self.uow = uow
         self._logger = get_logger(self.__class__.__name__)
 
-        # в будущем можно будет добавить больше фильтров
+    async def get_logs_page(
+        self,
+        user_id: int,
+        filters: AuditLogFilter,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+    ) -> Sequence[AuditLog]:
+        """Получить до limit логов пользователя после позиции after = (performed_at, id)
+
+        Keyset-пагинация: страница читается по индексу с позиции курсора, без OFFSET
+        """
 
-    async def get_logs_by_user_id(self, user_id: int) -> Sequence[AuditLog]:
-        """Получить все логи пользователя, отсортированные по дате"""
+        query = build_user_logs_query(user_id, filters)
+        if after is not None:
+            query = query.where(tuple_(AuditLog.performed_at, AuditLog.id) < tuple_(*after))
+
+        try:
+            result = await self.uow.session.execute(query.limit(limit))
+            logs = result.scalars().all()
+        except Exception:
+            self._logger.exception("Error getting audit logs for user %(user_id)s", user_id=user_id)
+            raise
+        else:
+            return logs
+
+    async def stream_logs(self, user_id: int, filters: AuditLogFilter) -> AsyncIterator[Sequence[AuditLog]]:
+        """Отдавать логи пользователя пачками с серверного курсора, не загружая выборку целиком"""
+
+        query = build_user_logs_query(user_id, filters).execution_options(yield_per=STREAM_BATCH_SIZE)
+        try:
+            result = await self.uow.session.stream_scalars(query)
+            async for logs in result.partitions():
+                # identity map держит объекты слабыми ссылками: отданные пачки освобождаются
+                yield logs
+        except Exception:
+            self._logger.exception("Error streaming audit logs for user %(user_id)s", user_id=user_id)
+            raise
+
+    async def get_logs_by_entity(self, entity_type: str, entity_id: int) -> Sequence[AuditLog]:
+        """Получить логи сущности из БД (без архива), отсортированные по дате"""
 
         try:
             result = await self.uow.session.execute(
-                select(AuditLog).where(AuditLog.performed_by == user_id).order_by(desc(AuditLog.performed_at))
+                select(AuditLog)
+                .where(AuditLog.entity_type == entity_type, AuditLog.entity_id == entity_id)
+                .order_by(desc(AuditLog.performed_at))
             )
             logs = result.scalars().all()
         except Exception:
-            self._logger.exception(f"Error getting audit logs for user {user_id}")
+            self._logger.exception(
+                "Error getting audit logs for %(entity_type)s %(entity_id)s",
+                entity_type=entity_type,
+                entity_id=entity_id,
+            )
             raise
         else:
             return logs
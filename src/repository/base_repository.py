@@ -71,20 +71,35 @@ class BaseRepository(RepositoryProtocol[ModelType_co, CreateType_contra, UpdateT
         Note:
             Метод логирует время выполнения операции и результат поиска
         """
-        start_time = time.time()
-        self._logger.debug(f"Getting {self._model.__name__} by ID: {id}")
+        start_time = time.perf_counter()
+        self._logger.debug("Getting %(model)s by ID: %(id)s", model=self._model.__name__, id=id)
 
         try:
             result = await self.uow.session.get(self._model, id)
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
 
             if result:
-                self._logger.info(f"Successfully retrieved {self._model.__name__} with ID {id} in {duration:.3f}s")
+                self._logger.info(
+                    "Successfully retrieved %(model)s with ID %(id)s in %(duration).3fs",
+                    model=self._model.__name__,
+                    id=id,
+                    duration=duration,
+                )
             else:
-                self._logger.warning(f"{self._model.__name__} with ID {id} not found in {duration:.3f}s")
+                self._logger.warning(
+                    "%(model)s with ID %(id)s not found in %(duration).3fs",
+                    model=self._model.__name__,
+                    id=id,
+                    duration=duration,
+                )
         except Exception:
-            duration = time.time() - start_time
-            self._logger.exception(f"Error getting {self._model.__name__} by ID {id} in {duration:.3f}s")
+            duration = time.perf_counter() - start_time
+            self._logger.exception(
+                "Error getting %(model)s by ID %(id)s in %(duration).3fs",
+                model=self._model.__name__,
+                id=id,
+                duration=duration,
+            )
             raise
         else:
             return result
@@ -108,20 +123,32 @@ class BaseRepository(RepositoryProtocol[ModelType_co, CreateType_contra, UpdateT
         Note:
             Метод логирует количество извлеченных объектов и время выполнения
         """
-        start_time = time.time()
-        self._logger.debug(f"Getting {self._model.__name__} list - skip: {skip}, limit: {limit}")
+        start_time = time.perf_counter()
+        self._logger.debug(
+            "Getting %(model)s list - skip: %(skip)s, limit: %(limit)s",
+            model=self._model.__name__,
+            skip=skip,
+            limit=limit,
+        )
 
         try:
             result = await self.uow.session.execute(
                 select(self._model).offset(skip).limit(limit)  # type: ignore[arg-type]
             )
             objects = list(result.scalars().all())
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
 
-            self._logger.info(f"Retrieved {len(objects)} {self._model.__name__} objects in {duration:.3f}s")
+            self._logger.info(
+                "Retrieved %(count)d %(model)s objects in %(duration).3fs",
+                count=len(objects),
+                model=self._model.__name__,
+                duration=duration,
+            )
         except Exception:
-            duration = time.time() - start_time
-            self._logger.exception(f"Error getting {self._model.__name__} list in {duration:.3f}s")
+            duration = time.perf_counter() - start_time
+            self._logger.exception(
+                "Error getting %(model)s list in %(duration).3fs", model=self._model.__name__, duration=duration
+            )
             raise
         else:
             return objects
@@ -141,20 +168,27 @@ class BaseRepository(RepositoryProtocol[ModelType_co, CreateType_contra, UpdateT
         Note:
             Метод логирует подсчитанное количество и время выполнения
         """
-        start_time = time.time()
-        self._logger.debug(f"Counting {self._model.__name__} objects")
+        start_time = time.perf_counter()
+        self._logger.debug("Counting %(model)s objects", model=self._model.__name__)
 
         try:
             result = await self.uow.session.execute(
                 select(func.count()).select_from(self._model)  # type: ignore[arg-type]
             )
             count = result.scalar_one()
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
 
-            self._logger.info(f"Counted {count} {self._model.__name__} objects in {duration:.3f}s")
+            self._logger.info(
+                "Counted %(count)d %(model)s objects in %(duration).3fs",
+                count=count,
+                model=self._model.__name__,
+                duration=duration,
+            )
         except Exception:
-            duration = time.time() - start_time
-            self._logger.exception(f"Error counting {self._model.__name__} objects in {duration:.3f}s")
+            duration = time.perf_counter() - start_time
+            self._logger.exception(
+                "Error counting %(model)s objects in %(duration).3fs", model=self._model.__name__, duration=duration
+            )
             raise
         else:
             return count
@@ -179,7 +213,7 @@ class BaseRepository(RepositoryProtocol[ModelType_co, CreateType_contra, UpdateT
             Метод автоматически извлекает данные из Pydantic модели
             или использует словарь напрямую
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
             data = obj_data.model_dump(exclude_unset=True) if hasattr(obj_data, "model_dump") else obj_data
@@ -187,11 +221,18 @@ class BaseRepository(RepositoryProtocol[ModelType_co, CreateType_contra, UpdateT
             self.uow.session.add(db_obj)
             await self.uow.session.flush()
 
-            duration = time.time() - start_time
-            self._logger.info(f"Created {self._model.__name__} with ID {db_obj.id} in {duration:.3f}s")
+            duration = time.perf_counter() - start_time
+            self._logger.info(
+                "Created %(model)s with ID %(id)s in %(duration).3fs",
+                model=self._model.__name__,
+                id=db_obj.id,
+                duration=duration,
+            )
         except Exception:
-            duration = time.time() - start_time
-            self._logger.exception(f"Error creating {self._model.__name__} in {duration:.3f}s")
+            duration = time.perf_counter() - start_time
+            self._logger.exception(
+                "Error creating %(model)s in %(duration).3fs", model=self._model.__name__, duration=duration
+            )
             raise
         else:
             return db_obj
@@ -216,14 +257,19 @@ class BaseRepository(RepositoryProtocol[ModelType_co, CreateType_contra, UpdateT
             - Обновляются только поля, присутствующие в obj_data
             - Метод логирует список обновленных полей
         """
-        start_time = time.time()
-        self._logger.info(f"Updating {self._model.__name__} with ID {id}")
+        start_time = time.perf_counter()
+        self._logger.info("Updating %(model)s with ID %(id)s", model=self._model.__name__, id=id)
 
         try:
             db_obj = await self.get_by_id(id)
             if not db_obj:
-                duration = time.time() - start_time
-                self._logger.warning(f"{self._model.__name__} with ID {id} not found for update in {duration:.3f}s")
+                duration = time.perf_counter() - start_time
+                self._logger.warning(
+                    "%(model)s with ID %(id)s not found for update in %(duration).3fs",
+                    model=self._model.__name__,
+                    id=id,
+                    duration=duration,
+                )
                 return None
 
             data: dict[str, Any] = (
@@ -234,13 +280,22 @@ class BaseRepository(RepositoryProtocol[ModelType_co, CreateType_contra, UpdateT
             for field, value in data.items():
                 setattr(db_obj, field, value)
 
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
             self._logger.info(
-                f"Updated {self._model.__name__} with ID {id} - fields: {updated_fields} in {duration:.3f}s"
+                "Updated %(model)s with ID %(id)s - fields: %(updated_fields)s in %(duration).3fs",
+                model=self._model.__name__,
+                id=id,
+                updated_fields=updated_fields,
+                duration=duration,
             )
         except Exception:
-            duration = time.time() - start_time
-            self._logger.exception(f"Error updating {self._model.__name__} with ID {id} in {duration:.3f}s")
+            duration = time.perf_counter() - start_time
+            self._logger.exception(
+                "Error updating %(model)s with ID %(id)s in %(duration).3fs",
+                model=self._model.__name__,
+                id=id,
+                duration=duration,
+            )
             raise
         else:
             return db_obj
@@ -259,23 +314,38 @@ class BaseRepository(RepositoryProtocol[ModelType_co, CreateType_contra, UpdateT
         Raises:
             Exception: При ошибке удаления объекта
         """
-        start_time = time.time()
-        self._logger.info(f"Deleting {self._model.__name__} with ID {id}")
+        start_time = time.perf_counter()
+        self._logger.info("Deleting %(model)s with ID %(id)s", model=self._model.__name__, id=id)
 
         try:
             db_obj = await self.get_by_id(id)
             if not db_obj:
-                duration = time.time() - start_time
-                self._logger.warning(f"{self._model.__name__} with ID {id} not found for deletion in {duration:.3f}s")
+                duration = time.perf_counter() - start_time
+                self._logger.warning(
+                    "%(model)s with ID %(id)s not found for deletion in %(duration).3fs",
+                    model=self._model.__name__,
+                    id=id,
+                    duration=duration,
+                )
                 return False
 
             await self.uow.session.delete(db_obj)
-            duration = time.time() - start_time
+            duration = time.perf_counter() - start_time
 
-            self._logger.info(f"Deleted {self._model.__name__} with ID {id} in {duration:.3f}s")
+            self._logger.info(
+                "Deleted %(model)s with ID %(id)s in %(duration).3fs",
+                model=self._model.__name__,
+                id=id,
+                duration=duration,
+            )
         except Exception:
-            duration = time.time() - start_time
-            self._logger.exception(f"Error deleting {self._model.__name__} with ID {id} in {duration:.3f}s")
+            duration = time.perf_counter() - start_time
+            self._logger.exception(
+                "Error deleting %(model)s with ID %(id)s in %(duration).3fs",
+                model=self._model.__name__,
+                id=id,
+                duration=duration,
+            )
             raise
         else:
             return True
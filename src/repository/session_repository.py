@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import uuid
 from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import ColumnElement, and_, case, func, or_, select, update
 
 from src.core.logging_config import get_logger
 from src.core.uow import IUnitOfWork
@@ -12,6 +13,20 @@ from src.model.models import Session
 from src.schema.session import SessionCreate, SessionUpdate
 
 
+@dataclass(frozen=True, slots=True)
+class SessionDashboard:
+    """Сводка по сессиям пользователя, полученная одним запросом"""
+
+    total_sessions: int
+    active_sessions: int
+    sessions: Sequence[Session]
+
+    @property
+    def current_session(self) -> Session | None:
+        """Текущая активная сессия"""
+        return next((session for session in self.sessions if session.is_current), None)
+
+
 class SessionRepository:
     """Репозиторий для работы с сессиями пользователей"""
 
@@ -21,23 +36,23 @@ class SessionRepository:
 
     async def get_by_id(self, session_id: str) -> Session | None:
         """Получить сессию по ID"""
-        self._logger.debug(f"Getting session by ID: {session_id}")
+        self._logger.debug("Getting session by ID: %(session_id)s", session_id=session_id)
 
         try:
             result = await self.uow.session.get(Session, session_id)
         except Exception:
-            self._logger.exception(f"Error getting session {session_id}")
+            self._logger.exception("Error getting session %(session_id)s", session_id=session_id)
             raise
         else:
             if result:
-                self._logger.info(f"Retrieved session {session_id}")
+                self._logger.info("Retrieved session %(session_id)s", session_id=session_id)
             else:
-                self._logger.warning(f"Session {session_id} not found")
+                self._logger.warning("Session %(session_id)s not found", session_id=session_id)
             return result
 
     async def get_by_user_id(self, user_id: int) -> Sequence[Session]:
         """Получить все сессии пользователя"""
-        self._logger.debug(f"Getting sessions for user {user_id}")
+        self._logger.debug("Getting sessions for user %(user_id)s", user_id=user_id)
 
         try:
             result = await self.uow.session.execute(
@@ -45,15 +60,15 @@ class SessionRepository:
             )
             sessions = result.scalars().all()
         except Exception:
-            self._logger.exception(f"Error getting sessions for user {user_id}")
+            self._logger.exception("Error getting sessions for user %(user_id)s", user_id=user_id)
             raise
         else:
-            self._logger.info(f"Retrieved {len(sessions)} sessions for user {user_id}")
+            self._logger.info("Retrieved %(count)d sessions for user %(user_id)s", count=len(sessions), user_id=user_id)
             return sessions
 
     async def get_active_sessions_by_user_id(self, user_id: int) -> Sequence[Session]:
         """Получить активные сессии пользователя"""
-        self._logger.debug(f"Getting active sessions for user {user_id}")
+        self._logger.debug("Getting active sessions for user %(user_id)s", user_id=user_id)
 
         try:
             result = await self.uow.session.execute(
@@ -63,15 +78,17 @@ class SessionRepository:
             )
             sessions = result.scalars().all()
         except Exception:
-            self._logger.exception(f"Error getting active sessions for user {user_id}")
+            self._logger.exception("Error getting active sessions for user %(user_id)s", user_id=user_id)
             raise
         else:
-            self._logger.info(f"Retrieved {len(sessions)} active sessions for user {user_id}")
+            self._logger.info(
+                "Retrieved %(count)d active sessions for user %(user_id)s", count=len(sessions), user_id=user_id
+            )
             return sessions
 
     async def get_current_session(self, user_id: int) -> Session | None:
         """Получить текущую сессию пользователя"""
-        self._logger.debug(f"Getting current session for user {user_id}")
+        self._logger.debug("Getting current session for user %(user_id)s", user_id=user_id)
 
         try:
             result = await self.uow.session.execute(
@@ -79,18 +96,58 @@ class SessionRepository:
             )
             session = result.scalar_one_or_none()
         except Exception:
-            self._logger.exception(f"Error getting current session for user {user_id}")
+            self._logger.exception("Error getting current session for user %(user_id)s", user_id=user_id)
             raise
         else:
             if session:
-                self._logger.info(f"Found current session for user {user_id}: {session.id}")
+                self._logger.info(
+                    "Found current session for user %(user_id)s: %(session_id)s", user_id=user_id, session_id=session.id
+                )
             else:
-                self._logger.warning(f"No current session found for user {user_id}")
+                self._logger.warning("No current session found for user %(user_id)s", user_id=user_id)
             return session
 
+    async def get_dashboard(self, user_id: int) -> SessionDashboard:
+        """Получить счетчики и активные сессии пользователя одним запросом"""
+        self._logger.debug("Getting sessions dashboard for user %(user_id)s", user_id=user_id)
+
+        counts = (
+            select(
+                func.count().label("total"),
+                func.count().filter(Session.is_active).label("active"),
+            )
+            .where(Session.user_id == user_id)
+            .subquery("counts")
+        )
+        try:
+            # LEFT JOIN возвращает строку со счетчиками, даже если активных сессий нет
+            result = await self.uow.session.execute(
+                select(Session, counts.c.total, counts.c.active)
+                .select_from(counts)
+                .outerjoin(Session, and_(Session.user_id == user_id, Session.is_active))
+                .order_by(Session.last_activity.desc())
+            )
+            rows = result.all()
+        except Exception:
+            self._logger.exception("Error getting sessions dashboard for user %(user_id)s", user_id=user_id)
+            raise
+        else:
+            dashboard = SessionDashboard(
+                total_sessions=rows[0].total,
+                active_sessions=rows[0].active,
+                sessions=[row.Session for row in rows if row.Session is not None],
+            )
+            self._logger.info(
+                "User %(user_id)s has %(total_sessions)d sessions, %(active_sessions)d active",
+                user_id=user_id,
+                total_sessions=dashboard.total_sessions,
+                active_sessions=dashboard.active_sessions,
+            )
+            return dashboard
+
     async def create(self, session_data: SessionCreate) -> Session:
         """Создать новую сессию"""
-        self._logger.debug(f"Creating session for user {session_data.user_id}")
+        self._logger.debug("Creating session for user %(user_id)s", user_id=session_data.user_id)
 
         try:
             # Генерируем уникальный ID для сессии
@@ -108,25 +165,29 @@ class SessionRepository:
             self.uow.session.add(db_session)
             await self.uow.session.flush()
         except Exception:
-            self._logger.exception(f"Error creating session for user {session_data.user_id}")
+            self._logger.exception("Error creating session for user %(user_id)s", user_id=session_data.user_id)
             raise
         else:
-            self._logger.info(f"Created session {session_id} for user {session_data.user_id}")
+            self._logger.info(
+                "Created session %(session_id)s for user %(user_id)s",
+                session_id=session_id,
+                user_id=session_data.user_id,
+            )
             return db_session
 
     async def update(self, session_id: str, session_data: SessionUpdate) -> Session | None:
         """Обновить сессию"""
-        self._logger.debug(f"Updating session {session_id}")
+        self._logger.debug("Updating session %(session_id)s", session_id=session_id)
 
         def _check_session_exists() -> None:
             if not db_session:
-                self._logger.warning(f"Session {session_id} not found for update")
+                self._logger.warning("Session %(session_id)s not found for update", session_id=session_id)
 
         try:
             db_session = await self.get_by_id(session_id)
             _check_session_exists()
         except Exception:
-            self._logger.exception(f"Error updating session {session_id}")
+            self._logger.exception("Error updating session %(session_id)s", session_id=session_id)
             raise
         else:
             update_data = session_data.model_dump(exclude_unset=True)
@@ -135,136 +196,128 @@ class SessionRepository:
             for field, value in update_data.items():
                 setattr(db_session, field, value)
 
-            self._logger.info(f"Updated session {session_id} - fields: {updated_fields}")
-            return db_session
-
-    async def update_last_activity(self, session_id: str) -> Session | None:
-        """Обновить время последней активности сессии"""
-        self._logger.debug(f"Updating last activity for session {session_id}")
-
-        def _check_session_exists() -> None:
-            if not db_session:
-                self._logger.warning(f"Session {session_id} not found for activity update")
-
-        try:
-            db_session = await self.get_by_id(session_id)
-            _check_session_exists()
-        except Exception:
-            self._logger.exception(f"Error updating last activity for session {session_id}")
-            raise
-        else:
-            db_session.last_activity = datetime.utcnow()
-            self._logger.debug(f"Updated last activity for session {session_id}")
+            self._logger.info(
+                "Updated session %(session_id)s - fields: %(updated_fields)s",
+                session_id=session_id,
+                updated_fields=updated_fields,
+            )
             return db_session
 
     async def set_current_session(self, user_id: int, session_id: str) -> bool:
         """Установить сессию как текущую для пользователя"""
-        self._logger.debug(f"Setting session {session_id} as current for user {user_id}")
+        self._logger.debug(
+            "Setting session %(session_id)s as current for user %(user_id)s", session_id=session_id, user_id=user_id
+        )
 
+        is_target = Session.id == session_id
         try:
-            # Сначала сбрасываем флаг is_current для всех сессий пользователя
-            await self.uow.session.execute(select(Session).where(Session.user_id == user_id))
-            sessions = await self.get_by_user_id(user_id)
-
-            for session in sessions:
-                session.is_current = False
-
-            # Устанавливаем текущую сессию
-            current_session = await self.get_by_id(session_id)
-            if current_session and current_session.user_id == user_id:
-                current_session.is_current = True
-                current_session.last_activity = datetime.utcnow()
-                self._logger.info(f"Set session {session_id} as current for user {user_id}")
-                return True
-            else:
-                self._logger.warning(f"Session {session_id} not found or doesn't belong to user {user_id}")
-                return False
+            # Одним UPDATE снимаем флаг с прежней текущей сессии и ставим его указанной
+            result = await self.uow.session.execute(
+                update(Session)
+                .where(Session.user_id == user_id, or_(Session.is_current, is_target))
+                .values(
+                    is_current=is_target,
+                    last_activity=case((is_target, func.now()), else_=Session.last_activity),
+                )
+                .returning(Session.id, Session.is_current)
+            )
+            rows = result.all()
         except Exception:
-            self._logger.exception(f"Error setting current session for user {user_id}")
+            self._logger.exception("Error setting current session for user %(user_id)s", user_id=user_id)
             raise
+        else:
+            if any(row.id == session_id and row.is_current for row in rows):
+                self._logger.info(
+                    "Set session %(session_id)s as current for user %(user_id)s", session_id=session_id, user_id=user_id
+                )
+                return True
+
+            self._logger.warning(
+                "Session %(session_id)s not found or doesn't belong to user %(user_id)s",
+                session_id=session_id,
+                user_id=user_id,
+            )
+            return False
 
     async def terminate_session(self, session_id: str) -> bool:
         """Завершить сессию"""
-        self._logger.debug(f"Terminating session {session_id}")
+        self._logger.debug("Terminating session %(session_id)s", session_id=session_id)
 
         try:
-            db_session = await self.get_by_id(session_id)
+            terminated = await self._terminate(Session.id == session_id)
         except Exception:
-            self._logger.exception(f"Error terminating session {session_id}")
+            self._logger.exception("Error terminating session %(session_id)s", session_id=session_id)
             raise
         else:
-            if not db_session:
-                self._logger.warning(f"Session {session_id} not found for termination")
+            if not terminated:
+                self._logger.warning("Session %(session_id)s not found for termination", session_id=session_id)
                 return False
 
-            db_session.is_active = False
-            db_session.is_current = False
-            self._logger.info(f"Terminated session {session_id}")
+            self._logger.info("Terminated session %(session_id)s", session_id=session_id)
             return True
 
     async def terminate_sessions(self, session_ids: list[str]) -> list[str]:
         """Завершить несколько сессий"""
-        self._logger.debug(f"Terminating {len(session_ids)} sessions")
+        self._logger.debug("Terminating %(count)d sessions", count=len(session_ids))
+
+        if not session_ids:
+            return []
 
-        terminated_sessions = []
         try:
-            for session_id in session_ids:
-                if await self.terminate_session(session_id):
-                    terminated_sessions.append(session_id)
+            terminated = set(await self._terminate(Session.id.in_(session_ids)))
         except Exception:
             self._logger.exception("Error terminating sessions")
             raise
         else:
-            self._logger.info(f"Terminated {len(terminated_sessions)} sessions")
+            # Порядок ответа совпадает с порядком запрошенных ID
+            terminated_sessions = [session_id for session_id in session_ids if session_id in terminated]
+            self._logger.info("Terminated %(count)d sessions", count=len(terminated_sessions))
             return terminated_sessions
 
     async def terminate_all_sessions_except(self, user_id: int, except_session_id: str) -> int:
         """Завершить все сессии пользователя кроме указанной"""
-        self._logger.debug(f"Terminating all sessions for user {user_id} except {except_session_id}")
+        self._logger.debug(
+            "Terminating all sessions for user %(user_id)s except %(except_session_id)s",
+            user_id=user_id,
+            except_session_id=except_session_id,
+        )
 
         try:
-            result = await self.uow.session.execute(
-                select(Session).where(
-                    and_(Session.user_id == user_id, Session.id != except_session_id, Session.is_active)
-                )
+            terminated = await self._terminate(
+                Session.user_id == user_id, Session.id != except_session_id, Session.is_active
             )
-            sessions_to_terminate = result.scalars().all()
-
-            terminated_count = 0
-            for session in sessions_to_terminate:
-                session.is_active = False
-                session.is_current = False
-                terminated_count += 1
         except Exception:
-            self._logger.exception(f"Error terminating sessions for user {user_id}")
+            self._logger.exception("Error terminating sessions for user %(user_id)s", user_id=user_id)
             raise
         else:
-            self._logger.info(f"Terminated {terminated_count} sessions for user {user_id}")
-            return terminated_count
+            self._logger.info(
+                "Terminated %(count)d sessions for user %(user_id)s", count=len(terminated), user_id=user_id
+            )
+            return len(terminated)
 
     async def cleanup_expired_sessions(self) -> int:
         """Очистить истекшие сессии"""
         self._logger.debug("Cleaning up expired sessions")
 
         try:
-            result = await self.uow.session.execute(
-                select(Session).where(and_(Session.expires_at < datetime.utcnow(), Session.is_active))
-            )
-            expired_sessions = result.scalars().all()
-
-            for session in expired_sessions:
-                session.is_active = False
-                session.is_current = False
+            expired = await self._terminate(Session.expires_at < func.now(), Session.is_active)
         except Exception:
             self._logger.exception("Error cleaning up expired sessions")
             raise
         else:
-            self._logger.info(f"Cleaned up {len(expired_sessions)} expired sessions")
-            return len(expired_sessions)
+            self._logger.info("Cleaned up %(count)d expired sessions", count=len(expired))
+            return len(expired)
+
+    async def _terminate(self, *criteria: ColumnElement[bool]) -> Sequence[str]:
+        """Завершить сессии по условию одним UPDATE ... RETURNING и вернуть их ID"""
+        result = await self.uow.session.execute(
+            update(Session).where(*criteria).values(is_active=False, is_current=False).returning(Session.id)
+        )
+        return result.scalars().all()
 
     async def count_user_sessions(self, user_id: int) -> int:
         """Подсчитать количество сессий пользователя"""
-        self._logger.debug(f"Counting sessions for user {user_id}")
+        self._logger.debug("Counting sessions for user %(user_id)s", user_id=user_id)
 
         try:
             result = await self.uow.session.execute(
@@ -272,15 +325,15 @@ class SessionRepository:
             )
             count = result.scalar_one()
         except Exception:
-            self._logger.exception(f"Error counting sessions for user {user_id}")
+            self._logger.exception("Error counting sessions for user %(user_id)s", user_id=user_id)
             raise
         else:
-            self._logger.info(f"User {user_id} has {count} sessions")
+            self._logger.info("User %(user_id)s has %(count)d sessions", user_id=user_id, count=count)
             return count
 
     async def count_active_user_sessions(self, user_id: int) -> int:
         """Подсчитать количество активных сессий пользователя"""
-        self._logger.debug(f"Counting active sessions for user {user_id}")
+        self._logger.debug("Counting active sessions for user %(user_id)s", user_id=user_id)
 
         try:
             result = await self.uow.session.execute(
@@ -288,8 +341,8 @@ class SessionRepository:
             )
             count = result.scalar_one()
         except Exception:
-            self._logger.exception(f"Error counting active sessions for user {user_id}")
+            self._logger.exception("Error counting active sessions for user %(user_id)s", user_id=user_id)
             raise
         else:
-            self._logger.info(f"User {user_id} has {count} active sessions")
+            self._logger.info("User %(user_id)s has %(count)d active sessions", user_id=user_id, count=count)
             return count
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from sqlalchemy import bindparam, inspect, select, update
 
 from src.core.uow import IUnitOfWork
 from src.model.models import User
 from src.repository.base_repository import BaseRepository
 from src.schema.user import UserCreate, UserUpdate
 
+# Изменение этих полей отзывает все ранее выданные токены пользователя
+CREDENTIAL_FIELDS = ("role", "password_hashed")
+
+# Запросы горячего пути строятся один раз при импорте, а не на каждый вызов
+_SELECT_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+_SELECT_TOKEN_VERSION = select(User.token_version).where(User.id == bindparam("id"))
+
 
 class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
     def __init__(self, uow: IUnitOfWork) -> None:
@@ -14,7 +21,37 @@ class UserRepository(BaseRepository[User, UserCreate, UserUpdate]):
         self._model = User
 
     async def get_by_email(self, email: str) -> User | None:
+        result = await self.uow.session.execute(_SELECT_BY_EMAIL, {"email": email})
+        return result.scalar_one_or_none()
+
+    async def get_token_version(self, id: int) -> int | None:
+        """Получить текущую версию токенов пользователя (None, если пользователя нет)"""
+        result = await self.uow.session.execute(_SELECT_TOKEN_VERSION, {"id": id})
+        return result.scalar_one_or_none()
+
+    async def replace_password_hash(self, id: int, old_hash: str, new_hash: str) -> bool:
+        """Заменить хеш того же пароля на хеш с текущими параметрами argon2.
+
+        UPDATE выполняется в обход ORM: пароль не меняется, поэтому версия токенов
+        и аудит не затрагиваются. Условие по старому хешу не даст перезаписать
+        пароль, который успели сменить параллельно.
+        """
         result = await self.uow.session.execute(
-            select(User).where(User.email == email),
+            update(User).where(User.id == id, User.password_hashed == old_hash).values(password_hashed=new_hash),
         )
-        return result.scalar_one_or_none()
+        return result.rowcount == 1
+
+    async def update(self, id: int, obj_data: UserUpdate | dict) -> User | None:
+        """Обновить пользователя, увеличив версию токенов при смене роли или пароля"""
+        user = await super().update(id, obj_data)
+        if user is None:
+            return None
+
+        state = inspect(user)
+        if any(state.attrs[field].history.has_changes() for field in CREDENTIAL_FIELDS):
+            user.token_version = (user.token_version or 0) + 1
+            self._logger.info(
+                "Token version bumped for user %(id)s: %(token_version)s", id=id, token_version=user.token_version
+            )
+
+        return user
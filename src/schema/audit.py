@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class AuditLogResponse(BaseModel):
     """Базовая схема audit log"""
 
+    id: int
     entity_type: str
     entity_id: int
     action: str
@@ -17,6 +21,46 @@ class AuditLogResponse(BaseModel):
     performed_by: int | None = None
     ip_address: str | None = None
     user_agent: str | None = None
+    request_id: str | None = None
     performed_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class AuditLogFilter(BaseModel):
+    """Фильтры выборки audit логов; performed_from включительно, performed_to — нет"""
+
+    entity_type: str | None = Field(None, max_length=100)
+    entity_id: int | None = None
+    action: Literal["INSERT", "UPDATE", "DELETE"] | None = None
+    performed_from: datetime | None = None
+    performed_to: datetime | None = None
+
+
+class AuditCursor(BaseModel):
+    """Позиция в выдаче: последняя отданная запись по (performed_at, id)"""
+
+    performed_at: datetime
+    id: int
+
+    def encode(self) -> str:
+        payload = json.dumps([self.performed_at.isoformat(), self.id]).encode()
+        return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+    @classmethod
+    def decode(cls, value: str) -> AuditCursor:
+        """Разобрать курсор из ответа; ValueError, если он поврежден"""
+        try:
+            payload = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+            performed_at, entry_id = json.loads(payload)
+            return cls(performed_at=performed_at, id=entry_id)
+        except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+            raise ValueError("Invalid audit cursor") from e
+
+
+class AuditLogPage(BaseModel):
+    """Страница audit логов; next_cursor передается в следующий запрос, None — записей больше нет"""
+
+    items: list[AuditLogResponse]
+    limit: int
+    next_cursor: str | None = None
@@ -1,35 +1,57 @@
 from __future__ import annotations
 
-import json
+import asyncio
+from collections.abc import AsyncIterator
 
+from src.core.exceptions import ValidationError
 from src.repository.audit_repository import AuditRepository
-from src.schema.audit import AuditLogResponse
+from src.schema.audit import AuditCursor, AuditLogFilter, AuditLogPage, AuditLogResponse
+from src.util.audit_archive import AuditArchive
 
 
 class AuditService:
     """Сервис для работы с audit логами"""
 
-    def __init__(self, audit_repository: AuditRepository):
+    def __init__(self, audit_repository: AuditRepository, audit_archive: AuditArchive):
         self._audit_repository = audit_repository
-
-    async def get_user_audit_logs(self, user_id: int) -> list[AuditLogResponse]:
-        """Получить audit логи пользователя"""
-
-        logs = await self._audit_repository.get_logs_by_user_id(user_id)
-        result = []
-        for log in logs:
-            log_dict = {
-                "id": log.id,
-                "entity_type": log.entity_type,
-                "entity_id": log.entity_id,
-                "action": log.action,
-                "old_values": json.loads(log.old_values) if isinstance(log.old_values, str) else log.old_values,
-                "new_values": json.loads(log.new_values) if isinstance(log.new_values, str) else log.new_values,
-                "performed_by": log.performed_by,
-                "ip_address": log.ip_address,
-                "user_agent": log.user_agent,
-                "performed_at": log.performed_at,
-            }
-            result.append(AuditLogResponse(**log_dict))
-
-        return result
+        self._audit_archive = audit_archive
+
+    async def get_user_audit_page(
+        self, user_id: int, filters: AuditLogFilter, limit: int, cursor: str | None = None
+    ) -> AuditLogPage:
+        """Получить страницу audit логов пользователя, начиная с позиции cursor"""
+
+        after = None
+        if cursor is not None:
+            try:
+                position = AuditCursor.decode(cursor)
+            except ValueError as e:
+                raise ValidationError("Invalid cursor") from e
+            after = (position.performed_at, position.id)
+
+        # Лишняя запись показывает, есть ли следующая страница
+        logs = await self._audit_repository.get_logs_page(user_id, filters, limit + 1, after)
+        # old_values/new_values хранятся как JSON объекты и приходят из драйвера уже словарями
+        items = [AuditLogResponse.model_validate(log) for log in logs[:limit]]
+
+        next_cursor = None
+        if len(logs) > limit:
+            last = items[-1]
+            next_cursor = AuditCursor(performed_at=last.performed_at, id=last.id).encode()
+        return AuditLogPage(items=items, limit=limit, next_cursor=next_cursor)
+
+    async def export_user_audit_logs(self, user_id: int, filters: AuditLogFilter) -> AsyncIterator[bytes]:
+        """Выгрузить все audit логи пользователя в NDJSON: по одному JSON объекту на строку"""
+
+        async for logs in self._audit_repository.stream_logs(user_id, filters):
+            yield b"".join(AuditLogResponse.model_validate(log).model_dump_json().encode() + b"\n" for log in logs)
+
+    async def get_entity_audit_logs(self, entity_type: str, entity_id: int) -> list[AuditLogResponse]:
+        """Получить полную историю сущности: из БД и из архива партиций старше срока хранения"""
+
+        logs = await self._audit_repository.get_logs_by_entity(entity_type, entity_id)
+        archived = await asyncio.to_thread(self._audit_archive.find, entity_type, entity_id)
+
+        history = [AuditLogResponse.model_validate(log) for log in logs]
+        history.extend(AuditLogResponse.model_validate(entry) for entry in reversed(archived))
+        return history
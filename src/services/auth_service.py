@@ -1,80 +1,144 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import UTC, datetime, timedelta
 
 from fastapi import HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import JWTError, jwt
-from pwdlib import PasswordHash
 
 from src.core.config import settings
 from src.core.logging_config import get_logger, security_logger
+from src.core.login_guard import login_guard
+from src.core.metrics import auth_login_total
+from src.core.password_executor import password_executor
+from src.core.principal import Principal, build_access_claims, token_versions
+from src.core.principal_cache import UserSnapshot, principal_cache
+from src.core.token_codec import TokenDecodeError, token_codec
+from src.core.uow import SqlAlchemyUoW
 from src.model.models import User
 from src.repository.user_repository import UserRepository
 from src.schema.auth import Token
 from src.schema.session import SessionCreate, SessionTerminateRequest
 from src.services.session_service import SessionService
+from src.util.geoip import geoip_resolver
+from src.util.user_agent import classify_user_agent
+
+# Ссылки на фоновые задачи перехеширования, чтобы их не собрал сборщик мусора
+_rehash_tasks: set[asyncio.Task] = set()
 
 
 class AuthService:
     def __init__(self, user_repository: UserRepository, session_service: SessionService):
         self._user_repository = user_repository
         self._session_service = session_service
-        self._pwd_context = PasswordHash.recommended()
-        self._secret_key = settings.SECRET_KEY
-        self._algorithm = settings.ALGORITHM
         self._access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
         self._logger = get_logger(self.__class__.__name__)
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """Проверить пароль"""
-        return self._pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """Проверить пароль (в пуле, не блокируя event loop)"""
+        return await password_executor.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str) -> str:
-        """Хешировать пароль"""
-        return self._pwd_context.hash(password)
+    async def get_password_hash(self, password: str) -> str:
+        """Хешировать пароль (в пуле, не блокируя event loop)"""
+        return await password_executor.hash(password)
 
     async def authenticate_user(self, email: str, password: str) -> User | None:
         """Аутентификация пользователя"""
         self._logger.debug(f"Authentication attempt for email: {email}")
 
+        # Недавно не найденный email не запрашиваем повторно; фиктивная проверка
+        # пароля выравнивает время ответа с существующими пользователями
+        if login_guard.is_unknown_email(email):
+            await login_guard.dummy_verify(password)
+            return None
+
         user = await self._user_repository.get_by_email(email)
         if not user:
             self._logger.warning(f"User not found with email: {email}")
+            login_guard.negative_cache.add(email)
+            await login_guard.dummy_verify(password)
             return None
 
-        if not self.verify_password(password, user.password_hashed):
+        if not await self.verify_password(password, user.password_hashed):
             self._logger.warning(f"Invalid password for user: {email}")
             return None
 
         self._logger.info(f"Successful authentication for user: {email} (ID: {user.id})")
         return user
 
-    async def get_current_user(self, token: str) -> User:
-        """Получить текущего пользователя из токена"""
-        credentials_exception = HTTPException(
+    def _credentials_exception(self) -> HTTPException:
+        return HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    def _decode_token(self, token: str) -> dict:
+        """Проверить подпись и срок действия токена и вернуть claims"""
         try:
-            payload = jwt.decode(token, self._secret_key, algorithms=[self._algorithm])
-            email: str = payload.get("sub")
-            if email is None:
-                self._logger.warning("Token validation failed: no email in payload")
-                raise credentials_exception
-        except JWTError as e:
+            payload = token_codec.decode(token)
+        except TokenDecodeError as e:
             self._logger.warning(f"Token validation failed: JWT error - {e!s}")
-            raise credentials_exception from e
+            raise self._credentials_exception() from e
+
+        if payload.get("sub") is None:
+            self._logger.warning("Token validation failed: no email in payload")
+            raise self._credentials_exception()
+        return payload
+
+    async def get_current_user(self, token: str) -> UserSnapshot:
+        """Получить текущего пользователя из токена"""
+        cache_key = principal_cache.key_for(token)
+        cached_user = principal_cache.get(cache_key)
+        if cached_user is not None:
+            return cached_user
+
+        payload = self._decode_token(token)
+        email: str = payload["sub"]
 
         user = await self._user_repository.get_by_email(email)
         if user is None:
             self._logger.warning(f"Token validation failed: user not found for email {email}")
-            raise credentials_exception
+            raise self._credentials_exception()
+
+        snapshot = UserSnapshot.from_user(user)
+        principal = Principal.from_claims(payload)
+        if principal is not None and principal.token_version != snapshot.token_version:
+            self._logger.warning(f"Token validation failed: revoked token for user {user.id}")
+            raise self._credentials_exception()
+
+        principal_cache.put(cache_key, snapshot, token_exp=payload.get("exp"))
+        token_versions.set(snapshot.id, snapshot.token_version)
 
         self._logger.debug(f"Successfully validated token for user: {email} (ID: {user.id})")
-        return user
+        return snapshot
+
+    async def get_current_principal(self, token: str) -> Principal:
+        """Получить principal только из claims токена.
+
+        Запрос в БД выполняется лишь для токенов старого формата и когда версия
+        токенов пользователя отсутствует в кэше (не чаще раза в TOKEN_VERSION_CACHE_TTL_SECONDS).
+        """
+        payload = self._decode_token(token)
+
+        principal = Principal.from_claims(payload)
+        if principal is None:
+            # Токен выпущен до появления claims — проверяем по старой схеме
+            return Principal.from_snapshot(await self.get_current_user(token))
+
+        current_version = token_versions.get(principal.id)
+        if current_version is None:
+            current_version = await self._user_repository.get_token_version(principal.id)
+            if current_version is None:
+                self._logger.warning(f"Token validation failed: user {principal.id} not found")
+                raise self._credentials_exception()
+            token_versions.set(principal.id, current_version)
+
+        if principal.token_version != current_version:
+            self._logger.warning(f"Token validation failed: revoked token for user {principal.id}")
+            raise self._credentials_exception()
+
+        return principal
 
     def create_access_token(self, data: dict, expires_delta: timedelta | None = None) -> str:
         """Создать токен доступа"""
@@ -84,7 +148,7 @@ class AuthService:
         else:
             expire = datetime.now(UTC) + timedelta(minutes=self._access_token_expire_minutes)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self._secret_key, algorithm=self._algorithm)
+        encoded_jwt = token_codec.encode(to_encode)
 
         self._logger.debug(f"Access token created for user: {data.get('sub', 'unknown')}")
         return encoded_jwt
@@ -96,14 +160,17 @@ class AuthService:
     ) -> Token:
         """Вход в систему и получение токена"""
         email = form_data.username
+        ip_address = request.client.host if request and request.client else "unknown"
         self._logger.info(f"Login attempt for email: {email}")
 
+        # Ограничение частоты попыток по IP и по email до обращения к БД и argon2
+        login_guard.admit(email, ip_address)
+
         user = await self.authenticate_user(email, form_data.password)
         if not user:
             # Логируем неудачную попытку входа через security_logger
-            ip_address = request.client.host if request and request.client else "unknown"
-            user_agent = request.headers.get("user-agent", "unknown") if request else "unknown"
             security_logger.log_authentication_failure(email=email, reason="Invalid credentials", ip_address=ip_address)
+            auth_login_total.inc("invalid_credentials")
 
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -111,10 +178,14 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        # Хеш с устаревшими параметрами argon2 пересчитываем после ответа
+        if password_executor.needs_rehash(user.password_hashed):
+            self._schedule_rehash(user, form_data.password)
+
         # Успешный вход
         access_token_expires = timedelta(minutes=self._access_token_expire_minutes)
         access_token = self.create_access_token(
-            data={"sub": user.email},
+            data=build_access_claims(user),
             expires_delta=access_token_expires,
         )
 
@@ -126,20 +197,21 @@ class AuthService:
                 ip_address = request.client.host if request.client else "unknown"
 
                 # Парсим user_agent для получения информации о браузере и ОС
-                browser_name, browser_version = self._parse_user_agent(user_agent)
-                device_name = self._get_device_name(user_agent)
-                operating_system = self._get_os_name(user_agent)
-                device_type = self._get_device_type(user_agent)
+                agent = classify_user_agent(user_agent)
+                # Определяем страну и город по локальной базе диапазонов IP
+                location = geoip_resolver.lookup(ip_address)
 
                 # Создаем сессию
                 session_data = SessionCreate(
                     user_id=user.id,
-                    device_name=device_name,
-                    browser_name=browser_name,
-                    browser_version=browser_version,
-                    operating_system=operating_system,
-                    device_type=device_type,
+                    device_name=agent.device_name,
+                    browser_name=agent.browser_name,
+                    browser_version=agent.browser_version,
+                    operating_system=agent.operating_system,
+                    device_type=agent.device_type,
                     ip_address=ip_address,
+                    country=location.country if location else None,
+                    city=location.city if location else None,
                     user_agent=user_agent,
                     expires_at=datetime.now(UTC) + access_token_expires,
                 )
@@ -160,102 +232,31 @@ class AuthService:
             security_logger.log_login_attempt(email=email, ip_address=ip_address, user_agent=user_agent, success=True)
 
         self._logger.info(f"Successful login for user: {email} (ID: {user.id})")
+        auth_login_total.inc("success")
 
         return Token(access_token=access_token, token_type="bearer")
 
-    async def get_user_by_token(self, token: str) -> User:
-        """Получить пользователя по токену"""
-        return await self.get_current_user(token)
+    def _schedule_rehash(self, user: User, password: str) -> None:
+        """Запустить перехеширование пароля в фоне, не задерживая вход"""
+        task = asyncio.create_task(self._rehash_password(user.id, password, user.password_hashed))
+        _rehash_tasks.add(task)
+        task.add_done_callback(_rehash_tasks.discard)
 
-    def _parse_user_agent(self, user_agent: str) -> tuple[str | None, str | None]:
-        """Парсить User-Agent для получения информации о браузере"""
-        if not user_agent:
-            return None, None
-
-        user_agent = user_agent.lower()
-
-        # Определяем браузер с максимальной оптимизацией
-        if "chrome" in user_agent:
-            if "edg" in user_agent and (version := self._extract_version(user_agent, "edg/")):
-                return "Edge", version
-            elif version := self._extract_version(user_agent, "chrome/"):
-                return "Chrome", version
-        elif "firefox" in user_agent and (version := self._extract_version(user_agent, "firefox/")):
-            return "Firefox", version
-        elif ("opera" in user_agent or "opr" in user_agent) and (version := self._extract_version(user_agent, "opr/")):
-            return "Opera", version
-        elif (
-            "safari" in user_agent
-            and "chrome" not in user_agent
-            and (version := self._extract_version(user_agent, "version/"))
-        ):
-            return "Safari", version
-
-        return "Unknown Browser", None
-
-    def _extract_version(self, user_agent: str, pattern: str) -> str | None:
-        """Извлечь версию из User-Agent"""
+    async def _rehash_password(self, user_id: int, password: str, old_hash: str) -> None:
+        """Пересчитать хеш с текущими параметрами в отдельной транзакции"""
         try:
-            index = user_agent.find(pattern)
-            if index == -1:
-                return None
-            version_start = index + len(pattern)
-            version_end = user_agent.find(" ", version_start)
-            if version_end == -1:
-                version_end = len(user_agent)
-            return user_agent[version_start:version_end]
+            new_hash = await password_executor.hash(password)
+            async with SqlAlchemyUoW() as uow:
+                replaced = await UserRepository(uow).replace_password_hash(user_id, old_hash, new_hash)
         except Exception:
-            return None
-
-    def _get_device_name(self, user_agent: str) -> str | None:
-        """Определить имя устройства из User-Agent"""
-        if not user_agent:
-            return None
-
-        user_agent = user_agent.lower()
-
-        # Определяем устройство в порядке приоритета
-        if "iphone" in user_agent:
-            return "iPhone"
-        elif "ipad" in user_agent:
-            return "iPad"
-        elif "android" in user_agent:
-            return "Android Phone" if "mobile" in user_agent else "Android Device"
-        elif "mobile" in user_agent or "tablet" in user_agent:
-            return "Mobile Device" if "mobile" in user_agent else "Tablet"
-        return "Desktop"
-
-    def _get_os_name(self, user_agent: str) -> str | None:
-        """Определить операционную систему из User-Agent"""
-        if not user_agent:
-            return None
-
-        user_agent = user_agent.lower()
-
-        # Определяем ОС в порядке приоритета
-        if "windows nt" in user_agent or ("mac os x" in user_agent or "macintosh" in user_agent):
-            return "Windows" if "windows nt" in user_agent else "macOS"
-        elif "android" in user_agent:
-            return "Android"
-        elif "iphone" in user_agent or "ipad" in user_agent or "ios" in user_agent:
-            return "iOS"
-        elif "linux" in user_agent or "cros" in user_agent:
-            return "Linux" if "linux" in user_agent else "Chrome OS"
-        return "Unknown OS"
-
-    def _get_device_type(self, user_agent: str) -> str | None:
-        """Определить тип устройства из User-Agent"""
-        if not user_agent:
-            return None
-
-        user_agent = user_agent.lower()
-
-        if "mobile" in user_agent or "android" in user_agent or "iphone" in user_agent:
-            return "mobile"
-        elif "tablet" in user_agent or "ipad" in user_agent:
-            return "tablet"
+            self._logger.exception("Failed to rehash password for user %s", user_id)
         else:
-            return "desktop"
+            if replaced:
+                self._logger.info(f"Password rehashed with current argon2 parameters for user {user_id}")
+
+    async def get_user_by_token(self, token: str) -> UserSnapshot:
+        """Получить пользователя по токену"""
+        return await self.get_current_user(token)
 
     async def logout(self, token: str, request: Request | None = None) -> bool:
         """Выход из системы - завершить текущую сессию"""
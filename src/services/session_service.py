@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import UTC, datetime
 
 from src.core.exceptions import NotFoundError
 from src.core.logging_config import get_logger
-from src.repository.session_repository import SessionRepository
+from src.core.session_store import SessionStore, discard_after_commit
+from src.repository.session_repository import SessionDashboard, SessionRepository
 from src.schema.session import (
     CurrentSessionInfo,
     SessionBase,
@@ -21,12 +23,17 @@ from src.schema.session import (
 class SessionService:
     """Сервис для управления сессиями пользователей"""
 
-    def __init__(self, session_repository: SessionRepository) -> None:
+    def __init__(self, session_repository: SessionRepository, session_store: SessionStore) -> None:
         self._repository = session_repository
+        # Чтение отдельных сессий и учет активности идут через хранилище (кэши читают БД только при промахе)
+        self._store = session_store
+        # Сводка по сессиям переиспользуется всеми представлениями в рамках запроса
+        self._dashboards: dict[int, SessionDashboard] = {}
         self._logger = get_logger(self.__class__.__name__)
 
     async def create_session(self, session_data: SessionCreate) -> SessionResponse:
         """Создать новую сессию"""
+        self._dashboards.clear()
         self._logger.info(f"Creating session for user {session_data.user_id}")
 
         try:
@@ -41,10 +48,10 @@ class SessionService:
         self._logger.info(f"Getting sessions for user {user_id}")
 
         try:
-            sessions = await self._repository.get_active_sessions_by_user_id(user_id)
-            current_session = await self._repository.get_current_session(user_id)
+            dashboard = await self._get_dashboard(user_id)
+            current_session = dashboard.current_session
 
-            session_responses = [SessionResponse.model_validate(session) for session in sessions]
+            session_responses = [SessionResponse.model_validate(session) for session in dashboard.sessions]
 
             return SessionListResponse(
                 sessions=session_responses,
@@ -60,7 +67,7 @@ class SessionService:
         self._logger.debug(f"Getting session {session_id}")
 
         try:
-            session = await self._repository.get_by_id(session_id)
+            session = await self._store.get(session_id, self._repository.uow.session)
         except Exception:
             self._logger.exception(f"Error getting session {session_id}")
             raise
@@ -71,10 +78,16 @@ class SessionService:
 
     async def update_session(self, session_id: str, session_data: SessionUpdate) -> SessionResponse:
         """Обновить сессию"""
+        self._dashboards.clear()
         self._logger.info(f"Updating session {session_id}")
 
         try:
             session = await self._repository.update(session_id, session_data)
+            if session and session_data.is_current is not None:
+                # Признак текущей сессии мог измениться у других сессий пользователя
+                self._discard_after_commit(user_id=session.user_id)
+            elif session:
+                self._discard_after_commit([session_id])
         except Exception:
             self._logger.exception(f"Error updating session {session_id}")
             raise
@@ -88,7 +101,10 @@ class SessionService:
         self._logger.debug(f"Updating activity for session {session_id}")
 
         try:
-            session = await self._repository.update_last_activity(session_id)
+            session = await self._store.get(session_id, self._repository.uow.session)
+            if session:
+                now = datetime.now(UTC)
+                session = await self._store.touch(session, now)
         except Exception:
             self._logger.exception(f"Error updating session activity {session_id}")
             raise
@@ -99,26 +115,35 @@ class SessionService:
 
     async def set_current_session(self, user_id: int, session_id: str) -> bool:
         """Установить сессию как текущую для пользователя"""
+        self._dashboards.clear()
         self._logger.info(f"Setting session {session_id} as current for user {user_id}")
 
         try:
-            return await self._repository.set_current_session(user_id, session_id)
+            updated = await self._repository.set_current_session(user_id, session_id)
+            self._discard_after_commit(user_id=user_id)
         except Exception:
             self._logger.exception(f"Error setting current session for user {user_id}")
             raise
+        else:
+            return updated
 
     async def terminate_session(self, session_id: str) -> bool:
         """Завершить сессию"""
+        self._dashboards.clear()
         self._logger.info(f"Terminating session {session_id}")
 
         try:
-            return await self._repository.terminate_session(session_id)
+            terminated = await self._repository.terminate_session(session_id)
+            self._discard_after_commit([session_id])
         except Exception:
             self._logger.exception(f"Error terminating session {session_id}")
             raise
+        else:
+            return terminated
 
     async def terminate_sessions(self, request: SessionTerminateRequest) -> SessionTerminateResponse:
         """Завершить сессии согласно запросу"""
+        self._dashboards.clear()
         self._logger.info(f"Terminating sessions: {len(request.session_ids)} specified")
 
         try:
@@ -135,6 +160,7 @@ class SessionService:
                             terminated_count = await self._repository.terminate_all_sessions_except(
                                 first_session.user_id, current_session.id
                             )
+                            self._discard_after_commit(user_id=first_session.user_id)
                             return SessionTerminateResponse(
                                 terminated_sessions=[
                                     current_session.id
@@ -146,6 +172,7 @@ class SessionService:
             else:
                 # Завершаем только указанные сессии
                 terminated_sessions = await self._repository.terminate_sessions(request.session_ids)
+            self._discard_after_commit(terminated_sessions)
 
             return SessionTerminateResponse(
                 terminated_sessions=terminated_sessions, message=f"Завершено {len(terminated_sessions)} сессий"
@@ -159,9 +186,8 @@ class SessionService:
         self._logger.debug(f"Getting session stats for user {user_id}")
 
         try:
-            total_sessions = await self._repository.count_user_sessions(user_id)
-            active_sessions = await self._repository.count_active_user_sessions(user_id)
-            current_session = await self._repository.get_current_session(user_id)
+            dashboard = await self._get_dashboard(user_id)
+            current_session = dashboard.current_session
 
             current_session_info = None
             if current_session:
@@ -185,7 +211,9 @@ class SessionService:
                 )
 
             return SessionStats(
-                total_sessions=total_sessions, active_sessions=active_sessions, current_session=current_session_info
+                total_sessions=dashboard.total_sessions,
+                active_sessions=dashboard.active_sessions,
+                current_session=current_session_info,
             )
         except Exception:
             self._logger.exception(f"Error getting session stats for user {user_id}")
@@ -193,6 +221,7 @@ class SessionService:
 
     async def cleanup_expired_sessions(self) -> int:
         """Очистить истекшие сессии"""
+        self._dashboards.clear()
         self._logger.info("Cleaning up expired sessions")
 
         try:
@@ -206,7 +235,7 @@ class SessionService:
         self._logger.debug(f"Validating session {session_id} for user {user_id}")
 
         try:
-            session = await self._repository.get_by_id(session_id)
+            session = await self._store.get(session_id, self._repository.uow.session)
         except Exception:
             self._logger.exception(f"Error validating session {session_id}")
             return False
@@ -219,22 +248,38 @@ class SessionService:
                 return False
 
             # Проверяем, не истекла ли сессия
-            if session.expires_at and session.expires_at < datetime.utcnow():
+            now = datetime.now(UTC)
+            if session.expires_at and session.expires_at < now:
                 # Автоматически завершаем истекшую сессию
+                self._dashboards.clear()
                 await self._repository.terminate_session(session_id)
+                self._discard_after_commit([session_id])
                 return False
 
-            # Обновляем время последней активности
-            await self._repository.update_last_activity(session_id)
+            # Обновляем время последней активности (запись в БД — в фоне)
+            await self._store.touch(session, now)
             return True
 
+    def _discard_after_commit(self, session_ids: Iterable[str] = (), user_id: int | None = None) -> None:
+        """Забыть сессии в хранилище после коммита транзакции запроса"""
+        discard_after_commit(self._repository.uow.session, self._store, session_ids, user_id)
+
+    async def _get_dashboard(self, user_id: int) -> SessionDashboard:
+        """Получить сводку по сессиям (один запрос к БД на пользователя за запрос)"""
+        dashboard = self._dashboards.get(user_id)
+        if dashboard is None:
+            dashboard = await self._repository.get_dashboard(user_id)
+            self._dashboards[user_id] = dashboard
+        return dashboard
+
     async def get_sessions_summary(self, user_id: int) -> dict:
         """Получить краткую информацию о сессиях пользователя"""
         self._logger.debug(f"Getting sessions summary for user {user_id}")
 
         try:
-            sessions = await self._repository.get_active_sessions_by_user_id(user_id)
-            current_session = await self._repository.get_current_session(user_id)
+            dashboard = await self._get_dashboard(user_id)
+            sessions = dashboard.sessions
+            current_session = dashboard.current_session
 
             summary = {
                 "total_active": len(sessions),
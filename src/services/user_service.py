@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from src.core.login_guard import login_guard
 from src.model.models import User
 from src.repository.user_repository import UserRepository
 from src.schema.user import UserCreate, UserFull, UserListResponse, UserUpdate
@@ -15,7 +16,7 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
 
     async def create_user(self, user_data: UserCreate) -> User:
         """Создать нового пользователя с хешированием пароля"""
-        hashed_password = self._auth_service.get_password_hash(user_data.password_string)
+        hashed_password = await self._auth_service.get_password_hash(user_data.password_string)
 
         # Создаем словарь с правильными ключами для модели User
         user_data_dict = {
@@ -28,7 +29,9 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
             "role": user_data.role,
         }
 
-        return await self._user_repository.create(user_data_dict)
+        user = await self._user_repository.create(user_data_dict)
+        login_guard.negative_cache.discard(user_data.email)
+        return user
 
     async def get_user_by_id(self, id: int) -> User | None:
         """Получить пользователя по ID"""
@@ -56,7 +59,11 @@ class UserService(BaseService[User, UserCreate, UserUpdate]):
 
     async def update_user(self, id: int, user_data: UserUpdate) -> User | None:
         """Обновить пользователя"""
-        return await self._user_repository.update(id, user_data)
+        # Кэши пользователя сбрасываются после коммита (src/core/audit_listeners.py)
+        user = await self._user_repository.update(id, user_data)
+        if user is not None and user.email:
+            login_guard.negative_cache.discard(user.email)
+        return user
 
     async def delete_user(self, id: int) -> bool:
         """Удалить пользователя"""
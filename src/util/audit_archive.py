@@ -0,0 +1,178 @@
+"""Архив старых партиций audit_logs: сжатые JSON Lines с индексом по сущностям.
+
+Партиция выгружается в файл audit_logs_pYYYY_MM.jsonl.gz, отсортированная по
+(entity_type, entity_id, id). Файл — последовательность независимых gzip-блоков
+по BLOCK_ROWS строк; обычные gzip/zcat читают его целиком как один поток.
+
+Рядом лежит индекс audit_logs_pYYYY_MM.index.json: смещение и длина каждого
+блока и первая/последняя сущность в нем. Поиск истории сущности читает и
+распаковывает только блоки, в диапазон которых она попадает. Индекс пишется
+последним: архив без индекса считается незавершенным и не читается.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+from src.core.config import settings
+from src.core.logging_config import get_logger
+
+ARCHIVE_SUFFIX = ".jsonl.gz"
+INDEX_SUFFIX = ".index.json"
+INDEX_VERSION = 1
+BLOCK_ROWS = 1000
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@dataclass(frozen=True, slots=True)
+class ArchiveBlock:
+    """Сжатый блок архива и диапазон сущностей в нем"""
+
+    offset: int
+    length: int
+    first: tuple[str, int]
+    last: tuple[str, int]
+
+    def contains(self, key: tuple[str, int]) -> bool:
+        return self.first <= key <= self.last
+
+
+class AuditArchiveWriter:
+    """Запись одной партиции в архив; файлы появляются под итоговыми именами только в close()"""
+
+    def __init__(self, directory: str | Path, name: str) -> None:
+        self.directory = Path(directory)
+        self.name = name
+        self.path = self.directory / f"{name}{ARCHIVE_SUFFIX}"
+        self.index_path = self.directory / f"{name}{INDEX_SUFFIX}"
+        self._temporary = self.path.with_name(self.path.name + ".tmp")
+        self._blocks: list[ArchiveBlock] = []
+        self._offset = 0
+        self._rows = 0
+        self._fd: int | None = None
+
+    def open(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self._temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o640)
+
+    def write_block(self, rows: Iterable[dict[str, Any]]) -> None:
+        """Дописать строки отдельным gzip-блоком"""
+        rows = list(rows)
+        if not rows:
+            return
+
+        lines = b"".join(json.dumps(row, default=_json_value).encode() + b"\n" for row in rows)
+        data = gzip.compress(lines, mtime=0)
+        os.write(self._fd, data)
+
+        keys = [(row["entity_type"], row["entity_id"]) for row in rows]
+        self._blocks.append(ArchiveBlock(self._offset, len(data), min(keys), max(keys)))
+        self._offset += len(data)
+        self._rows += len(rows)
+
+    def close(self, metadata: dict[str, Any] | None = None) -> int:
+        """Сохранить архив и индекс (с дополнительными полями metadata), вернуть число строк"""
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._fd = None
+        self._temporary.replace(self.path)
+
+        index = {
+            "version": INDEX_VERSION,
+            "partition": self.name,
+            "rows": self._rows,
+            **(metadata or {}),
+            "blocks": [[block.offset, block.length, *block.first, *block.last] for block in self._blocks],
+        }
+        temporary = self.index_path.with_name(self.index_path.name + ".tmp")
+        temporary.write_text(json.dumps(index, default=_json_value))
+        temporary.replace(self.index_path)
+        return self._rows
+
+    def abort(self) -> None:
+        """Удалить недописанный архив"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._temporary.unlink(missing_ok=True)
+
+
+@dataclass(frozen=True, slots=True)
+class _ArchiveIndex:
+    path: Path
+    mtime: float
+    blocks: tuple[ArchiveBlock, ...]
+
+
+def _load_index(index_path: Path) -> _ArchiveIndex:
+    data = json.loads(index_path.read_text())
+    if data.get("version") != INDEX_VERSION:
+        raise ValueError(f"Unsupported audit archive index version in {index_path}")
+
+    blocks = tuple(
+        ArchiveBlock(offset, length, (first_type, first_id), (last_type, last_id))
+        for offset, length, first_type, first_id, last_type, last_id in data["blocks"]
+    )
+    archive_path = index_path.with_name(index_path.name.removesuffix(INDEX_SUFFIX) + ARCHIVE_SUFFIX)
+    return _ArchiveIndex(archive_path, index_path.stat().st_mtime, blocks)
+
+
+class AuditArchive:
+    """Поиск записей аудита в архивах партиций по сущности"""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self._indexes: dict[Path, _ArchiveIndex] = {}
+        self._logger = get_logger(self.__class__.__name__)
+
+    def find(self, entity_type: str, entity_id: int) -> list[dict[str, Any]]:
+        """Записи сущности из всех архивов в порядке id (синхронно, читает файлы)"""
+        key = (entity_type, entity_id)
+        entries = []
+        for index in self._load_indexes():
+            blocks = [block for block in index.blocks if block.contains(key)]
+            if not blocks:
+                continue
+            with open(index.path, "rb") as file:
+                for block in blocks:
+                    file.seek(block.offset)
+                    for line in gzip.decompress(file.read(block.length)).splitlines():
+                        entry = json.loads(line)
+                        if entry["entity_type"] == entity_type and entry["entity_id"] == entity_id:
+                            entry["performed_at"] = datetime.fromisoformat(entry["performed_at"])
+                            entries.append(entry)
+        return sorted(entries, key=lambda entry: entry["id"])
+
+    def _load_indexes(self) -> list[_ArchiveIndex]:
+        """Индексы всех завершенных архивов; перечитываются только измененные файлы"""
+        indexes = []
+        seen = set()
+        for index_path in sorted(self.directory.glob(f"*{INDEX_SUFFIX}")):
+            seen.add(index_path)
+            cached = self._indexes.get(index_path)
+            try:
+                if cached is None or cached.mtime != index_path.stat().st_mtime:
+                    cached = self._indexes[index_path] = _load_index(index_path)
+            except (OSError, ValueError, KeyError):
+                self._logger.exception(f"Failed to load audit archive index {index_path}")
+                continue
+            indexes.append(cached)
+
+        for stale in self._indexes.keys() - seen:
+            del self._indexes[stale]
+        return indexes
+
+
+audit_archive = AuditArchive(settings.AUDIT_ARCHIVE_DIR)
@@ -0,0 +1,258 @@
+"""Офлайн-геолокация IP по диапазонам из отображаемого в память файла.
+
+Формат файла (все целые little-endian):
+
+    заголовок   magic(8) | число диапазонов IPv4 | IPv6 | число локаций | размер строк
+    IPv4        начала (4 байта big-endian) | концы (4 байта) | индекс локации (uint32)
+    IPv6        начала (16 байт big-endian) | концы (16 байт) | индекс локации (uint32)
+    локации     смещение (uint32) и длина (uint16) строки "страна\\0город"
+    строки      UTF-8
+
+Адреса хранятся в big-endian, поэтому побайтовое сравнение совпадает с числовым
+и бинарный поиск идет прямо по mmap без распаковки. Файл открывается только
+на чтение, и страницы page cache разделяются всеми воркерами uvicorn.
+"""
+
+from __future__ import annotations
+
+import ipaddress
+import mmap
+import socket
+import struct
+from bisect import bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import pairwise
+from pathlib import Path
+
+from src.core.config import settings
+from src.core.logging_config import get_logger
+
+MAGIC = b"GEOIP\x00v1"
+HEADER = struct.Struct("<8sIIII")
+LOCATION = struct.Struct("<IH")
+LOCATION_INDEX = struct.Struct("<I")
+IPV4_WIDTH = 4
+IPV6_WIDTH = 16
+INDEX_STRIDE = 64
+IPV4_MAPPED_PREFIX = b"\x00" * 10 + b"\xff\xff"
+
+# Диапазон для записи в базу: начало, конец (включительно), страна, город
+GeoIPRange = tuple[
+    ipaddress.IPv4Address | ipaddress.IPv6Address, ipaddress.IPv4Address | ipaddress.IPv6Address, str | None, str | None
+]
+
+
+@dataclass(frozen=True, slots=True)
+class GeoLocation:
+    """Страна и город, к которым относится IP"""
+
+    country: str | None
+    city: str | None
+
+
+class GeoIPFormatError(ValueError):
+    """Файл базы геолокации поврежден или имеет другой формат"""
+
+
+class _Keys:
+    """Последовательность адресов фиксированной ширины поверх mmap (для bisect)"""
+
+    __slots__ = ("_buffer", "_count", "_offset", "_width")
+
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int, width: int) -> None:
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+        self._width = width
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> bytes:
+        start = self._offset + index * self._width
+        return self._buffer[start : start + self._width]
+
+
+class _RangeTable:
+    """Отсортированные непересекающиеся диапазоны одного семейства адресов"""
+
+    __slots__ = ("_buffer", "_ends", "_index", "_locations_offset", "_starts")
+
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int, width: int) -> None:
+        self._buffer = buffer
+        self._starts = _Keys(buffer, offset, count, width)
+        self._ends = _Keys(buffer, offset + count * width, count, width)
+        self._locations_offset = offset + 2 * count * width
+        # Каждое INDEX_STRIDE-е начало диапазона в памяти процесса: первый шаг поиска
+        # идет по списку в C, второй — по блоку из INDEX_STRIDE ключей в mmap
+        self._index = [self._starts[i] for i in range(0, count, INDEX_STRIDE)]
+
+    @property
+    def size(self) -> int:
+        return len(self._starts) * (2 * self._starts._width + LOCATION_INDEX.size)
+
+    def find(self, packed: bytes) -> int | None:
+        """Индекс локации диапазона, содержащего адрес"""
+        block = bisect_right(self._index, packed) - 1
+        if block < 0:
+            return None
+        low = block * INDEX_STRIDE
+        position = bisect_right(self._starts, packed, low, min(low + INDEX_STRIDE, len(self._starts))) - 1
+        if self._ends[position] < packed:
+            return None
+        return LOCATION_INDEX.unpack_from(self._buffer, self._locations_offset + position * LOCATION_INDEX.size)[0]
+
+
+class GeoIPDatabase:
+    """База диапазонов IP, отображенная в память"""
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, ipv4_count, ipv6_count, location_count, strings_size = HEADER.unpack_from(self._buffer)
+        except struct.error as e:
+            self._buffer.close()
+            raise GeoIPFormatError(f"{path}: file is too short") from e
+        if magic != MAGIC:
+            self._buffer.close()
+            raise GeoIPFormatError(f"{path}: unknown file format")
+
+        offset = HEADER.size
+        self._ipv4 = _RangeTable(self._buffer, offset, ipv4_count, IPV4_WIDTH)
+        offset += self._ipv4.size
+        self._ipv6 = _RangeTable(self._buffer, offset, ipv6_count, IPV6_WIDTH)
+        offset += self._ipv6.size
+        self._locations_offset = offset
+        self._strings_offset = offset + location_count * LOCATION.size
+        self._location_count = location_count
+
+        if self._strings_offset + strings_size != len(self._buffer):
+            self._buffer.close()
+            raise GeoIPFormatError(f"{path}: file size does not match header")
+
+        self.ipv4_ranges = ipv4_count
+        self.ipv6_ranges = ipv6_count
+        # Локаций немного, поэтому декодированные строки кэшируются
+        self._location = lru_cache(maxsize=location_count or 1)(self._read_location)
+
+    def lookup(self, ip: str) -> GeoLocation | None:
+        """Найти локацию IP; None, если адрес некорректен или не входит ни в один диапазон"""
+        # inet_pton разбирает адрес в C и сразу отдает big-endian байты
+        try:
+            return self._find(self._ipv4, socket.inet_pton(socket.AF_INET, ip))
+        except (OSError, ValueError):
+            pass
+        try:
+            packed = socket.inet_pton(socket.AF_INET6, ip)
+        except (OSError, ValueError):
+            return None
+
+        # IPv4-mapped адреса (::ffff:a.b.c.d) ищутся среди диапазонов IPv4
+        if packed.startswith(IPV4_MAPPED_PREFIX):
+            return self._find(self._ipv4, packed[-IPV4_WIDTH:])
+        return self._find(self._ipv6, packed)
+
+    def _find(self, table: _RangeTable, packed: bytes) -> GeoLocation | None:
+        index = table.find(packed)
+        if index is None:
+            return None
+        return self._location(index)
+
+    def close(self) -> None:
+        """Освободить отображение файла"""
+        self._buffer.close()
+
+    def _read_location(self, index: int) -> GeoLocation:
+        if index >= self._location_count:
+            raise GeoIPFormatError(f"Location index {index} is out of range")
+        offset, length = LOCATION.unpack_from(self._buffer, self._locations_offset + index * LOCATION.size)
+        start = self._strings_offset + offset
+        country, _, city = self._buffer[start : start + length].decode("utf-8").partition("\0")
+        return GeoLocation(country=country or None, city=city or None)
+
+
+def write_database(path: str | Path, ranges: Iterable[GeoIPRange]) -> tuple[int, int]:
+    """Записать диапазоны в файл базы, вернуть число диапазонов IPv4 и IPv6.
+
+    Диапазоны сортируются; пересекающиеся диапазоны считаются ошибкой.
+    """
+    tables: dict[int, list[tuple[bytes, bytes, int]]] = {4: [], 6: []}
+    locations: dict[tuple[str, str], int] = {}
+    for start, end, country, city in ranges:
+        if start.version != end.version or start > end:
+            raise GeoIPFormatError(f"Invalid range {start} - {end}")
+        location = locations.setdefault((country or "", city or ""), len(locations))
+        tables[start.version].append((start.packed, end.packed, location))
+
+    for version, table in tables.items():
+        table.sort()
+        for previous, current in pairwise(table):
+            if current[0] <= previous[1]:
+                raise GeoIPFormatError(
+                    f"Overlapping IPv{version} ranges starting at {ipaddress.ip_address(current[0])}"
+                )
+
+    strings = bytearray()
+    location_records = bytearray()
+    for country, city in locations:
+        encoded = f"{country}\0{city}".encode()
+        location_records += LOCATION.pack(len(strings), len(encoded))
+        strings += encoded
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, len(tables[4]), len(tables[6]), len(locations), len(strings)))
+        for table in (tables[4], tables[6]):
+            file.write(b"".join(start for start, _, _ in table))
+            file.write(b"".join(end for _, end, _ in table))
+            file.write(b"".join(LOCATION_INDEX.pack(location) for _, _, location in table))
+        file.write(location_records)
+        file.write(strings)
+    return len(tables[4]), len(tables[6])
+
+
+class GeoIPResolver:
+    """Ленивая загрузка базы геолокации для процесса.
+
+    Файл открывается при первом обращении (то есть уже в воркере после fork).
+    Если базы нет, геолокация отключается: lookup возвращает None.
+    """
+
+    def __init__(self, path: str | None) -> None:
+        self._path = path
+        self._database: GeoIPDatabase | None = None
+        self._disabled = not path
+        self._logger = get_logger(self.__class__.__name__)
+
+    def lookup(self, ip: str) -> GeoLocation | None:
+        """Найти страну и город IP"""
+        database = self._database or self._open()
+        if database is None:
+            return None
+        return database.lookup(ip)
+
+    def close(self) -> None:
+        """Закрыть базу (вызывается при остановке приложения)"""
+        if self._database is not None:
+            self._database.close()
+            self._database = None
+
+    def _open(self) -> GeoIPDatabase | None:
+        if self._disabled:
+            return None
+        try:
+            self._database = GeoIPDatabase(self._path)
+        except (OSError, ValueError) as e:
+            self._disabled = True
+            self._logger.warning(f"GeoIP database is unavailable, sessions will have no location: {e}")
+            return None
+        self._logger.info(
+            f"GeoIP database loaded: {self._database.ipv4_ranges} IPv4 and {self._database.ipv6_ranges} IPv6 ranges"
+        )
+        return self._database
+
+
+geoip_resolver = GeoIPResolver(settings.GEOIP_DATABASE_PATH)
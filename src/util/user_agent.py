@@ -0,0 +1,129 @@
+"""Классификация User-Agent: браузер, версия, ОС, устройство и тип устройства одним вызовом"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Клиенты присылают немного различных User-Agent, поэтому кэш почти всегда попадает
+USER_AGENT_CACHE_SIZE = 1024
+
+# Все маркеры, которые нужны классификатору
+_TOKENS = (
+    "chrome",
+    "edg",
+    "firefox",
+    "opera",
+    "opr",
+    "safari",
+    "iphone",
+    "ipad",
+    "android",
+    "mobile",
+    "tablet",
+    "windows nt",
+    "mac os x",
+    "macintosh",
+    "ios",
+    "linux",
+    "cros",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class UserAgentInfo:
+    """Результат классификации User-Agent"""
+
+    browser_name: str | None = None
+    browser_version: str | None = None
+    operating_system: str | None = None
+    device_name: str | None = None
+    device_type: str | None = None
+
+
+_EMPTY = UserAgentInfo()
+
+
+@lru_cache(maxsize=USER_AGENT_CACHE_SIZE)
+def classify_user_agent(user_agent: str) -> UserAgentInfo:
+    """Определить браузер, ОС и устройство по User-Agent"""
+    if not user_agent:
+        return _EMPTY
+
+    # Строка приводится к нижнему регистру один раз, маркеры ищутся подстрокой
+    user_agent = user_agent.lower()
+    found = {token for token in _TOKENS if token in user_agent}
+
+    browser_name, browser_version = _browser(user_agent, found)
+    return UserAgentInfo(
+        browser_name=browser_name,
+        browser_version=browser_version,
+        operating_system=_operating_system(found),
+        device_name=_device_name(found),
+        device_type=_device_type(found),
+    )
+
+
+def _browser(user_agent: str, found: set[str]) -> tuple[str, str | None]:
+    if "chrome" in found:
+        if "edg" in found and (version := _extract_version(user_agent, "edg/")):
+            return "Edge", version
+        if version := _extract_version(user_agent, "chrome/"):
+            return "Chrome", version
+    elif "firefox" in found and (version := _extract_version(user_agent, "firefox/")):
+        return "Firefox", version
+    elif ("opera" in found or "opr" in found) and (version := _extract_version(user_agent, "opr/")):
+        return "Opera", version
+    elif "safari" in found and (version := _extract_version(user_agent, "version/")):
+        return "Safari", version
+
+    return "Unknown Browser", None
+
+
+def _extract_version(user_agent: str, pattern: str) -> str | None:
+    index = user_agent.find(pattern)
+    if index == -1:
+        return None
+    version_start = index + len(pattern)
+    version_end = user_agent.find(" ", version_start)
+    if version_end == -1:
+        version_end = len(user_agent)
+    return user_agent[version_start:version_end]
+
+
+def _operating_system(found: set[str]) -> str:
+    if "windows nt" in found:
+        return "Windows"
+    if "mac os x" in found or "macintosh" in found:
+        return "macOS"
+    if "android" in found:
+        return "Android"
+    if "iphone" in found or "ipad" in found or "ios" in found:
+        return "iOS"
+    if "linux" in found:
+        return "Linux"
+    if "cros" in found:
+        return "Chrome OS"
+    return "Unknown OS"
+
+
+def _device_name(found: set[str]) -> str:
+    if "iphone" in found:
+        return "iPhone"
+    if "ipad" in found:
+        return "iPad"
+    if "android" in found:
+        return "Android Phone" if "mobile" in found else "Android Device"
+    if "mobile" in found:
+        return "Mobile Device"
+    if "tablet" in found:
+        return "Tablet"
+    return "Desktop"
+
+
+def _device_type(found: set[str]) -> str:
+    if "mobile" in found or "android" in found or "iphone" in found:
+        return "mobile"
+    if "tablet" in found or "ipad" in found:
+        return "tablet"
+    return "desktop"
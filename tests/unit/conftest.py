@@ -6,6 +6,10 @@ from unittest.mock import Mock
 import pytest
 from fastapi.security import OAuth2PasswordRequestForm
 
+from src.core.login_guard import login_guard
+from src.core.principal import token_versions
+from src.core.principal_cache import principal_cache
+from src.core.token_codec import token_codec
 from src.model.models import Project, Resume, User
 from src.schema import Token, UserCreate
 from src.schema.project import ProjectCreate
@@ -152,6 +156,20 @@ def mock_uow():
     return uow
 
 
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Автоматическая фикстура для очистки кэшей аутентификации между тестами"""
+    principal_cache.clear()
+    token_versions.clear()
+    login_guard.reset()
+    token_codec.clear()
+    yield
+    principal_cache.clear()
+    token_versions.clear()
+    login_guard.reset()
+    token_codec.clear()
+
+
 @pytest.fixture(autouse=True)
 def reset_mocks():
     """Автоматическая фикстура для сброса всех моков после каждого теста"""
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import gzip
+import json
+from datetime import UTC, date, datetime
+
+import pytest
+
+from src.util.audit_archive import AuditArchive, AuditArchiveWriter
+
+
+def make_entry(entry_id: int, entity_type: str, entity_id: int) -> dict:
+    return {
+        "id": entry_id,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "action": "UPDATE",
+        "old_values": {"name": "old"},
+        "new_values": {"name": f"new {entry_id}"},
+        "performed_by": 1,
+        "ip_address": None,
+        "user_agent": None,
+        "performed_at": datetime(2025, 1, 1, 12, tzinfo=UTC),
+    }
+
+
+def write_archive(directory, name: str, entries: list[dict], block_rows: int) -> AuditArchiveWriter:
+    writer = AuditArchiveWriter(directory, name)
+    writer.open()
+    for start in range(0, len(entries), block_rows):
+        writer.write_block(entries[start : start + block_rows])
+    writer.close({"from": date(2025, 1, 1), "to": date(2025, 2, 1)})
+    return writer
+
+
+@pytest.fixture
+def entries():
+    # У каждой сущности три записи, разбросанные по всему архиву
+    keys = sorted([(entity_type, entity_id) for entity_type in ("project", "user") for entity_id in range(1, 11)])
+    return [make_entry(i, entity_type, entity_id) for i, (entity_type, entity_id) in enumerate(keys * 3, start=1)]
+
+
+class TestAuditArchive:
+    """Тесты для архива партиций аудита"""
+
+    def test_should_write_archive_readable_as_single_gzip_stream(self, tmp_path, entries):
+        """Тест должен записать архив, который целиком читается обычным gzip"""
+        # when
+        writer = write_archive(tmp_path, "audit_logs_p2025_01", entries, block_rows=7)
+
+        # then
+        lines = gzip.decompress(writer.path.read_bytes()).splitlines()
+        index = json.loads(writer.index_path.read_text())
+        assert [json.loads(line)["id"] for line in lines] == [entry["id"] for entry in entries]
+        assert index["rows"] == len(entries)
+        assert index["from"] == "2025-01-01"
+        assert len(index["blocks"]) == len(range(0, len(entries), 7))
+
+    def test_should_find_entity_history(self, tmp_path, entries):
+        """Тест должен вернуть все записи сущности в порядке id"""
+        # given
+        write_archive(tmp_path, "audit_logs_p2025_01", entries, block_rows=7)
+        archive = AuditArchive(tmp_path)
+
+        # when
+        found = archive.find("user", 3)
+
+        # then
+        expected = [entry["id"] for entry in entries if (entry["entity_type"], entry["entity_id"]) == ("user", 3)]
+        assert [entry["id"] for entry in found] == expected
+        assert found[0]["performed_at"] == datetime(2025, 1, 1, 12, tzinfo=UTC)
+        assert found[0]["new_values"] == {"name": f"new {expected[0]}"}
+
+    def test_should_read_only_blocks_containing_entity(self, tmp_path, entries, monkeypatch):
+        """Тест должен распаковывать только блоки, в диапазон которых попадает сущность"""
+        # given
+        sorted_entries = sorted(entries, key=lambda entry: (entry["entity_type"], entry["entity_id"], entry["id"]))
+        write_archive(tmp_path, "audit_logs_p2025_01", sorted_entries, block_rows=3)
+        archive = AuditArchive(tmp_path)
+        decompressed = []
+        original = gzip.decompress
+        monkeypatch.setattr(gzip, "decompress", lambda data: decompressed.append(data) or original(data))
+
+        # when
+        found = archive.find("project", 5)
+
+        # then
+        assert [entry["id"] for entry in found] == [
+            entry["id"] for entry in sorted_entries if (entry["entity_type"], entry["entity_id"]) == ("project", 5)
+        ]
+        assert len(decompressed) == 1
+
+    def test_should_search_all_archives_and_skip_unfinished(self, tmp_path):
+        """Тест должен искать во всех архивах и пропускать архив без индекса"""
+        # given
+        write_archive(tmp_path, "audit_logs_p2025_01", [make_entry(1, "project", 1)], block_rows=10)
+        write_archive(tmp_path, "audit_logs_p2025_02", [make_entry(2, "project", 1)], block_rows=10)
+        unfinished = AuditArchiveWriter(tmp_path, "audit_logs_p2025_03")
+        unfinished.open()
+        unfinished.write_block([make_entry(3, "project", 1)])
+        archive = AuditArchive(tmp_path)
+
+        # when
+        found = archive.find("project", 1)
+
+        # then
+        assert [entry["id"] for entry in found] == [1, 2]
+
+    def test_should_return_nothing_for_unknown_entity_or_missing_directory(self, tmp_path, entries):
+        """Тест должен вернуть пустой список, если записей или каталога архива нет"""
+        # given
+        write_archive(tmp_path, "audit_logs_p2025_01", entries, block_rows=7)
+
+        # when / then
+        assert AuditArchive(tmp_path).find("resume", 1) == []
+        assert AuditArchive(tmp_path / "missing").find("project", 1) == []
+
+    def test_should_remove_temporary_file_on_abort(self, tmp_path):
+        """Тест должен удалить недописанный архив при ошибке выгрузки"""
+        # given
+        writer = AuditArchiveWriter(tmp_path, "audit_logs_p2025_01")
+        writer.open()
+        writer.write_block([make_entry(1, "project", 1)])
+
+        # when
+        writer.abort()
+
+        # then
+        assert list(tmp_path.iterdir()) == []
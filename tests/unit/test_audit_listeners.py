@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+from datetime import date, time
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from src.core.audit_listeners import AUDIT_ENTRIES_KEY, _audit_specs, setup_audit_listeners
+from src.core.principal import token_versions
+from src.core.principal_cache import UserSnapshot, principal_cache
+from src.core.request_context import request_id_var
+from src.model.models import AuditLog, Base, DefenseDay, Evaluation, GradingCriteria, Project, User
+from src.model.models import Session as SessionModel
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        author = User(first_name="Test", middle_name="", email="author@example.com", password_hashed="-")
+        session.add(author)
+        session.flush()
+        session.add_all(Project(name=f"project {i}", author_id=author.id) for i in range(3))
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def audit_inserts(engine) -> list[str]:
+    statements: list[str] = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def collect(*args):
+        if args[2].startswith("INSERT INTO audit_logs"):
+            statements.append(args[2])
+
+    return statements
+
+
+class TestAuditListeners:
+    """Тесты для пакетной записи аудита"""
+
+    def test_should_write_flush_audit_in_single_insert(self, engine, audit_inserts):
+        """Тест должен записать аудит всех изменений flush одним INSERT в порядке flush"""
+        # given
+        with Session(engine) as session:
+            projects = session.scalars(select(Project).order_by(Project.id.desc())).all()
+            for project in projects:
+                project.description = "updated"
+
+            # when
+            session.commit()
+
+            # then
+            rows = session.scalars(select(AuditLog).where(AuditLog.action == "UPDATE").order_by(AuditLog.id)).all()
+            assert len(audit_inserts) == 1
+            assert [row.entity_id for row in rows] == sorted(project.id for project in projects)
+
+    def test_should_discard_audit_of_rolled_back_flush(self, engine):
+        """Тест должен отбросить накопленный аудит при откате"""
+        # given
+        with Session(engine) as session:
+            session.connection()
+            session.info[AUDIT_ENTRIES_KEY] = [{"entity_type": "project"}]
+
+            # when
+            session.rollback()
+
+            # then
+            assert AUDIT_ENTRIES_KEY not in session.info
+
+    def test_should_store_only_changed_columns_as_json_objects(self, engine):
+        """Тест должен сохранить в UPDATE только изменившиеся колонки как JSON объекты"""
+        # given
+        with Session(engine) as session:
+            project = session.scalars(select(Project).order_by(Project.id)).first()
+            project.description = "updated"
+            project.name = project.name
+
+            # when
+            session.commit()
+
+            # then
+            log = session.scalars(select(AuditLog).where(AuditLog.action == "UPDATE")).one()
+            assert log.old_values == {"description": None}
+            assert log.new_values == {"description": "updated"}
+
+    def test_should_store_inserted_row_as_json_object(self, engine):
+        """Тест должен сохранить строку INSERT целиком как JSON объект, а не строку"""
+        # given
+        with Session(engine) as session:
+            log = session.scalars(
+                select(AuditLog).where(AuditLog.entity_type == "project", AuditLog.action == "INSERT")
+            ).first()
+
+            # then
+            assert isinstance(log.new_values, dict)
+            assert log.new_values["name"].startswith("project")
+            assert log.old_values is None
+
+    def test_should_audit_delete_with_last_row_state(self, engine):
+        """Тест должен записать DELETE с последним состоянием строки"""
+        # given
+        with Session(engine) as session:
+            project = session.scalars(select(Project).order_by(Project.id)).first()
+            project_id = project.id
+            session.delete(project)
+
+            # when
+            session.commit()
+
+            # then
+            log = session.scalars(select(AuditLog).where(AuditLog.action == "DELETE")).one()
+            assert log.entity_type == "project"
+            assert log.entity_id == project_id
+            assert log.old_values["name"] == "project 0"
+            assert log.new_values is None
+
+    def test_should_audit_every_auditable_model(self, engine):
+        """Тест должен аудировать модели с Auditable без отдельных listener'ов, сериализуя даты"""
+        # given
+        with Session(engine) as session:
+            day = DefenseDay(date=date(2026, 6, 1), max_slots=4, first_slot_time=time(10, 0))
+            session.add(day)
+
+            # when
+            session.commit()
+
+            # then
+            log = session.scalars(select(AuditLog).where(AuditLog.entity_type == "defense_day")).one()
+            assert log.entity_id == day.id
+            assert log.new_values["date"] == "2026-06-01"
+            assert log.new_values["first_slot_time"] == "10:00:00"
+
+    def test_should_not_audit_excluded_columns(self, engine):
+        """Тест должен не записывать в аудит колонки из __audit_exclude__"""
+        # given
+        with Session(engine) as session:
+            user = session.scalars(select(User)).one()
+            user.password_hashed = "new-hash"
+            user.tg_nickname = "nick"
+
+            # when
+            session.commit()
+
+            # then
+            insert_log = session.scalars(select(AuditLog).where(AuditLog.entity_type == "user")).first()
+            update_log = session.scalars(
+                select(AuditLog).where(AuditLog.entity_type == "user", AuditLog.action == "UPDATE")
+            ).one()
+            assert "password_hashed" not in insert_log.new_values
+            assert update_log.new_values == {"tg_nickname": "nick"}
+
+    def test_should_store_request_id_of_current_request(self, engine):
+        """Тест должен сохранить в записи аудита id запроса, в котором сделано изменение"""
+        # given
+        token = request_id_var.set("req-1")
+        try:
+            with Session(engine) as session:
+                project = session.scalars(select(Project)).first()
+                project.description = "updated"
+
+                # when
+                session.commit()
+        finally:
+            request_id_var.reset(token)
+
+        # then
+        with Session(engine) as session:
+            assert session.scalars(select(AuditLog.request_id).where(AuditLog.action == "UPDATE")).all() == ["req-1"]
+
+    def test_should_invalidate_cached_user_only_after_commit(self, engine):
+        """Тест должен сбросить снимок и версию токенов пользователя после коммита, а не при flush"""
+        # given
+        key = principal_cache.key_for("token")
+        with Session(engine) as session:
+            user = session.scalars(select(User)).one()
+            user_id = user.id
+            principal_cache.put(key, UserSnapshot.from_user(user))
+            token_versions.set(user_id, 0)
+            user.role = "admin"
+
+            # when
+            session.flush()
+            cached_until_commit = principal_cache.get(key)
+            session.commit()
+
+        # then
+        assert cached_until_commit is not None
+        assert principal_cache.get(key) is None
+        assert token_versions.get(user_id) is None
+
+    def test_should_keep_cached_user_after_rollback(self, engine):
+        """Тест должен оставить кэш пользователя, если изменение откатили"""
+        # given
+        key = principal_cache.key_for("token")
+        with Session(engine) as session:
+            user = session.scalars(select(User)).one()
+            principal_cache.put(key, UserSnapshot.from_user(user))
+            user.role = "admin"
+            session.flush()
+
+            # when
+            session.rollback()
+
+        # then
+        assert principal_cache.get(key) is not None
+
+    def test_should_build_spec_for_all_auditable_models_at_setup(self):
+        """Тест должен заранее описать все модели с Auditable и пропустить остальные"""
+        # when
+        setup_audit_listeners()
+
+        # then
+        assert {DefenseDay, Evaluation, GradingCriteria, Project, User} <= _audit_specs.keys()
+        assert AuditLog not in _audit_specs
+        assert SessionModel not in _audit_specs
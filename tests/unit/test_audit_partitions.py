@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from datetime import date
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.core.audit_partitions import (
+    AuditPartitionManager,
+    add_months,
+    build_export_query,
+    create_partition_ddl,
+    expired_months,
+    partition_month,
+    partition_name,
+)
+
+
+class TestPartitionNames:
+    """Тесты для имен и границ месячных партиций"""
+
+    @pytest.mark.parametrize(
+        ("month", "months", "expected"),
+        [
+            (date(2026, 10, 1), 1, date(2026, 11, 1)),
+            (date(2026, 12, 1), 1, date(2027, 1, 1)),
+            (date(2026, 1, 1), -1, date(2025, 12, 1)),
+            (date(2026, 10, 1), -12, date(2025, 10, 1)),
+        ],
+    )
+    def test_should_add_months_across_years(self, month, months, expected):
+        """Тест должен сдвигать месяц с переходом через год"""
+        # when / then
+        assert add_months(month, months) == expected
+
+    def test_should_parse_partition_month_from_name(self):
+        """Тест должен восстановить месяц по имени и не принимать чужие таблицы"""
+        # given
+        name = partition_name(date(2025, 3, 1))
+
+        # when / then
+        assert name == "audit_logs_p2025_03"
+        assert partition_month(name) == date(2025, 3, 1)
+        assert partition_month("audit_logs_default") is None
+        assert partition_month("audit_logs_p2025_03; DROP TABLE user") is None
+
+    def test_should_build_partition_bounds_in_utc(self):
+        """Тест должен создавать партицию от начала месяца до начала следующего по UTC"""
+        # when
+        ddl = create_partition_ddl(date(2025, 12, 1))
+
+        # then
+        assert ddl == (
+            "CREATE TABLE IF NOT EXISTS audit_logs_p2025_12 PARTITION OF audit_logs "
+            "FOR VALUES FROM ('2025-12-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')"
+        )
+
+    def test_should_select_months_past_retention(self):
+        """Тест должен считать просроченными только месяцы целиком старше срока хранения"""
+        # given
+        months = [date(2025, month, 1) for month in range(1, 13)] + [date(2026, 10, 1)]
+
+        # when
+        expired = expired_months(months, today=date(2026, 10, 18), retention_months=12)
+
+        # then
+        assert expired == [date(2025, month, 1) for month in range(1, 10)]
+
+    def test_should_export_partition_ordered_by_entity(self):
+        """Тест должен выгружать партицию в порядке сущностей и отказывать для чужих таблиц"""
+        # when
+        sql = str(build_export_query("audit_logs_p2025_01").compile(dialect=postgresql.dialect()))
+
+        # then
+        assert "FROM audit_logs_p2025_01" in sql
+        assert sql.endswith('ORDER BY entity_type COLLATE "C", entity_id, id')
+        with pytest.raises(ValueError, match="Not an audit partition"):
+            build_export_query("user")
+
+
+class TestAuditPartitionManager:
+    """Тесты для AuditPartitionManager"""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        return AuditPartitionManager(
+            Mock(),
+            archive_dir=str(tmp_path),
+            precreate_months=3,
+            retention_months=12,
+            interval_seconds=3600,
+        )
+
+    async def test_should_skip_prepare_outside_postgresql(self, manager):
+        """Тест должен не трогать схему, если БД не PostgreSQL"""
+        # given
+        conn = AsyncMock()
+        conn.dialect.name = "sqlite"
+
+        # when
+        await manager.prepare(conn)
+
+        # then
+        conn.execute.assert_not_called()
+
+    async def test_should_archive_expired_attached_and_leftover_partitions(self, manager, monkeypatch):
+        """Тест должен отсоединить и выгрузить просроченные партиции, включая оставшиеся от прошлого запуска"""
+        # given
+        monkeypatch.setattr("src.core.audit_partitions.table_kind", AsyncMock(return_value="p"))
+        monkeypatch.setattr("src.core.audit_partitions.ensure_partitions", AsyncMock())
+        monkeypatch.setattr(
+            "src.core.audit_partitions.attached_partitions",
+            AsyncMock(return_value=["audit_logs_default", "audit_logs_p2025_08", "audit_logs_p2025_10"]),
+        )
+        monkeypatch.setattr(
+            "src.core.audit_partitions.detached_partitions", AsyncMock(return_value=["audit_logs_p2025_07"])
+        )
+        manager._engine.begin.return_value.__aenter__ = AsyncMock()
+        manager._engine.begin.return_value.__aexit__ = AsyncMock(return_value=False)
+        manager._detach = AsyncMock()
+        manager._archive = AsyncMock(return_value=10)
+
+        # when
+        archived = await manager._maintain(date(2026, 10, 18))
+
+        # then
+        assert archived == ["audit_logs_p2025_07", "audit_logs_p2025_08"]
+        manager._detach.assert_awaited_once_with("audit_logs_p2025_08")
+        assert manager._archive.await_count == len(archived)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.audit_pipeline import AuditPipeline, AuditSpool
+
+# Константы для тестов
+EXPECTED_WRITTEN_ENTRIES = 2
+
+
+def make_entry(entity_id: int) -> dict:
+    return {
+        "entity_type": "project",
+        "entity_id": entity_id,
+        "action": "UPDATE",
+        "old_values": None,
+        "new_values": "{}",
+        "performed_by": 1,
+        "ip_address": "127.0.0.1",
+        "user_agent": "pytest",
+        "performed_at": datetime.now(UTC),
+    }
+
+
+@pytest.fixture
+async def pipeline(tmp_path):
+    pipeline = AuditPipeline(
+        AsyncMock(), spool_dir=str(tmp_path), max_queue_size=2, batch_size=10, flush_interval=60, fsync=False
+    )
+    pipeline._write = AsyncMock()
+    # Фоновая задача не нужна: flush и replay_orphaned вызываются тестами
+    pipeline._run = AsyncMock()
+    pipeline.start()
+    yield pipeline
+    await pipeline.shutdown()
+
+
+def written_ids(pipeline: AuditPipeline) -> list[int]:
+    return [entry["entity_id"] for call in pipeline._write.await_args_list for entry in call.args[0]]
+
+
+class TestAuditPipeline:
+    """Тесты для AuditPipeline"""
+
+    async def test_should_write_submitted_entries_and_truncate_spool(self, pipeline):
+        """Тест должен записать принятые записи пачкой и очистить журнал"""
+        # given
+        pipeline.submit([make_entry(1), make_entry(2)])
+        assert pipeline._spool.path.stat().st_size > 0
+
+        # when
+        written = await pipeline.flush()
+
+        # then
+        assert written == EXPECTED_WRITTEN_ENTRIES
+        assert written_ids(pipeline) == [1, 2]
+        assert pipeline._spool.path.stat().st_size == 0
+
+    async def test_should_spill_overflow_to_spool_and_keep_order(self, pipeline):
+        """Тест должен при переполнении очереди дочитать записи из журнала в исходном порядке"""
+        # given
+        for entity_id in (1, 2, 3, 4):
+            pipeline.submit([make_entry(entity_id)])
+
+        # when
+        await pipeline.flush()
+
+        # then
+        assert written_ids(pipeline) == [1, 2, 3, 4]
+
+    async def test_should_keep_entries_when_database_write_fails(self, pipeline):
+        """Тест должен оставить записи в очереди и журнале, если запись в БД не удалась"""
+        # given
+        pipeline._write.side_effect = ConnectionError("database is unavailable")
+        pipeline.submit([make_entry(1)])
+
+        # when
+        with pytest.raises(ConnectionError):
+            await pipeline.flush()
+
+        # then
+        assert pipeline._spool.acked() == 0
+        assert [sequence for sequence, _ in pipeline._spool.read()] == [1]
+
+    async def test_should_replay_spool_of_stopped_worker(self, pipeline, tmp_path):
+        """Тест должен дописать в БД записи из журнала остановившегося воркера"""
+        # given
+        spool = AuditSpool(tmp_path / "audit-1.jsonl")
+        spool.open()
+        spool.append([make_entry(1), make_entry(2)], fsync=False)
+        spool.ack(1)
+        spool.close(remove=False)
+
+        # when
+        replayed = await pipeline.replay_orphaned()
+
+        # then
+        assert replayed == 1
+        assert written_ids(pipeline) == [2]
+        assert not spool.path.exists()
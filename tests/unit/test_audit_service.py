@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.core.exceptions import ValidationError
+from src.model.models import AuditLog, Base
+from src.repository.audit_repository import STREAM_BATCH_SIZE, AuditRepository
+from src.schema.audit import AuditCursor, AuditLogFilter
+from src.services.audit_service import AuditService
+
+SECOND = datetime(2026, 1, 1, 12, 0, 1, tzinfo=UTC)
+FIRST = datetime(2026, 1, 1, 12, 0, 0, tzinfo=UTC)
+EXPECTED_EXPORT_CHUNKS = 2
+
+
+def make_log(entry_id: int, performed_at: datetime, **values) -> AuditLog:
+    return AuditLog(
+        id=entry_id,
+        entity_type=values.get("entity_type", "project"),
+        entity_id=values.get("entity_id", 1),
+        action=values.get("action", "UPDATE"),
+        new_values={"name": str(entry_id)},
+        performed_by=1,
+        performed_at=performed_at,
+    )
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        # Несколько записей с одинаковым performed_at: порядок внутри них задает id
+        session.add_all(
+            [
+                make_log(1, FIRST),
+                make_log(2, FIRST, action="INSERT"),
+                make_log(3, SECOND, entity_type="resume"),
+                make_log(4, SECOND),
+                make_log(5, SECOND, entity_id=2),
+            ]
+        )
+        session.commit()
+        yield session
+
+
+async def read_all_pages(db_session, filters: AuditLogFilter, limit: int) -> list[list[int]]:
+    """Пройти все страницы через сервис и репозиторий, передавая курсор следующей страницы"""
+    uow = Mock()
+    uow.session.execute = AsyncMock(side_effect=db_session.execute)
+    service = AuditService(AuditRepository(uow), Mock())
+    pages = []
+    cursor = None
+    while True:
+        page = await service.get_user_audit_page(1, filters, limit, cursor)
+        pages.append([item.id for item in page.items])
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+class TestAuditLogsQuery:
+    """Тесты для запроса audit логов пользователя"""
+
+    async def test_should_paginate_by_performed_at_and_id_without_gaps(self, db_session):
+        """Тест должен пройти все записи страницами без пропусков и повторов при равных performed_at"""
+        # when
+        pages = await read_all_pages(db_session, AuditLogFilter(), limit=2)
+
+        # then
+        assert pages == [[5, 4], [3, 2], [1]]
+
+    @pytest.mark.parametrize(
+        ("filters", "expected"),
+        [
+            (AuditLogFilter(entity_type="project"), [5, 4, 2, 1]),
+            (AuditLogFilter(entity_type="project", entity_id=2), [5]),
+            (AuditLogFilter(action="INSERT"), [2]),
+            (AuditLogFilter(performed_from=SECOND), [5, 4, 3]),
+            (AuditLogFilter(performed_to=SECOND), [2, 1]),
+        ],
+    )
+    async def test_should_apply_filters(self, db_session, filters, expected):
+        """Тест должен применить фильтры по сущности, действию и диапазону дат"""
+        # when
+        pages = await read_all_pages(db_session, filters, limit=10)
+
+        # then
+        assert pages == [expected]
+
+    def test_should_have_index_matching_keyset_order(self):
+        """Тест должен иметь индекс, совпадающий с фильтром пользователя и порядком (performed_at, id)"""
+        # when
+        indexes = {tuple(column.name for column in index.columns) for index in AuditLog.__table__.indexes}
+
+        # then
+        assert ("performed_by", "performed_at", "id") in indexes
+        assert ("performed_by", "entity_type", "entity_id", "performed_at", "id") in indexes
+
+
+class TestAuditCursor:
+    """Тесты для AuditCursor"""
+
+    def test_should_round_trip_cursor(self):
+        """Тест должен восстановить позицию из закодированного курсора"""
+        # given
+        cursor = AuditCursor(performed_at=SECOND, id=42)
+
+        # when
+        decoded = AuditCursor.decode(cursor.encode())
+
+        # then
+        assert decoded == cursor
+
+    @pytest.mark.parametrize("value", ["", "not-a-cursor", "W10", "WyJ4IiwgMV0"])
+    def test_should_reject_damaged_cursor(self, value):
+        """Тест должен отклонить поврежденный курсор"""
+        # when / then
+        with pytest.raises(ValueError, match="Invalid audit cursor"):
+            AuditCursor.decode(value)
+
+
+class TestAuditService:
+    """Тесты для AuditService"""
+
+    @pytest.fixture
+    def repository(self):
+        return Mock(spec=AuditRepository)
+
+    @pytest.fixture
+    def service(self, repository):
+        return AuditService(repository, Mock())
+
+    async def test_should_return_next_cursor_when_more_logs_exist(self, service, repository):
+        """Тест должен вернуть курсор на последнюю запись, если есть следующая страница"""
+        # given
+        repository.get_logs_page = AsyncMock(
+            return_value=[make_log(5, SECOND), make_log(4, SECOND), make_log(3, FIRST)]
+        )
+
+        # when
+        page = await service.get_user_audit_page(1, AuditLogFilter(), limit=2)
+
+        # then
+        assert [item.id for item in page.items] == [5, 4]
+        assert AuditCursor.decode(page.next_cursor) == AuditCursor(performed_at=SECOND, id=4)
+        repository.get_logs_page.assert_awaited_once_with(1, AuditLogFilter(), 3, None)
+
+    async def test_should_pass_cursor_position_to_repository(self, service, repository):
+        """Тест должен продолжить выдачу с позиции курсора и не вернуть курсор на последней странице"""
+        # given
+        repository.get_logs_page = AsyncMock(return_value=[make_log(3, FIRST)])
+        cursor = AuditCursor(performed_at=SECOND, id=4).encode()
+
+        # when
+        page = await service.get_user_audit_page(1, AuditLogFilter(), limit=2, cursor=cursor)
+
+        # then
+        assert page.next_cursor is None
+        repository.get_logs_page.assert_awaited_once_with(1, AuditLogFilter(), 3, (SECOND, 4))
+
+    async def test_should_reject_invalid_cursor(self, service):
+        """Тест должен вернуть ошибку валидации для поврежденного курсора"""
+        # when / then
+        with pytest.raises(ValidationError):
+            await service.get_user_audit_page(1, AuditLogFilter(), limit=2, cursor="broken")
+
+    async def test_should_export_logs_as_ndjson(self, service, repository):
+        """Тест должен выгрузить записи по одной JSON строке, пачками из репозитория"""
+
+        # given
+        async def stream_logs(_user_id, _filters):
+            yield [make_log(5, SECOND), make_log(4, SECOND)]
+            yield [make_log(3, FIRST)]
+
+        repository.stream_logs = stream_logs
+
+        # when
+        chunks = [chunk async for chunk in service.export_user_audit_logs(1, AuditLogFilter())]
+
+        # then
+        lines = b"".join(chunks).splitlines()
+        assert len(chunks) == EXPECTED_EXPORT_CHUNKS
+        assert [json.loads(line)["id"] for line in lines] == [5, 4, 3]
+
+
+class TestAuditRepository:
+    """Тесты для AuditRepository"""
+
+    async def test_should_stream_logs_in_batches_from_server_side_cursor(self):
+        """Тест должен читать логи пачками по yield_per, не загружая выборку целиком"""
+
+        # given
+        async def partitions():
+            yield [make_log(2, FIRST)]
+            yield [make_log(1, FIRST)]
+
+        result = Mock()
+        result.partitions.return_value = partitions()
+        uow = Mock()
+        uow.session.stream_scalars = AsyncMock(return_value=result)
+        repository = AuditRepository(uow)
+
+        # when
+        batches = [[log.id for log in logs] async for logs in repository.stream_logs(1, AuditLogFilter())]
+
+        # then
+        assert batches == [[2], [1]]
+        query = uow.session.stream_scalars.await_args.args[0]
+        assert query.get_execution_options()["yield_per"] == STREAM_BATCH_SIZE
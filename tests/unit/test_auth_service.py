@@ -1,9 +1,19 @@
 from __future__ import annotations
 
-from unittest.mock import Mock, patch
+import asyncio
+from unittest.mock import AsyncMock, Mock, call, patch
 
+import pytest
+from fastapi import HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 
+from src.core.config import settings
+from src.core.exceptions import TooManyRequestsError
+from src.core.login_guard import login_guard
+from src.core.password_executor import password_executor
+from src.core.principal import Principal, build_access_claims
+from src.core.principal_cache import UserSnapshot
+from src.core.token_codec import token_codec
 from src.model.models import User
 from src.repository.user_repository import UserRepository
 from src.schema import Token
@@ -27,7 +37,7 @@ class TestAuthService:
 
         auth_service = AuthService(mock_repository, Mock())
 
-        with patch.object(auth_service, "verify_password", return_value=True):
+        with patch.object(auth_service, "verify_password", new_callable=AsyncMock, return_value=True):
             # when
             result = await auth_service.authenticate_user("test@example.com", "password")
 
@@ -46,12 +56,57 @@ class TestAuthService:
 
         auth_service = AuthService(mock_repository, Mock())
 
-        # when
-        result = await auth_service.authenticate_user("test@example.com", "wrong_password")
+        with patch.object(login_guard, "dummy_verify", new_callable=AsyncMock) as mock_dummy_verify:
+            # when
+            result = await auth_service.authenticate_user("test@example.com", "wrong_password")
 
-        # then
-        assert result is None
-        mock_repository.get_by_email.assert_called_once_with("test@example.com")
+            # then
+            assert result is None
+            mock_repository.get_by_email.assert_called_once_with("test@example.com")
+            mock_dummy_verify.assert_awaited_once_with("wrong_password")
+
+    async def test_should_not_query_unknown_email_again(self):
+        """Тест должен отвечать на повторный вход с несуществующим email без запроса к БД"""
+        # given
+        mock_repository = Mock(spec=UserRepository)
+        mock_repository.get_by_email.return_value = None
+
+        auth_service = AuthService(mock_repository, Mock())
+
+        with patch.object(login_guard, "dummy_verify", new_callable=AsyncMock) as mock_dummy_verify:
+            # when
+            first = await auth_service.authenticate_user("unknown@example.com", "password")
+            second = await auth_service.authenticate_user("unknown@example.com", "password")
+
+            # then
+            assert first is None
+            assert second is None
+            mock_repository.get_by_email.assert_called_once_with("unknown@example.com")
+            assert mock_dummy_verify.await_args_list == [call("password"), call("password")]
+            assert login_guard.counters["unknown_email_cached"] == 1
+
+    async def test_should_throttle_login_attempts_for_account(self):
+        """Тест должен вернуть 429 после исчерпания попыток входа для email"""
+        # given
+        mock_repository = Mock(spec=UserRepository)
+        mock_repository.get_by_email.return_value = None
+
+        auth_service = AuthService(mock_repository, Mock())
+        form_data = OAuth2PasswordRequestForm(username="victim@example.com", password="wrong_password")
+
+        with patch.object(login_guard, "dummy_verify", new_callable=AsyncMock):
+            for _ in range(settings.LOGIN_ACCOUNT_BUCKET_CAPACITY):
+                with pytest.raises(HTTPException) as exc_info:
+                    await auth_service.login_for_access_token(form_data)
+                assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
+
+            # when / then
+            with pytest.raises(TooManyRequestsError) as exc_info:
+                await auth_service.login_for_access_token(form_data)
+
+            assert exc_info.value.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+            assert "Retry-After" in exc_info.value.headers
+            assert login_guard.counters["account_throttled"] == 1
 
     async def test_should_get_current_user_by_valid_token(self):
         """Тест должен получить текущего пользователя по валидному токену"""
@@ -62,14 +117,35 @@ class TestAuthService:
 
         auth_service = AuthService(mock_repository, Mock())
 
-        with patch("src.services.auth_service.jwt.decode") as mock_decode:
+        with patch.object(token_codec, "decode") as mock_decode:
             mock_decode.return_value = {"sub": "test@example.com"}
 
             # when
             result = await auth_service.get_current_user("valid_token")
 
             # then
-            assert result == mock_user
+            assert result == UserSnapshot.from_user(mock_user)
+            mock_repository.get_by_email.assert_called_once_with("test@example.com")
+
+    async def test_should_serve_repeated_token_from_principal_cache(self):
+        """Тест должен брать пользователя из кэша при повторном запросе с тем же токеном"""
+        # given
+        mock_repository = Mock(spec=UserRepository)
+        mock_user = User(id=1, email="test@example.com", first_name="Test", middle_name="User", role="student")
+        mock_repository.get_by_email.return_value = mock_user
+
+        auth_service = AuthService(mock_repository, Mock())
+
+        with patch.object(token_codec, "decode") as mock_decode:
+            mock_decode.return_value = {"sub": "test@example.com"}
+
+            # when
+            first = await auth_service.get_current_user("valid_token")
+            second = await auth_service.get_current_user("valid_token")
+
+            # then
+            assert first == second
+            mock_decode.assert_called_once()
             mock_repository.get_by_email.assert_called_once_with("test@example.com")
 
     async def test_should_login_for_access_token_successfully(self):
@@ -91,7 +167,7 @@ class TestAuthService:
         form_data = OAuth2PasswordRequestForm(username="test@example.com", password="password")
 
         with (
-            patch.object(auth_service, "verify_password", return_value=True),
+            patch.object(auth_service, "verify_password", new_callable=AsyncMock, return_value=True),
             patch.object(auth_service, "create_access_token") as mock_create_token,
         ):
             mock_create_token.return_value = "fake_jwt_token"
@@ -104,3 +180,61 @@ class TestAuthService:
             assert result.access_token == "fake_jwt_token"
             assert result.token_type == "bearer"
             mock_repository.get_by_email.assert_called_once_with("test@example.com")
+
+    async def test_should_rehash_outdated_password_hash_after_login(self):
+        """Тест должен запустить фоновое перехеширование после входа со старым хешем"""
+        # given
+        mock_repository = Mock(spec=UserRepository)
+        mock_user = User(id=1, email="test@example.com", password_hashed="outdated_hash", role="student")
+        mock_repository.get_by_email.return_value = mock_user
+
+        auth_service = AuthService(mock_repository, Mock())
+        form_data = OAuth2PasswordRequestForm(username="test@example.com", password="password")
+
+        with (
+            patch.object(auth_service, "verify_password", new_callable=AsyncMock, return_value=True),
+            patch.object(password_executor, "needs_rehash", return_value=True),
+            patch.object(auth_service, "_rehash_password", new_callable=AsyncMock) as mock_rehash,
+        ):
+            # when
+            result = await auth_service.login_for_access_token(form_data)
+            await asyncio.sleep(0)
+
+            # then
+            assert isinstance(result, Token)
+            mock_rehash.assert_awaited_once_with(1, "password", "outdated_hash")
+
+    async def test_should_get_principal_from_token_claims_without_loading_user(self):
+        """Тест должен получить principal только из claims токена"""
+        # given
+        mock_repository = Mock(spec=UserRepository)
+        mock_user = User(id=1, email="test@example.com", role="teacher", token_version=2)
+        mock_repository.get_token_version.return_value = 2
+
+        auth_service = AuthService(mock_repository, Mock())
+        token = auth_service.create_access_token(build_access_claims(mock_user))
+
+        # when
+        first = await auth_service.get_current_principal(token)
+        second = await auth_service.get_current_principal(token)
+
+        # then
+        assert first == second == Principal(id=1, email="test@example.com", role="teacher", token_version=2)
+        mock_repository.get_by_email.assert_not_called()
+        mock_repository.get_token_version.assert_called_once_with(1)
+
+    async def test_should_reject_token_with_outdated_version(self):
+        """Тест должен отклонить токен, выпущенный до смены роли или пароля"""
+        # given
+        mock_repository = Mock(spec=UserRepository)
+        mock_user = User(id=1, email="test@example.com", role="student", token_version=0)
+        mock_repository.get_token_version.return_value = 1
+
+        auth_service = AuthService(mock_repository, Mock())
+        token = auth_service.create_access_token(build_access_claims(mock_user))
+
+        # when / then
+        with pytest.raises(HTTPException) as exc_info:
+            await auth_service.get_current_principal(token)
+
+        assert exc_info.value.status_code == status.HTTP_401_UNAUTHORIZED
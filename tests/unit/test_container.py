@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from unittest.mock import Mock
+
+from src.core.container import RequestScope
+from src.core.uow import IUnitOfWork
+
+
+class TestRequestScope:
+    """Тесты для RequestScope"""
+
+    def test_should_share_repositories_within_request(self):
+        """Тест должен переиспользовать репозиторий всеми сервисами одного запроса"""
+        # given
+        uow = Mock(spec=IUnitOfWork)
+        scope = RequestScope(uow)
+
+        # when
+        user_service = scope.user_service
+
+        # then
+        assert user_service._user_repository is scope.user_repository
+        assert scope.auth_service._user_repository is scope.user_repository
+        assert scope.user_repository.uow is uow
+
+    def test_should_build_components_lazily(self):
+        """Тест должен создавать только запрошенные компоненты"""
+        # given
+        scope = RequestScope(Mock(spec=IUnitOfWork))
+
+        # when
+        _ = scope.project_service
+
+        # then
+        assert "project_repository" in vars(scope)
+        assert "user_repository" not in vars(scope)
+        assert "defense_service" not in vars(scope)
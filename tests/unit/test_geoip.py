@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from ipaddress import ip_address
+
+import pytest
+
+from src.util.geoip import GeoIPDatabase, GeoIPFormatError, GeoIPResolver, GeoLocation, write_database
+
+RANGES = [
+    (ip_address("8.8.8.0"), ip_address("8.8.8.255"), "US", "Mountain View"),
+    (ip_address("1.0.0.0"), ip_address("1.0.0.255"), "AU", "Sydney"),
+    (ip_address("77.88.0.0"), ip_address("77.88.63.255"), "RU", "Moscow"),
+    (ip_address("2a02:6b8::"), ip_address("2a02:6b8:ffff:ffff:ffff:ffff:ffff:ffff"), "RU", "Moscow"),
+    (ip_address("2001:db8::"), ip_address("2001:db8::ffff"), "DE", None),
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = tmp_path / "geoip.bin"
+    write_database(path, RANGES)
+    database = GeoIPDatabase(path)
+    yield database
+    database.close()
+
+
+class TestGeoIPDatabase:
+    """Тесты для GeoIPDatabase"""
+
+    @pytest.mark.parametrize(
+        ("ip", "expected"),
+        [
+            ("8.8.8.8", GeoLocation("US", "Mountain View")),
+            ("1.0.0.0", GeoLocation("AU", "Sydney")),
+            ("77.88.63.255", GeoLocation("RU", "Moscow")),
+            ("2a02:6b8::242", GeoLocation("RU", "Moscow")),
+            ("2001:db8::1", GeoLocation("DE", None)),
+            ("::ffff:8.8.4.4", None),
+            ("::ffff:8.8.8.4", GeoLocation("US", "Mountain View")),
+        ],
+    )
+    def test_should_find_location_of_address(self, database, ip, expected):
+        """Тест должен найти локацию по диапазону, включая границы и IPv4-mapped адреса"""
+        # when
+        location = database.lookup(ip)
+
+        # then
+        assert location == expected
+
+    @pytest.mark.parametrize("ip", ["0.0.0.1", "8.8.9.0", "255.255.255.255", "::1", "unknown", "", "1.2.3"])
+    def test_should_return_none_outside_ranges(self, database, ip):
+        """Тест должен вернуть None для адресов вне диапазонов и некорректных строк"""
+        # when / then
+        assert database.lookup(ip) is None
+
+    def test_should_reject_overlapping_ranges(self, tmp_path):
+        """Тест должен отказаться записывать пересекающиеся диапазоны"""
+        # given
+        ranges = [
+            (ip_address("10.0.0.0"), ip_address("10.0.0.255"), "US", None),
+            (ip_address("10.0.0.128"), ip_address("10.0.1.255"), "US", None),
+        ]
+
+        # when / then
+        with pytest.raises(GeoIPFormatError):
+            write_database(tmp_path / "geoip.bin", ranges)
+
+    def test_should_reject_unknown_file_format(self, tmp_path):
+        """Тест должен отклонить файл другого формата"""
+        # given
+        path = tmp_path / "geoip.bin"
+        path.write_bytes(b"not a geoip database")
+
+        # when / then
+        with pytest.raises(GeoIPFormatError):
+            GeoIPDatabase(path)
+
+
+class TestGeoIPResolver:
+    """Тесты для GeoIPResolver"""
+
+    def test_should_disable_lookup_without_database(self, tmp_path):
+        """Тест должен вернуть None, если файла базы нет"""
+        # given
+        resolver = GeoIPResolver(str(tmp_path / "missing.bin"))
+
+        # when / then
+        assert resolver.lookup("8.8.8.8") is None
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import queue
+
+import pytest
+
+from src.core.config import settings
+from src.core.logging_config import JsonFormatter, LogQueue, LogQueueHandler, SamplingFilter, StructuredLogger
+
+
+def make_record(level: int, message: str) -> logging.LogRecord:
+    return logging.makeLogRecord(
+        {"name": "test", "levelno": level, "levelname": logging.getLevelName(level), "msg": message}
+    )
+
+
+def fail(error: Exception) -> None:
+    raise error
+
+
+def drain(log_queue: LogQueue) -> list[str]:
+    messages = []
+    while True:
+        try:
+            messages.append(log_queue.get_nowait().getMessage())
+        except queue.Empty:
+            return messages
+
+
+class TestLogQueue:
+    """Тесты для LogQueue"""
+
+    def test_should_return_records_in_original_order(self):
+        """Тест должен выдавать записи разных уровней в порядке поступления"""
+        # given
+        log_queue = LogQueue(maxsize=10)
+        for level, message in [(logging.INFO, "a"), (logging.DEBUG, "b"), (logging.ERROR, "c"), (logging.INFO, "d")]:
+            log_queue.put_nowait(make_record(level, message))
+
+        # when / then
+        assert drain(log_queue) == ["a", "b", "c", "d"]
+
+    def test_should_evict_debug_before_info_when_full(self):
+        """Тест должен при переполнении вытеснять сначала DEBUG, затем INFO, и сообщить о потерях"""
+        # given
+        log_queue = LogQueue(maxsize=3, overflow="drop_debug_first")
+        log_queue.put_nowait(make_record(logging.INFO, "info"))
+        log_queue.put_nowait(make_record(logging.DEBUG, "debug"))
+        log_queue.put_nowait(make_record(logging.WARNING, "warning"))
+
+        # when
+        log_queue.put_nowait(make_record(logging.ERROR, "error 1"))
+        log_queue.put_nowait(make_record(logging.ERROR, "error 2"))
+        log_queue.put_nowait(make_record(logging.DEBUG, "debug 2"))
+
+        # then
+        messages = drain(log_queue)
+        assert messages[0] == "Log queue overflow, records dropped - DEBUG: 2, INFO: 1"
+        assert messages[1:] == ["warning", "error 1", "error 2"]
+
+    def test_should_format_overflow_record_with_configured_format(self):
+        """Тест должен отформатировать запись о потерях форматом LOG_FORMAT, минуя RequestIdFilter"""
+        # given
+        log_queue = LogQueue(maxsize=1, overflow="drop_new")
+        log_queue.put_nowait(make_record(logging.INFO, "info"))
+        log_queue.put_nowait(make_record(logging.INFO, "dropped"))
+        formatter = logging.Formatter(fmt=settings.LOG_FORMAT)
+
+        # when
+        line = formatter.format(log_queue.get_nowait())
+
+        # then
+        assert line.endswith("- WARNING - [-] Log queue overflow, records dropped - INFO: 1")
+
+    def test_should_drop_new_records_when_configured(self):
+        """Тест должен отбрасывать новую запись при политике drop_new"""
+        # given
+        log_queue = LogQueue(maxsize=1, overflow="drop_new")
+        log_queue.put_nowait(make_record(logging.DEBUG, "debug"))
+
+        # when
+        log_queue.put_nowait(make_record(logging.ERROR, "error"))
+
+        # then
+        assert drain(log_queue) == ["Log queue overflow, records dropped - ERROR: 1", "debug"]
+
+    def test_should_accept_stop_sentinel_when_full(self):
+        """Тест должен принять сигнал остановки listener'а даже в заполненную очередь"""
+        # given
+        log_queue = LogQueue(maxsize=1)
+        log_queue.put_nowait(make_record(logging.WARNING, "warning"))
+
+        # when
+        log_queue.put_nowait(None)
+
+        # then
+        assert log_queue.get_nowait().getMessage() == "warning"
+        assert log_queue.get_nowait() is None
+
+    def test_should_reject_unknown_policy(self):
+        """Тест должен отклонить неизвестную политику переполнения"""
+        # when / then
+        with pytest.raises(ValueError, match="Unknown log queue overflow policy"):
+            LogQueue(maxsize=1, overflow="block")
+
+    def test_should_deliver_records_to_handlers_through_listener(self):
+        """Тест должен доставить записи обработчикам в потоке listener'а до возврата из stop()"""
+        # given
+        log_queue = LogQueue(maxsize=100)
+        handler = logging.handlers.BufferingHandler(capacity=100)
+        listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        logger = logging.getLogger("test_logging_config")
+        queue_handler = LogQueueHandler(log_queue)
+        logger.addHandler(queue_handler)
+        logger.propagate = False
+        listener.start()
+
+        # when
+        try:
+            logger.warning("value %s", 42)
+            try:
+                fail(RuntimeError("boom"))
+            except RuntimeError:
+                logger.exception("failed")
+        finally:
+            listener.stop()
+            logger.removeHandler(queue_handler)
+
+        # then
+        assert [record.getMessage() for record in handler.buffer] == ["value 42", "failed"]
+        assert "RuntimeError: boom" in handler.buffer[1].exc_text
+
+
+class CountingStr:
+    """Аргумент сообщения, который считает, сколько раз его превращали в строку"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __str__(self) -> str:
+        self.calls += 1
+        return "value"
+
+
+@pytest.fixture
+def buffer_logger():
+    logger = logging.getLogger("test_structured")
+    handler = logging.handlers.BufferingHandler(capacity=100)
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    yield StructuredLogger(logger), handler
+    logger.removeHandler(handler)
+
+
+class TestStructuredLogger:
+    """Тесты для StructuredLogger"""
+
+    def test_should_not_build_message_for_disabled_level(self, buffer_logger):
+        """Тест должен не собирать сообщение и не создавать запись для отключенного уровня"""
+        # given
+        logger, handler = buffer_logger
+        argument = CountingStr()
+
+        # when
+        logger.debug("Getting %(value)s", value=argument)
+
+        # then
+        assert argument.calls == 0
+        assert handler.buffer == []
+
+    def test_should_fill_message_and_fields_from_keywords(self, buffer_logger):
+        """Тест должен подставить именованные аргументы в сообщение и сохранить их полями записи"""
+        # given
+        logger, handler = buffer_logger
+
+        # when
+        logger.info("Retrieved %(count)d %(model)s objects", count=3, model="User")
+
+        # then
+        record = handler.buffer[0]
+        assert record.getMessage() == "Retrieved 3 User objects"
+        assert record.fields == {"count": 3, "model": "User"}
+
+    def test_should_report_caller_location(self, buffer_logger):
+        """Тест должен указывать в записи место вызова логгера, а не адаптер"""
+        # given
+        logger, handler = buffer_logger
+
+        # when
+        logger.warning("here")
+        logger.log(logging.WARNING, "there")
+
+        # then
+        assert [record.funcName for record in handler.buffer] == ["test_should_report_caller_location"] * len(
+            handler.buffer
+        )
+
+
+class TestJsonFormatter:
+    """Тесты для JsonFormatter"""
+
+    def test_should_format_record_with_fields_and_exception(self, buffer_logger):
+        """Тест должен вывести запись одной JSON строкой с полями контекста и traceback"""
+        # given
+        logger, handler = buffer_logger
+        try:
+            fail(ValueError("bad"))
+        except ValueError:
+            logger.exception("Error getting %(model)s", model="Project")
+
+        # when
+        entry = json.loads(JsonFormatter().format(handler.buffer[0]))
+
+        # then
+        assert entry["level"] == "ERROR"
+        assert entry["logger"] == "test_structured"
+        assert entry["message"] == "Error getting Project"
+        assert entry["model"] == "Project"
+        assert "ValueError: bad" in entry["exception"]
+
+
+class TestSamplingFilter:
+    """Тесты для SamplingFilter"""
+
+    def test_should_sample_only_matching_records(self, buffer_logger):
+        """Тест должен отбрасывать записи под правилом и пропускать остальные уровни и сообщения"""
+        # given
+        logger, handler = buffer_logger
+        handler.addFilter(SamplingFilter({"test_*:INFO:Retrieved %(count)d*": 0}))
+
+        # when
+        logger.info("Retrieved %(count)d objects", count=1)
+        logger.info("Created %(id)s", id=1)
+        logger.warning("Retrieved %(count)d objects", count=2)
+
+        # then
+        assert [record.getMessage() for record in handler.buffer] == ["Created 1", "Retrieved 2 objects"]
+
+    def test_should_reuse_decision_across_handlers(self):
+        """Тест должен принимать решение один раз на запись, а не на каждый обработчик"""
+        # given
+        sampling_filter = SamplingFilter({"test:INFO": 0.5})
+        record = make_record(logging.INFO, "message")
+
+        # when
+        decisions = {sampling_filter.filter(record) for _ in range(20)}
+
+        # then
+        assert len(decisions) == 1
+
+    @pytest.mark.parametrize("rules", [{"test:LOUD": 0.5}, {"test:INFO": 2}])
+    def test_should_reject_invalid_rule(self, rules):
+        """Тест должен отклонить правило с неизвестным уровнем или долей вне [0, 1]"""
+        # when / then
+        with pytest.raises(ValueError, match="Invalid log sampling rule"):
+            SamplingFilter(rules)
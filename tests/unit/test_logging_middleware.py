@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import logging
+import logging.handlers
+import uuid
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from src.core.logging_config import RequestIdFilter
+from src.core.middleware.logging_middleware import LoggingMiddleware, setup_logging_middleware
+from src.core.request_context import get_request_id
+from src.core.sql_instrumentation import get_query_stats
+
+# Константы для тестов
+EXPECTED_DB_QUERIES = 2
+
+
+@pytest.fixture
+def app() -> FastAPI:
+    app = FastAPI()
+    setup_logging_middleware(app)
+
+    @app.get("/items")
+    async def items() -> dict:
+        return {"request_id": get_request_id()}
+
+    @app.get("/queries")
+    async def queries() -> dict:
+        stats = get_query_stats()
+        stats.record("SELECT ?", 0.002)
+        stats.record("SELECT ?", 0.0015)
+        return {}
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "ok"}
+
+    @app.get("/missing")
+    async def missing() -> None:
+        raise ValueError("boom")
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for index in range(3):
+                yield f"chunk {index}\n".encode()
+
+        return StreamingResponse(chunks())
+
+    return app
+
+
+@pytest.fixture
+def records():
+    logger = logging.getLogger(LoggingMiddleware.__name__)
+    handler = logging.handlers.BufferingHandler(capacity=100)
+    handler.addFilter(RequestIdFilter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield handler.buffer
+    logger.removeHandler(handler)
+
+
+async def request(app: FastAPI, path: str, headers: dict[str, str] | None = None) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path, headers=headers)
+
+
+class TestLoggingMiddleware:
+    """Тесты для LoggingMiddleware"""
+
+    async def test_should_log_request_with_generated_request_id(self, app, records):
+        """Тест должен назначить запросу id, вернуть его в заголовке и добавить в логи и контекст"""
+        # when
+        response = await request(app, "/items", headers={"X-Forwarded-For": "10.0.0.1, 10.0.0.2"})
+
+        # then
+        request_id = response.headers["X-Request-ID"]
+        assert uuid.UUID(request_id).hex == request_id
+        assert response.json() == {"request_id": request_id}
+        assert float(response.headers["X-Process-Time"]) >= 0
+        message = records[0].getMessage()
+        assert message.startswith("Request completed - GET /items - Status: 200 - Time: ")
+        assert message.endswith(" - IP: 10.0.0.1 - User: Anonymous")
+        assert records[0].request_id == request_id
+        assert get_request_id() is None
+
+    @pytest.mark.parametrize(
+        ("incoming", "reused"),
+        [("req-42.abc_DEF", True), ("bad id\r\nX-Injected: 1", False), ("x" * 129, False)],
+    )
+    async def test_should_reuse_only_safe_incoming_request_id(self, app, incoming, reused):
+        """Тест должен принять X-Request-ID клиента только в безопасном виде"""
+        # when
+        response = await request(app, "/items", headers={"X-Request-ID": incoming})
+
+        # then
+        assert (response.headers["X-Request-ID"] == incoming) is reused
+
+    async def test_should_not_log_excluded_paths(self, app, records):
+        """Тест должен пропустить логирование исключенных путей, но вернуть id запроса"""
+        # when
+        response = await request(app, "/health")
+
+        # then
+        assert records == []
+        assert "X-Process-Time" not in response.headers
+        assert "X-Request-ID" in response.headers
+
+    async def test_should_log_failed_request(self, app, records):
+        """Тест должен залогировать исключение приложения с id запроса"""
+        # when
+        response = await request(app, "/missing", headers={"X-Request-ID": "failing"})
+
+        # then
+        assert response.status_code == httpx.codes.INTERNAL_SERVER_ERROR
+        assert records[0].getMessage().startswith("Request failed - GET /missing - Time: ")
+        assert records[0].exc_info[0] is ValueError
+        assert records[0].request_id == "failing"
+
+    async def test_should_pass_streaming_response_through(self, app, records):
+        """Тест должен отдать потоковый ответ целиком с заголовками времени и id"""
+        # when
+        response = await request(app, "/stream")
+
+        # then
+        assert response.text == "chunk 0\nchunk 1\nchunk 2\n"
+        assert "X-Process-Time" in response.headers
+        assert records[0].getMessage().startswith("Request completed - GET /stream - Status: 200")
+
+    async def test_should_report_request_queries_in_server_timing(self, app, records):
+        """Тест должен вернуть число запросов и время в БД в Server-Timing и записать их в лог"""
+        # when
+        response = await request(app, "/queries")
+
+        # then
+        db_timing, app_timing = response.headers["Server-Timing"].split(", ")
+        assert db_timing == 'db;dur=3.5;desc="2 queries"'
+        assert app_timing.startswith("app;dur=")
+        assert records[0].fields["db_queries"] == EXPECTED_DB_QUERIES
+        assert " - DB: 2 queries 0.004s - " in records[0].getMessage()
+        assert get_query_stats() is None
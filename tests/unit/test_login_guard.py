@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from src.core.login_guard import NegativeEmailCache, TokenBucketLimiter
+
+
+class TestTokenBucketLimiter:
+    """Тесты для TokenBucketLimiter"""
+
+    def test_should_allow_capacity_then_report_retry_after(self):
+        """Тест должен пропустить capacity попыток и вернуть время до следующей"""
+        # given
+        limiter = TokenBucketLimiter(capacity=2, refill_per_second=0.5, max_keys=10)
+
+        with patch("src.core.login_guard.time.monotonic", return_value=100.0):
+            # when
+            results = [limiter.acquire("10.0.0.1") for _ in range(3)]
+
+        # then
+        assert results == [0.0, 0.0, 2.0]
+
+    def test_should_refill_and_evict_least_recent_keys(self):
+        """Тест должен пополнять ведро со временем и ограничивать число ключей"""
+        # given
+        limiter = TokenBucketLimiter(capacity=1, refill_per_second=1.0, max_keys=1)
+
+        with patch("src.core.login_guard.time.monotonic", return_value=100.0):
+            limiter.acquire("10.0.0.1")
+            limiter.acquire("10.0.0.2")
+
+        # when
+        with patch("src.core.login_guard.time.monotonic", return_value=100.5):
+            evicted = limiter.acquire("10.0.0.1")
+            throttled = limiter.acquire("10.0.0.1")
+
+        # then
+        assert evicted == 0.0
+        assert throttled == 1.0
+
+
+class TestNegativeEmailCache:
+    """Тесты для NegativeEmailCache"""
+
+    def test_should_expire_unknown_email_after_ttl(self):
+        """Тест должен забыть email после истечения TTL"""
+        # given
+        cache = NegativeEmailCache(ttl_seconds=30, max_size=10)
+
+        with patch("src.core.login_guard.time.monotonic", return_value=100.0):
+            cache.add("unknown@example.com")
+
+        # when / then
+        with patch("src.core.login_guard.time.monotonic", return_value=129.0):
+            assert "unknown@example.com" in cache
+        with patch("src.core.login_guard.time.monotonic", return_value=130.0):
+            assert "unknown@example.com" not in cache
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.core.metrics import MetricsRegistry, http_requests_in_progress, http_requests_total
+from src.core.middleware.metrics_middleware import UNMATCHED_ROUTE, setup_metrics_middleware
+
+# Константы для тестов
+EXPECTED_ROUTE_REQUESTS = 2
+
+
+@pytest.fixture
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def make_registry(directory=None) -> MetricsRegistry:
+    registry = MetricsRegistry(str(directory) if directory else None, flush_interval_seconds=60)
+    registry.counter("requests_total", "Requests", ("route",))
+    registry.gauge("in_progress", "In progress")
+    registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    return registry
+
+
+def write_snapshot(directory, name: str, snapshot: dict) -> None:
+    (directory / name).write_text(json.dumps(snapshot))
+
+
+class TestMetricsRegistry:
+    """Тесты для MetricsRegistry"""
+
+    async def test_should_render_prometheus_text(self):
+        """Тест должен вывести счетчики, gauge и накопительные bucket'ы гистограммы"""
+        # given
+        registry = MetricsRegistry(None, flush_interval_seconds=60)
+        requests = registry.counter("requests_total", "Requests", ("route",))
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        requests.inc('/a "quoted"\n')
+        requests.inc('/a "quoted"\n', amount=2)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+
+        # when
+        text = await registry.exposition()
+
+        # then
+        assert text.splitlines() == [
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1.0"} 3',
+            'latency_seconds_bucket{le="+Inf"} 4',
+            "latency_seconds_sum 3.65",
+            "latency_seconds_count 4",
+            "# HELP requests_total Requests",
+            "# TYPE requests_total counter",
+            'requests_total{route="/a \\"quoted\\"\\n"} 3.0',
+        ]
+
+    async def test_should_sum_worker_snapshots_and_skip_gauges_of_finished_workers(self, tmp_path, dead_pid):
+        """Тест должен сложить счетчики всех воркеров, а gauge — только живых"""
+        # given
+        registry = make_registry(tmp_path)
+        registry.start()
+        other = make_registry()
+        other._metrics["requests_total"].inc("/a", amount=5)
+        other._metrics["in_progress"].inc(amount=7)
+        other._metrics["latency_seconds"].observe(0.5)
+        write_snapshot(tmp_path, "metrics-dead.json", {**other.snapshot(), "pid": dead_pid})
+        registry._metrics["requests_total"].inc("/a")
+        registry._metrics["in_progress"].inc()
+
+        # when
+        try:
+            text = await registry.exposition()
+        finally:
+            await registry.shutdown()
+
+        # then
+        lines = text.splitlines()
+        assert 'requests_total{route="/a"} 6.0' in lines
+        assert "in_progress 1.0" in lines
+        assert "latency_seconds_count 1" in lines
+
+    async def test_should_compact_snapshots_of_finished_workers(self, tmp_path, dead_pid):
+        """Тест должен свернуть снимки завершившихся воркеров в архив без потери счетчиков"""
+        # given
+        other = make_registry()
+        other._metrics["requests_total"].inc("/a", amount=5)
+        for name in ("metrics-1.json", "metrics-2.json"):
+            write_snapshot(tmp_path, name, {**other.snapshot(), "pid": dead_pid})
+        registry = make_registry(tmp_path)
+
+        # when
+        registry.start()
+        try:
+            text = await registry.exposition()
+        finally:
+            await registry.shutdown()
+
+        # then
+        assert sorted(path.name for path in tmp_path.glob("metrics-*.json")) == [registry._snapshot_path.name]
+        assert (tmp_path / "archive.json").exists()
+        assert 'requests_total{route="/a"} 10.0' in text.splitlines()
+
+    async def test_should_keep_counters_after_shutdown(self, tmp_path):
+        """Тест должен оставить счетчики остановленного воркера в снимке, а gauge убрать"""
+        # given
+        registry = make_registry(tmp_path)
+        registry.start()
+        registry._metrics["requests_total"].inc("/a")
+
+        # when
+        await registry.shutdown()
+
+        # then
+        snapshot = json.loads(registry._snapshot_path.read_text())
+        assert snapshot["pid"] == os.getpid()
+        assert snapshot["metrics"]["requests_total"]["samples"] == [[["/a"], 1.0]]
+        assert "in_progress" not in snapshot["metrics"]
+
+    def test_should_reject_duplicate_metric(self):
+        """Тест должен отклонить повторную регистрацию метрики с тем же именем"""
+        # given
+        registry = make_registry()
+
+        # when / then
+        with pytest.raises(ValueError, match="Metric already registered"):
+            registry.counter("requests_total", "Requests")
+
+
+class TestMetricsMiddleware:
+    """Тесты для MetricsMiddleware"""
+
+    @pytest.fixture
+    def app(self) -> FastAPI:
+        app = FastAPI()
+        setup_metrics_middleware(app)
+
+        @app.get("/metrics-test/{item_id}")
+        async def item(item_id: int) -> dict:
+            return {"id": item_id}
+
+        return app
+
+    async def test_should_count_requests_by_route_template(self, app):
+        """Тест должен считать запросы по шаблону маршрута, а не по фактическому пути"""
+        # given
+        route = "/metrics-test/{item_id}"
+        before = http_requests_total._values[("GET", route, "200")]
+        unmatched_before = http_requests_total._values[("GET", UNMATCHED_ROUTE, "404")]
+
+        # when
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for item_id in range(EXPECTED_ROUTE_REQUESTS):
+                await client.get(f"/metrics-test/{item_id}")
+            await client.get("/unknown")
+
+        # then
+        assert http_requests_total._values[("GET", route, "200")] - before == EXPECTED_ROUTE_REQUESTS
+        assert http_requests_total._values[("GET", UNMATCHED_ROUTE, "404")] - unmatched_before == 1
+        assert http_requests_in_progress._values[("GET",)] == 0
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+from fastapi import status
+
+from src.core.config import settings
+from src.core.exceptions import ServiceUnavailableError
+from src.core.password_executor import PasswordExecutor, build_password_hash
+
+
+class TestPasswordExecutor:
+    """Тесты для PasswordExecutor"""
+
+    async def test_should_hash_and_verify_password_in_thread_pool(self):
+        """Тест должен хешировать и проверять пароль вне event loop"""
+        # given
+        executor = PasswordExecutor(kind="thread", max_workers=1, max_pending=4)
+
+        try:
+            # when
+            hashed = await executor.hash("password")
+
+            # then
+            assert await executor.verify("password", hashed) is True
+            assert await executor.verify("wrong_password", hashed) is False
+        finally:
+            executor.shutdown()
+
+    async def test_should_reject_when_queue_is_full(self):
+        """Тест должен сразу вернуть 503, если очередь заполнена"""
+        # given
+        executor = PasswordExecutor(kind="thread", max_workers=1, max_pending=0)
+
+        # when / then
+        with pytest.raises(ServiceUnavailableError) as exc_info:
+            await executor.hash("password")
+
+        assert exc_info.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert exc_info.value.headers == {"Retry-After": "1"}
+
+    def test_should_detect_hash_with_outdated_parameters(self):
+        """Тест должен требовать перехеширование только для argon2 хешей со старыми параметрами"""
+        # given
+        executor = PasswordExecutor(kind="thread", max_workers=1, max_pending=4)
+        outdated = build_password_hash(time_cost=1, memory_cost=8 * 1024, parallelism=1).hash("password")
+        current = build_password_hash(
+            time_cost=settings.ARGON2_TIME_COST,
+            memory_cost=settings.ARGON2_MEMORY_COST,
+            parallelism=settings.ARGON2_PARALLELISM,
+        ).hash("password")
+
+        # when / then
+        assert executor.needs_rehash(outdated) is True
+        assert executor.needs_rehash(current) is False
+        assert executor.needs_rehash("$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewdBPj8jJLx1V1e.") is False
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+from src.core.session_activity import SessionActivityBuffer
+
+
+def make_engine(execute: AsyncMock) -> Mock:
+    @asynccontextmanager
+    async def begin():
+        yield Mock(execute=execute)
+
+    return Mock(begin=begin)
+
+
+class TestSessionActivityBuffer:
+    """Тесты для SessionActivityBuffer"""
+
+    async def test_should_flush_latest_activity_in_single_update(self):
+        """Тест должен записать только последнее время каждой сессии одним UPDATE"""
+        # given
+        execute = AsyncMock(return_value=Mock(rowcount=2))
+        buffer = SessionActivityBuffer(make_engine(execute), flush_interval=10, max_pending=100)
+        now = datetime.now(UTC)
+
+        buffer.record("s1", now - timedelta(seconds=5))
+        buffer.record("s1", now)
+        buffer.record("s1", now - timedelta(seconds=3))
+        buffer.record("s2", now)
+
+        # when
+        updated = await buffer.flush()
+
+        # then
+        assert updated == execute.return_value.rowcount
+        assert len(buffer) == 0
+        execute.assert_awaited_once()
+        statement = execute.await_args.args[0]
+        assert str(statement).startswith("UPDATE session SET last_activity")
+
+    async def test_should_keep_pending_activity_when_flush_fails(self):
+        """Тест должен вернуть значения в буфер, если запись в БД не удалась"""
+        # given
+        execute = AsyncMock(side_effect=ConnectionError("database is unavailable"))
+        buffer = SessionActivityBuffer(make_engine(execute), flush_interval=10, max_pending=100)
+        buffer.record("s1", datetime.now(UTC))
+
+        # when
+        updated = await buffer.flush()
+
+        # then
+        assert updated == 0
+        assert len(buffer) == 1
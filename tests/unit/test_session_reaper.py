@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from src.core.session_reaper import QUERY_CANCELED, SessionReaper
+
+# Константы для тестов
+EXPECTED_REAPED_COUNT = 3
+
+
+def make_reaper(conn: Mock, batch_size: int = 2) -> SessionReaper:
+    @asynccontextmanager
+    async def context():
+        yield conn
+
+    engine = Mock(connect=context, begin=context)
+    return SessionReaper(
+        engine, interval_seconds=60, batch_size=batch_size, batch_time_budget_ms=10_000, retention_days=90
+    )
+
+
+def ids_result(ids: list[str]) -> Mock:
+    result = Mock()
+    result.scalars.return_value.all.return_value = ids
+    return result
+
+
+class TestSessionReaper:
+    """Тесты для SessionReaper"""
+
+    async def test_should_skip_run_when_lock_is_held_by_another_worker(self):
+        """Тест должен пропустить проход, если advisory lock занят"""
+        # given
+        conn = Mock(scalar=AsyncMock(return_value=False), commit=AsyncMock(), execute=AsyncMock())
+        reaper = make_reaper(conn)
+
+        # when
+        result = await reaper.run_once()
+
+        # then
+        assert result is None
+        conn.execute.assert_not_awaited()
+
+    async def test_should_stream_batches_with_keyset(self):
+        """Тест должен обрабатывать пачки, продолжая после последнего id, до неполной пачки"""
+        # given
+        conn = Mock(execute=AsyncMock(side_effect=[None, ids_result(["a", "b"]), None, ids_result(["c"])]))
+        reaper = make_reaper(conn)
+        build_batch = Mock(return_value="batch")
+
+        # when
+        total = await reaper._stream(build_batch)
+
+        # then
+        assert total == EXPECTED_REAPED_COUNT
+        assert [call.args[0] for call in build_batch.call_args_list] == ["", "b"]
+
+    async def test_should_halve_batch_size_after_statement_timeout(self):
+        """Тест должен уменьшить пачку, если она не уложилась в statement_timeout"""
+        # given
+        timeout_error = DBAPIError("UPDATE session", {}, Mock(sqlstate=QUERY_CANCELED))
+        conn = Mock(execute=AsyncMock(side_effect=[None, timeout_error, None, ids_result([])]))
+        reaper = make_reaper(conn, batch_size=400)
+        build_batch = Mock(return_value="batch")
+
+        # when
+        total = await reaper._stream(build_batch)
+
+        # then
+        assert total == 0
+        assert [call.args[1] for call in build_batch.call_args_list] == [400, 200]
+
+    async def test_should_raise_other_database_errors(self):
+        """Тест должен пробрасывать ошибки БД, не связанные с таймаутом"""
+        # given
+        error = DBAPIError("UPDATE session", {}, Mock(sqlstate="08006"))
+        conn = Mock(execute=AsyncMock(side_effect=[None, error]))
+        reaper = make_reaper(conn)
+
+        # when / then
+        with pytest.raises(DBAPIError):
+            await reaper._stream(Mock(return_value="batch"))
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+from src.model.models import Session
+from src.repository.session_repository import SessionRepository
+
+# Константы для тестов
+EXPECTED_ACTIVE_SESSIONS = 2
+
+
+def make_repository(result: Mock) -> SessionRepository:
+    uow = Mock()
+    uow.session.execute = AsyncMock(return_value=result)
+    return SessionRepository(uow)
+
+
+class TestSessionRepository:
+    """Тесты для SessionRepository"""
+
+    async def test_should_set_current_session_in_single_statement(self):
+        """Тест должен переключить текущую сессию одним UPDATE"""
+        # given
+        result = Mock()
+        result.all.return_value = [
+            SimpleNamespace(id="old-session", is_current=False),
+            SimpleNamespace(id="new-session", is_current=True),
+        ]
+        repository = make_repository(result)
+
+        # when
+        success = await repository.set_current_session(1, "new-session")
+
+        # then
+        assert success is True
+        repository.uow.session.execute.assert_awaited_once()
+        statement = str(repository.uow.session.execute.await_args.args[0])
+        assert statement.startswith("UPDATE session SET")
+        assert "RETURNING" in statement
+
+    async def test_should_not_set_foreign_session_as_current(self):
+        """Тест должен вернуть False, если сессия не принадлежит пользователю"""
+        # given
+        result = Mock()
+        result.all.return_value = [SimpleNamespace(id="old-session", is_current=False)]
+        repository = make_repository(result)
+
+        # when
+        success = await repository.set_current_session(1, "foreign-session")
+
+        # then
+        assert success is False
+
+    async def test_should_terminate_sessions_in_single_statement(self):
+        """Тест должен завершить несколько сессий одним UPDATE и сохранить порядок ID"""
+        # given
+        result = Mock()
+        result.scalars.return_value.all.return_value = ["s3", "s1"]
+        repository = make_repository(result)
+
+        # when
+        terminated = await repository.terminate_sessions(["s1", "s2", "s3"])
+
+        # then
+        assert terminated == ["s1", "s3"]
+        repository.uow.session.execute.assert_awaited_once()
+
+    async def test_should_skip_query_for_empty_session_list(self):
+        """Тест должен не обращаться к БД для пустого списка сессий"""
+        # given
+        repository = make_repository(Mock())
+
+        # when
+        terminated = await repository.terminate_sessions([])
+
+        # then
+        assert terminated == []
+        repository.uow.session.execute.assert_not_awaited()
+
+    async def test_should_get_dashboard_in_single_statement(self):
+        """Тест должен получить счетчики и активные сессии одним запросом"""
+        # given
+        current = Session(id="s1", user_id=1, is_active=True, is_current=True)
+        other = Session(id="s2", user_id=1, is_active=True, is_current=False)
+        result = Mock()
+        result.all.return_value = [
+            SimpleNamespace(Session=current, total=5, active=2),
+            SimpleNamespace(Session=other, total=5, active=2),
+        ]
+        repository = make_repository(result)
+
+        # when
+        dashboard = await repository.get_dashboard(1)
+
+        # then
+        repository.uow.session.execute.assert_awaited_once()
+        assert dashboard.total_sessions == result.all.return_value[0].total
+        assert dashboard.active_sessions == EXPECTED_ACTIVE_SESSIONS
+        assert dashboard.current_session is current
+
+    async def test_should_get_empty_dashboard_without_active_sessions(self):
+        """Тест должен вернуть счетчики, даже если активных сессий нет"""
+        # given
+        result = Mock()
+        result.all.return_value = [SimpleNamespace(Session=None, total=3, active=0)]
+        repository = make_repository(result)
+
+        # when
+        dashboard = await repository.get_dashboard(1)
+
+        # then
+        assert dashboard.total_sessions == result.all.return_value[0].total
+        assert dashboard.active_sessions == 0
+        assert dashboard.sessions == []
+        assert dashboard.current_session is None
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session as OrmSession
+from sqlalchemy.util import greenlet_spawn
+
+from src.core.session_store import MemorySessionStore, SessionSnapshot
+from src.model.models import Session
+from src.repository.session_repository import SessionRepository
+from src.services.session_service import SessionService
+
+# Константы для тестов
+EXPECTED_DASHBOARD_QUERIES = 2
+
+
+def make_session(session_id: str, *, is_current: bool) -> Session:
+    now = datetime.now(UTC)
+    return Session(
+        id=session_id,
+        user_id=1,
+        device_name="Desktop",
+        browser_name="Chrome",
+        operating_system="Linux",
+        device_type="desktop",
+        ip_address="127.0.0.1",
+        created_at=now,
+        last_activity=now,
+        expires_at=now + timedelta(days=1),
+        is_active=True,
+        is_current=is_current,
+    )
+
+
+@pytest.fixture
+def execute() -> AsyncMock:
+    result = Mock()
+    result.all.return_value = [
+        SimpleNamespace(Session=make_session("s1", is_current=True), total=3, active=2),
+        SimpleNamespace(Session=make_session("s2", is_current=False), total=3, active=2),
+    ]
+    return AsyncMock(return_value=result)
+
+
+@pytest.fixture
+def session_store() -> AsyncMock:
+    return AsyncMock()
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite://")
+    with OrmSession(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def session_service(execute: AsyncMock, session_store: AsyncMock, db_session) -> SessionService:
+    uow = Mock()
+    uow.session.execute = execute
+    # Коммит выполняется синхронной сессией внутри greenlet, как это делает AsyncSession
+    uow.session.info = db_session.info
+    return SessionService(SessionRepository(uow), session_store)
+
+
+class TestSessionService:
+    """Тесты для SessionService"""
+
+    @pytest.mark.parametrize("view", ["get_user_sessions", "get_session_stats", "get_sessions_summary"])
+    async def test_should_render_view_with_single_query(self, session_service, execute, view):
+        """Тест должен выполнить ровно один запрос к БД для каждого представления"""
+        # when
+        await getattr(session_service, view)(1)
+
+        # then
+        execute.assert_awaited_once()
+
+    async def test_should_share_dashboard_between_views(self, session_service, execute):
+        """Тест должен переиспользовать сводку всеми представлениями в рамках запроса"""
+        # when
+        sessions = await session_service.get_user_sessions(1)
+        stats = await session_service.get_session_stats(1)
+        summary = await session_service.get_sessions_summary(1)
+
+        # then
+        execute.assert_awaited_once()
+        assert sessions.current_session_id == "s1"
+        assert stats.current_session.session_id == "s1"
+        assert stats.total_sessions == execute.return_value.all.return_value[0].total
+        assert summary["total_active"] == len(sessions.sessions)
+
+    async def test_should_reload_dashboard_after_mutation(self, session_service, execute):
+        """Тест должен перечитать сводку после изменения сессий"""
+        # given
+        await session_service.get_session_stats(1)
+        session_service._repository.set_current_session = AsyncMock(return_value=True)
+
+        # when
+        await session_service.set_current_session(1, "s2")
+        await session_service.get_session_stats(1)
+
+        # then
+        assert execute.await_count == EXPECTED_DASHBOARD_QUERIES
+
+    async def test_should_validate_session_from_store_without_database(self, session_service, session_store, execute):
+        """Тест должен проверить сессию и отметить активность через хранилище, не обращаясь к БД"""
+        # given
+        session_store.get.return_value = SessionSnapshot.from_session(make_session("s1", is_current=True))
+
+        # when
+        is_valid = await session_service.validate_session("s1", 1)
+
+        # then
+        assert is_valid is True
+        session_store.touch.assert_awaited_once()
+        execute.assert_not_awaited()
+
+    async def test_should_reject_foreign_session(self, session_service, session_store):
+        """Тест должен отклонить сессию другого пользователя"""
+        # given
+        session_store.get.return_value = SessionSnapshot.from_session(make_session("s1", is_current=True))
+
+        # when
+        is_valid = await session_service.validate_session("s1", 2)
+
+        # then
+        assert is_valid is False
+        session_store.touch.assert_not_awaited()
+
+    async def test_should_discard_terminated_session_from_store_after_commit(
+        self, session_service, session_store, db_session
+    ):
+        """Тест должен убрать завершенную сессию из хранилища только после коммита"""
+        # given
+        session_service._repository.terminate_session = AsyncMock(return_value=True)
+
+        # when
+        await session_service.terminate_session("s1")
+        discarded_before_commit = session_store.discard.await_count
+        await greenlet_spawn(db_session.commit)
+
+        # then
+        assert discarded_before_commit == 0
+        session_store.discard.assert_awaited_once_with({"s1"})
+
+    async def test_should_not_keep_session_cached_between_mutation_and_commit(self, session_service, db_session):
+        """Тест должен не оставлять в кэше активную сессию, прочитанную до коммита ее завершения"""
+        # given
+        sink = AsyncMock()
+        sink.load.return_value = SessionSnapshot.from_session(make_session("s1", is_current=True))
+        store = MemorySessionStore(sink, max_size=100, ttl_seconds=60)
+        session_service._store = store
+        session_service._repository.terminate_session = AsyncMock(return_value=True)
+
+        # when
+        await session_service.terminate_session("s1")
+        # Параллельный запрос до коммита видит прежнюю активную строку и кэширует ее
+        before_commit = await store.get("s1", db_session)
+        sink.load.return_value = replace(sink.load.return_value, is_active=False)
+        await greenlet_spawn(db_session.commit)
+        after_commit = await store.get("s1", db_session)
+
+        # then
+        assert before_commit.is_active is True
+        assert after_commit.is_active is False
+        assert await session_service.validate_session("s1", 1) is False
+
+    async def test_should_forget_pending_discards_on_rollback(self, session_service, session_store, db_session):
+        """Тест должен не сбрасывать хранилище, если транзакция откатилась"""
+        # given
+        session_service._repository.set_current_session = AsyncMock(return_value=True)
+        db_session.begin()
+        await session_service.set_current_session(1, "s2")
+
+        # when
+        db_session.rollback()
+        await greenlet_spawn(db_session.commit)
+
+        # then
+        session_store.discard_user.assert_not_awaited()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.core.session_store import MemorySessionStore, SessionSnapshot, SocketSessionStore, SqlSessionStore
+
+
+def make_snapshot(session_id: str = "s1", user_id: int = 1) -> SessionSnapshot:
+    now = datetime.now(UTC)
+    return SessionSnapshot(
+        id=session_id,
+        user_id=user_id,
+        created_at=now,
+        last_activity=now - timedelta(minutes=5),
+        expires_at=now + timedelta(days=1),
+    )
+
+
+@pytest.fixture
+def sink() -> AsyncMock:
+    sink = AsyncMock()
+    sink.load.return_value = make_snapshot()
+    return sink
+
+
+@pytest.fixture
+def db_session() -> AsyncMock:
+    return AsyncMock()
+
+
+class TestSqlSessionStore:
+    """Тесты для SqlSessionStore"""
+
+    async def test_should_buffer_only_stale_activity(self):
+        """Тест должен поставить в буфер устаревшую активность и пропустить свежую"""
+        # given
+        buffer = Mock()
+        store = SqlSessionStore(AsyncMock(), buffer)
+        stale = make_snapshot("s1")
+        now = datetime.now(UTC)
+        fresh = make_snapshot("s2").touched(now)
+
+        # when
+        touched = await store.touch(stale, now)
+        await store.touch(fresh, now)
+
+        # then
+        assert touched.last_activity == now
+        buffer.record.assert_called_once_with("s1", now)
+
+    async def test_should_read_through_request_session(self, db_session):
+        """Тест должен читать сессию в транзакции запроса, не открывая отдельного соединения"""
+        # given
+        db_engine = Mock()
+        store = SqlSessionStore(db_engine, Mock())
+        expected = make_snapshot()
+        db_session.execute.return_value = Mock()
+        db_session.execute.return_value.first.return_value = Mock(_mapping=expected.to_dict())
+
+        # when
+        snapshot = await store.get("s1", db_session)
+
+        # then
+        assert snapshot == expected
+        db_session.execute.assert_awaited_once()
+        db_engine.connect.assert_not_called()
+
+
+class TestMemorySessionStore:
+    """Тесты для MemorySessionStore"""
+
+    async def test_should_read_database_only_on_miss(self, db_session, sink):
+        """Тест должен прочитать сессию из БД один раз и дальше отдавать из памяти"""
+        # given
+        store = MemorySessionStore(sink, max_size=100, ttl_seconds=60)
+
+        # when
+        first = await store.get("s1", db_session)
+        second = await store.get("s1", db_session)
+
+        # then
+        assert first == second == sink.load.return_value
+        sink.load.assert_awaited_once_with("s1")
+
+    async def test_should_touch_cached_session_and_forward_to_sink(self, db_session, sink):
+        """Тест должен обновить активность в памяти и передать ее в БД"""
+        # given
+        store = MemorySessionStore(sink, max_size=100, ttl_seconds=60)
+        snapshot = await store.get("s1", db_session)
+        now = datetime.now(UTC)
+
+        # when
+        await store.touch(snapshot, now)
+
+        # then
+        assert (await store.get("s1", db_session)).last_activity == now
+        sink.touch.assert_awaited_once_with(snapshot, now)
+
+    async def test_should_skip_recent_activity(self, db_session, sink):
+        """Тест должен не записывать активность, если записанная достаточно свежая"""
+        # given
+        store = MemorySessionStore(sink, max_size=100, ttl_seconds=60)
+        snapshot = await store.get("s1", db_session)
+        now = snapshot.last_activity + timedelta(seconds=1)
+
+        # when
+        touched = await store.touch(snapshot, now)
+
+        # then
+        assert touched == snapshot
+        assert (await store.get("s1", db_session)).last_activity == snapshot.last_activity
+        sink.touch.assert_not_awaited()
+
+    async def test_should_discard_all_user_sessions(self, db_session, sink):
+        """Тест должен забыть все сессии пользователя"""
+        # given
+        store = MemorySessionStore(sink, max_size=100, ttl_seconds=60)
+        await store.save(make_snapshot("s1"))
+        await store.save(make_snapshot("s2"))
+
+        # when
+        await store.discard_user(1)
+        await store.get("s2", db_session)
+
+        # then
+        sink.load.assert_awaited_once_with("s2")
+
+
+class TestSocketSessionStore:
+    """Тесты для SocketSessionStore"""
+
+    async def test_should_share_cache_between_workers(self, db_session, sink, tmp_path):
+        """Тест должен отдавать второму воркеру сессию, загруженную первым"""
+        # given
+        path = str(tmp_path / "sessions.sock")
+        host = SocketSessionStore(sink, path, max_size=100, ttl_seconds=60)
+        worker = SocketSessionStore(sink, path, max_size=100, ttl_seconds=60)
+
+        try:
+            # when
+            loaded = await host.get("s1", db_session)
+            shared = await worker.get("s1", db_session)
+
+            # then
+            assert shared == loaded
+            sink.load.assert_awaited_once_with("s1")
+            db_session.execute.assert_not_awaited()
+        finally:
+            await worker.close()
+            await host.close()
+
+    async def test_should_fall_back_to_database_when_host_is_gone(self, db_session, sink, tmp_path):
+        """Тест должен читать из БД, если хост общего кэша остановился"""
+        # given
+        path = str(tmp_path / "sessions.sock")
+        host = SocketSessionStore(sink, path, max_size=100, ttl_seconds=60)
+        worker = SocketSessionStore(sink, path, max_size=100, ttl_seconds=60)
+        await host.get("s1", db_session)
+        await worker.get("s1", db_session)
+        await host.close()
+
+        try:
+            # when
+            snapshot = await worker.get("s1", db_session)
+
+            # then
+            assert snapshot == sink.load.return_value
+        finally:
+            await worker.close()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import logging
+import logging.handlers
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.core.config import settings
+from src.core.logging_config import RequestIdFilter
+from src.core.metrics import db_n_plus_one_total, db_queries_total
+from src.core.sql_instrumentation import (
+    QueryStats,
+    get_query_stats,
+    normalize_sql,
+    query_stats_var,
+    setup_sql_instrumentation,
+)
+
+# Константы для тестов
+EXPECTED_QUERY_COUNT = 2
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    setup_sql_instrumentation(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def records():
+    logger = logging.getLogger("src.core.sql_instrumentation")
+    handler = logging.handlers.BufferingHandler(capacity=100)
+    handler.addFilter(RequestIdFilter())
+    logger.addHandler(handler)
+    yield handler.buffer
+    logger.removeHandler(handler)
+
+
+@pytest.fixture
+def stats():
+    stats = QueryStats()
+    token = query_stats_var.set(stats)
+    yield stats
+    query_stats_var.reset(token)
+
+
+class TestNormalizeSql:
+    """Тесты для normalize_sql"""
+
+    def test_should_replace_literals_and_collapse_in_lists(self):
+        """Тест должен заменить литералы и списки плейсхолдеров одним знаком и убрать переносы"""
+        # given
+        statement = "SELECT sessions.id\nFROM sessions\nWHERE sessions.id IN ($1, $2, $3) AND name = 'o''k' LIMIT 10"
+
+        # when
+        normalized = normalize_sql(statement)
+
+        # then
+        assert normalized == "SELECT sessions.id FROM sessions WHERE sessions.id IN (?) AND name = ? LIMIT ?"
+
+    def test_should_keep_identifiers_with_digits(self):
+        """Тест должен сохранить цифры в именах таблиц и параметрах"""
+        # when
+        normalized = normalize_sql("SELECT t1.id FROM audit_logs_2024_01 AS t1 WHERE t1.id = $1")
+
+        # then
+        assert normalized == "SELECT t1.id FROM audit_logs_2024_01 AS t1 WHERE t1.id = $1"
+
+
+class TestSqlInstrumentation:
+    """Тесты для замеров SQL на движке"""
+
+    def test_should_count_queries_of_current_request(self, engine, stats):
+        """Тест должен посчитать запросы и время в БД текущего запроса"""
+        # given
+        before = db_queries_total._values[()]
+
+        # when
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+
+        # then
+        assert get_query_stats() is stats
+        assert stats.count == EXPECTED_QUERY_COUNT
+        assert stats.duration > 0
+        assert stats.statements == {"SELECT ?": EXPECTED_QUERY_COUNT}
+        assert db_queries_total._values[()] - before == stats.count
+
+    def test_should_report_repeated_statement_once_as_suspected_n_plus_one(self, engine, stats, records):
+        """Тест должен один раз за запрос отметить запрос, повторенный порог раз"""
+        # given
+        before = db_n_plus_one_total._values[()]
+        repeats = settings.DB_N_PLUS_ONE_THRESHOLD * 2
+
+        # when
+        with engine.connect() as connection:
+            for session_id in range(repeats):
+                connection.execute(text("SELECT :id AS id"), {"id": session_id})
+
+        # then
+        assert stats.suspected_n_plus_one == ["SELECT ? AS id"]
+        assert db_n_plus_one_total._values[()] - before == 1
+        assert [record.getMessage() for record in records] == [
+            f"Suspected N+1: statement executed {settings.DB_N_PLUS_ONE_THRESHOLD} times in one request: SELECT ? AS id"
+        ]
+
+    def test_should_log_slow_query_outside_request(self, engine, records, monkeypatch):
+        """Тест должен записать медленный запрос с нормализованным SQL и вне HTTP запроса"""
+        # given
+        monkeypatch.setattr(settings, "DB_SLOW_QUERY_THRESHOLD_SECONDS", 0.0)
+
+        # when
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 'secret' AS value"))
+
+        # then
+        assert get_query_stats() is None
+        assert len(records) == 1
+        assert records[0].levelno == logging.WARNING
+        assert records[0].fields["sql"] == "SELECT ? AS value"
+
+    def test_should_not_register_listeners_twice(self, engine, stats):
+        """Тест должен не подключать замеры повторно к тому же движку"""
+        # given
+        setup_sql_instrumentation(engine)
+
+        # when
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        # then
+        assert stats.count == 1
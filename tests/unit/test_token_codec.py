@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.core.token_codec import JoseBackend, PyJWTBackend, TokenCodec, TokenDecodeError
+
+SECRET_KEY = "test-secret-key-with-enough-length-for-hs256"
+
+
+def make_codec(backend=None) -> TokenCodec:
+    return TokenCodec(
+        backend=backend or JoseBackend(),
+        secret_key=SECRET_KEY,
+        algorithm="HS256",
+        cache_max_size=10,
+        cache_ttl_seconds=300,
+    )
+
+
+class TestTokenCodec:
+    """Тесты для TokenCodec"""
+
+    def test_should_serve_repeated_token_from_cache(self):
+        """Тест должен проверять подпись токена только при первом обращении"""
+        # given
+        codec = make_codec()
+        token = codec.encode({"sub": "test@example.com", "exp": int(time.time()) + 3600})
+
+        with patch.object(JoseBackend, "decode", autospec=True, side_effect=JoseBackend.decode) as mock_decode:
+            # when
+            first = codec.decode(token)
+            second = codec.decode(token)
+
+        # then
+        assert first == second
+        assert first["sub"] == "test@example.com"
+        mock_decode.assert_called_once()
+
+    def test_should_not_serve_cached_claims_after_exp(self):
+        """Тест должен заново проверять токен после exp, а не брать claims из кэша"""
+        # given
+        codec = make_codec()
+        claims = {"sub": "test@example.com", "exp": time.time() + 2}
+
+        with patch.object(JoseBackend, "decode", return_value=claims) as mock_decode:
+            codec.decode("token")
+            mock_decode.side_effect = TokenDecodeError("Signature has expired.")
+
+            # when / then
+            with (
+                patch("src.core.token_codec.time.monotonic", return_value=time.monotonic() + 5),
+                pytest.raises(TokenDecodeError),
+            ):
+                codec.decode("token")
+
+    def test_should_decode_tokens_with_pyjwt_backend(self):
+        """Тест должен одинаково проверять токены бэкендом PyJWT"""
+        # given
+        token = make_codec(JoseBackend()).encode({"sub": "test@example.com", "uid": 1})
+
+        # when
+        claims = make_codec(PyJWTBackend()).decode(token)
+
+        # then
+        assert claims == {"sub": "test@example.com", "uid": 1}
+        with pytest.raises(TokenDecodeError):
+            make_codec(PyJWTBackend()).decode(token + "x")
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import pytest
+
+from src.util.user_agent import UserAgentInfo, classify_user_agent
+
+# Корпус реальных User-Agent и ожидаемая классификация (совпадает с прежними методами AuthService)
+CORPUS = [
+    (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36",
+        UserAgentInfo("Chrome", "120.0.0.0", "Windows", "Desktop", "desktop"),
+    ),
+    (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36 Edg/120.0.2210.91",
+        UserAgentInfo("Edge", "120.0.2210.91", "Windows", "Desktop", "desktop"),
+    ),
+    (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0",
+        UserAgentInfo("Firefox", "121.0", "Windows", "Desktop", "desktop"),
+    ),
+    (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+        "Version/17.2 Safari/605.1.15",
+        UserAgentInfo("Safari", "17.2", "macOS", "Desktop", "desktop"),
+    ),
+    (
+        "Mozilla/5.0 (iPhone; CPU iPhone OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+        "Version/17.2 Mobile/15E148 Safari/604.1",
+        UserAgentInfo("Safari", "17.2", "macOS", "iPhone", "mobile"),
+    ),
+    (
+        "Mozilla/5.0 (iPad; CPU OS 17_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+        "Version/17.2 Mobile/15E148 Safari/604.1",
+        UserAgentInfo("Safari", "17.2", "macOS", "iPad", "mobile"),
+    ),
+    (
+        "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.6099.144 Mobile Safari/537.36",
+        UserAgentInfo("Chrome", "120.0.6099.144", "Android", "Android Phone", "mobile"),
+    ),
+    (
+        "Mozilla/5.0 (Linux; Android 13; SM-X700) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36",
+        UserAgentInfo("Chrome", "120.0.0.0", "Android", "Android Device", "mobile"),
+    ),
+    (
+        "Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0",
+        UserAgentInfo("Firefox", "121.0", "Linux", "Desktop", "desktop"),
+    ),
+    (
+        "Mozilla/5.0 (X11; CrOS x86_64 14541.0.0) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36",
+        UserAgentInfo("Chrome", "120.0.0.0", "Chrome OS", "Desktop", "desktop"),
+    ),
+    (
+        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36 OPR/106.0.0.0",
+        UserAgentInfo("Chrome", "120.0.0.0", "macOS", "Desktop", "desktop"),
+    ),
+    (
+        "Opera/9.80 (Windows NT 6.1; WOW64) Presto/2.12.388 Version/12.18",
+        UserAgentInfo("Unknown Browser", None, "Windows", "Desktop", "desktop"),
+    ),
+    (
+        "curl/8.4.0",
+        UserAgentInfo("Unknown Browser", None, "Unknown OS", "Desktop", "desktop"),
+    ),
+    (
+        "",
+        UserAgentInfo(None, None, None, None, None),
+    ),
+]
+
+
+class TestClassifyUserAgent:
+    """Тесты для classify_user_agent"""
+
+    @pytest.mark.parametrize(("user_agent", "expected"), CORPUS)
+    def test_should_classify_user_agent_corpus(self, user_agent, expected):
+        """Тест должен классифицировать User-Agent из корпуса"""
+        # when
+        result = classify_user_agent(user_agent)
+
+        # then
+        assert result == expected
+
+    def test_should_reuse_cached_result_for_same_user_agent(self):
+        """Тест должен возвращать закэшированный результат для повторного User-Agent"""
+        # given
+        user_agent = CORPUS[0][0]
+        classify_user_agent(user_agent)
+        hits_before = classify_user_agent.cache_info().hits
+
+        # when
+        result = classify_user_agent(user_agent)
+
+        # then
+        assert result == CORPUS[0][1]
+        assert classify_user_agent.cache_info().hits == hits_before + 1
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 
@@ -23,7 +23,7 @@ class TestUserService:
         # given
         mock_repository = Mock(spec=UserRepository)
         mock_auth_service = Mock()
-        mock_auth_service.get_password_hash.return_value = "hashed_password"
+        mock_auth_service.get_password_hash = AsyncMock(return_value="hashed_password")
 
         mock_user = User(
             id=1, email="test@example.com", first_name="Test", middle_name="User", password_hashed="hashed_password"